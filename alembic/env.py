@@ -1,9 +1,11 @@
 import os
+import re
 
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy import make_url
 
 from alembic import context
 
@@ -23,12 +25,22 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-db_user = os.getenv("POSTGRES_USER")
-db_pass = os.getenv("POSTGRES_PASSWORD")
-db_host = os.getenv("POSTGRES_HOST")
-db_port = os.getenv("POSTGRES_PORT")
-db_name = os.getenv("POSTGRES_DB")
-sync_db_url = f"postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
+database_url = os.getenv("DATABASE_URL")
+if database_url:
+    # same database as the app, through the dialect's default sync driver
+    url = make_url(database_url)
+    sync_db_url = url.set(drivername=url.get_backend_name()).render_as_string(
+        hide_password=False
+    )
+    # the ini parser would read "%" in an escaped URL as interpolation
+    sync_db_url = sync_db_url.replace("%", "%%")
+else:
+    db_user = os.getenv("POSTGRES_USER")
+    db_pass = os.getenv("POSTGRES_PASSWORD")
+    db_host = os.getenv("POSTGRES_HOST")
+    db_port = os.getenv("POSTGRES_PORT")
+    db_name = os.getenv("POSTGRES_DB")
+    sync_db_url = f"postgresql://{db_user}:{db_pass}@{db_host}:{db_port}/{db_name}"
 if not sync_db_url:
     raise RuntimeError("DATABASE_URL is not set in .env")
 
@@ -39,8 +51,27 @@ config.set_main_option("sqlalchemy.url", sync_db_url)
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.models.init_model import Base
+# model modules register their tables on Base.metadata when imported
+import app.models.auth_model  # noqa: F401
+import app.models.idempotency_model  # noqa: F401
+import app.models.payment_model  # noqa: F401
+import app.models.payment_summary_model  # noqa: F401
+import app.models.payment_user_model  # noqa: F401
 target_metadata = Base.metadata
 
+# the monthly partitions of payment, and the tables of the months detached
+# from it (app.core.db.db_partitions), are not in the models
+PARTITION_TABLES = re.compile(r"payment(_user)?_(\d{4}_\d{2}|default)")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table":
+        return not (reflected and PARTITION_TABLES.fullmatch(name))
+    if type_ == "foreign_key_constraint":
+        # Postgres copies a foreign key to a partitioned table per partition
+        return not PARTITION_TABLES.fullmatch(object.referred_table.name)
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -64,6 +95,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -86,7 +118,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
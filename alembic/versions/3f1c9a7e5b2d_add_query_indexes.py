@@ -0,0 +1,58 @@
+"""add indexes for payment listing queries
+
+Revision ID: 3f1c9a7e5b2d
+Revises: bd4626ca907d
+Create Date: 2026-10-18 09:12:40.512300
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a7e5b2d"
+down_revision: Union[str, Sequence[str], None] = "bd4626ca907d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    # per-user listings: WHERE user_email = ... joined on payment_id
+    (
+        "ix_payment_user_user_email_payment_id",
+        "payment_user",
+        ["user_email", "payment_id"],
+    ),
+    # keyset pagination and export order
+    ("ix_payment_creation_time_payment_id", "payment", ["creation_time", "payment_id"]),
+    # status filters, newest first
+    ("ix_payment_status_creation_time", "payment", ["status", "creation_time"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
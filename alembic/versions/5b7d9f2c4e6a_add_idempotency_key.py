@@ -0,0 +1,44 @@
+"""add idempotency_key table
+
+Revision ID: 5b7d9f2c4e6a
+Revises: 8d2e4b6f1a9c
+Create Date: 2026-10-18 13:05:47.219864
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7d9f2c4e6a"
+down_revision: Union[str, Sequence[str], None] = "8d2e4b6f1a9c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "idempotency_key",
+        sa.Column("user_email", sa.String(length=255), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("payment_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_email", "key"),
+    )
+    op.create_index(
+        "ix_idempotency_key_expires_at",
+        "idempotency_key",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_idempotency_key_expires_at", table_name="idempotency_key")
+    op.drop_table("idempotency_key")
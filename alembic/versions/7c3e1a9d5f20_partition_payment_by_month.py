@@ -0,0 +1,183 @@
+"""partition payment by month of creation_time
+
+Revision ID: 7c3e1a9d5f20
+Revises: 5b7d9f2c4e6a
+Create Date: 2026-10-18 17:40:12.803215
+
+Rebuilds payment as a table partitioned by range of creation_time, with one
+partition per month from the oldest payment to MONTHS_AHEAD months from now
+and a default one, and copies the rows over. payment_user gets the
+payment's creation_time, and its foreign key the payment's whole key.
+
+The copy runs in the migration's transaction with payment locked: run it in
+a maintenance window on a large table.
+"""
+
+import datetime
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e1a9d5f20"
+down_revision: Union[str, Sequence[str], None] = "5b7d9f2c4e6a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# PAYMENT_PARTITION_MONTHS_AHEAD when this revision was written
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "payment_id, card_number, first_name, last_name, second_name, amount, "
+    "creation_time, status"
+)
+INDEXES = (
+    ("ix_payment_creation_time_payment_id", ["creation_time", "payment_id"]),
+    ("ix_payment_status_creation_time", ["status", "creation_time"]),
+)
+
+
+def _add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _month_bound(month: datetime.date) -> str:
+    return datetime.datetime.combine(
+        month, datetime.time(), datetime.timezone.utc
+    ).isoformat()
+
+
+def _create_payment_table(*constraints, **kw) -> None:
+    op.create_table(
+        "payment",
+        sa.Column("payment_id", sa.UUID(), nullable=False),
+        sa.Column("card_number", sa.VARCHAR(length=4), nullable=False),
+        sa.Column("first_name", sa.VARCHAR(length=32), nullable=False),
+        sa.Column("last_name", sa.VARCHAR(length=64), nullable=False),
+        sa.Column("second_name", sa.VARCHAR(length=64), nullable=True),
+        sa.Column("amount", sa.NUMERIC(precision=12, scale=3), nullable=False),
+        sa.Column(
+            "creation_time",
+            postgresql.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "Создан",
+                "Оплачен",
+                "Отменен",
+                name="payment_status_enum",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        *constraints,
+        **kw,
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, "payment", columns, unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint(
+        "payment_user_payment_id_fkey", "payment_user", type_="foreignkey"
+    )
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="payment")
+    op.rename_table("payment", "payment_unpartitioned")
+    op.execute(
+        "ALTER TABLE payment_unpartitioned "
+        "RENAME CONSTRAINT payment_pkey TO payment_unpartitioned_pkey"
+    )
+
+    _create_payment_table(
+        sa.PrimaryKeyConstraint("payment_id", "creation_time", name="payment_pkey"),
+        postgresql_partition_by="RANGE (creation_time)",
+    )
+
+    today = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    oldest = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT CAST(date_trunc('month', min(creation_time) "
+                "AT TIME ZONE 'UTC') AS date) FROM payment_unpartitioned"
+            )
+        )
+        .scalar()
+    )
+    month = min(oldest or today, today)
+    while month <= _add_months(today, MONTHS_AHEAD):
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE payment_{month:%Y_%m} PARTITION OF payment "
+            f"FOR VALUES FROM ('{_month_bound(month)}') "
+            f"TO ('{_month_bound(following)}')"
+        )
+        month = following
+    op.execute("CREATE TABLE payment_default PARTITION OF payment DEFAULT")
+
+    op.execute(
+        f"INSERT INTO payment ({COLUMNS}) SELECT {COLUMNS} FROM payment_unpartitioned"
+    )
+
+    op.add_column(
+        "payment_user",
+        sa.Column("creation_time", postgresql.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.execute(
+        "UPDATE payment_user SET creation_time = p.creation_time "
+        "FROM payment_unpartitioned AS p "
+        "WHERE p.payment_id = payment_user.payment_id"
+    )
+    op.alter_column("payment_user", "creation_time", nullable=False)
+    op.create_foreign_key(
+        "payment_user_payment_id_creation_time_fkey",
+        "payment_user",
+        "payment",
+        ["payment_id", "creation_time"],
+        ["payment_id", "creation_time"],
+        ondelete="CASCADE",
+    )
+    op.drop_table("payment_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # partitions detached since the upgrade are left as they are
+    op.drop_constraint(
+        "payment_user_payment_id_creation_time_fkey",
+        "payment_user",
+        type_="foreignkey",
+    )
+    op.drop_column("payment_user", "creation_time")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name="payment")
+    op.rename_table("payment", "payment_partitioned")
+    op.execute(
+        "ALTER TABLE payment_partitioned "
+        "RENAME CONSTRAINT payment_pkey TO payment_partitioned_pkey"
+    )
+
+    _create_payment_table(sa.PrimaryKeyConstraint("payment_id", name="payment_pkey"))
+    op.execute(
+        f"INSERT INTO payment ({COLUMNS}) SELECT {COLUMNS} FROM payment_partitioned"
+    )
+    op.drop_table("payment_partitioned")
+
+    op.create_foreign_key(
+        "payment_user_payment_id_fkey",
+        "payment_user",
+        "payment",
+        ["payment_id"],
+        ["payment_id"],
+        ondelete="CASCADE",
+    )
@@ -0,0 +1,66 @@
+"""add payment_user_summary rollup table
+
+Revision ID: 8d2e4b6f1a9c
+Revises: 3f1c9a7e5b2d
+Create Date: 2026-10-18 11:40:12.804113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2e4b6f1a9c"
+down_revision: Union[str, Sequence[str], None] = "3f1c9a7e5b2d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# status -> column prefix, as in app.models.payment_summary_model
+STATUSES = (("Создан", "created"), ("Оплачен", "paid"), ("Отменен", "cancelled"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = []
+    for _, prefix in STATUSES:
+        columns += [
+            sa.Column(
+                f"{prefix}_count", sa.Integer(), server_default="0", nullable=False
+            ),
+            sa.Column(
+                f"{prefix}_amount",
+                sa.Numeric(precision=18, scale=3),
+                server_default="0",
+                nullable=False,
+            ),
+        ]
+    op.create_table(
+        "payment_user_summary",
+        sa.Column("user_email", sa.String(length=255), nullable=False),
+        *columns,
+        sa.PrimaryKeyConstraint("user_email"),
+    )
+
+    # Backfill from the existing payments. Writers that do not maintain the
+    # summary yet must be stopped until the new code is deployed, otherwise
+    # their payments are missing from it.
+    names = ", ".join(f"{prefix}_count, {prefix}_amount" for _, prefix in STATUSES)
+    aggregates = ", ".join(
+        f"count(*) FILTER (WHERE p.status = '{status}'), "
+        f"coalesce(sum(p.amount) FILTER (WHERE p.status = '{status}'), 0)"
+        for status, _ in STATUSES
+    )
+    op.execute(
+        f"INSERT INTO payment_user_summary (user_email, {names}) "
+        f"SELECT pu.user_email, {aggregates} "
+        "FROM payment_user pu JOIN payment p ON p.payment_id = pu.payment_id "
+        "GROUP BY pu.user_email"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("payment_user_summary")
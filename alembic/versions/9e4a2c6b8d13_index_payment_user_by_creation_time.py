@@ -0,0 +1,59 @@
+"""index a user's payments by creation_time
+
+Revision ID: 9e4a2c6b8d13
+Revises: 7c3e1a9d5f20
+Create Date: 2026-10-18 21:05:37.114902
+
+Replaces the (user_email, payment_id) index of payment_user with one on
+(user_email, creation_time, payment_id): the per-user listings and the
+payment search read a user's payments in creation order, and within a range
+of creation times, straight from it.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4a2c6b8d13"
+down_revision: Union[str, Sequence[str], None] = "7c3e1a9d5f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OLD_INDEX = ("ix_payment_user_user_email_payment_id", ["user_email", "payment_id"])
+NEW_INDEX = (
+    "ix_payment_user_user_email_creation_time_payment_id",
+    ["user_email", "creation_time", "payment_id"],
+)
+
+
+def _replace_index(old: tuple, new: tuple) -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; the new
+    # index is there before the old one goes
+    with op.get_context().autocommit_block():
+        name, columns = new
+        op.create_index(
+            name,
+            "payment_user",
+            columns,
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            old[0],
+            table_name="payment_user",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_index(OLD_INDEX, NEW_INDEX)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_index(NEW_INDEX, OLD_INDEX)
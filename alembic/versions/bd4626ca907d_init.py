@@ -22,17 +22,6 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f("ix_auth_data_user_email"), table_name="auth_data")
-    op.drop_table("auth_data")
-    op.drop_index(op.f("ix_payment_user_payment_id"), table_name="payment_user")
-    op.drop_table("payment_user")
-    op.drop_table("payment")
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
     op.create_table(
         "payment",
         sa.Column("payment_id", sa.UUID(), autoincrement=False, nullable=False),
@@ -111,3 +100,15 @@ def downgrade() -> None:
         op.f("ix_auth_data_user_email"), "auth_data", ["user_email"], unique=True
     )
     # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index(op.f("ix_auth_data_user_email"), table_name="auth_data")
+    op.drop_table("auth_data")
+    op.drop_index(op.f("ix_payment_user_payment_id"), table_name="payment_user")
+    op.drop_table("payment_user")
+    op.drop_table("payment")
+    op.execute("DROP TYPE IF EXISTS payment_status_enum")
+    # ### end Alembic commands ###
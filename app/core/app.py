@@ -3,12 +3,17 @@ from fastapi import FastAPI
 from app.core.events import on_startup, on_shutdown
 from app.routers import main_router
 from app.core.cors_middleware import init_middlewares
+from app.core.responses import get_response_class
+from app.core.metrics_middleware import init_metrics_middleware
+from app.core.session_middleware import init_session_middleware
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(default_response_class=get_response_class())
     app.include_router(main_router)
+    init_session_middleware(app)
     init_middlewares(app)
+    init_metrics_middleware(app)
     app.add_event_handler("startup", on_startup)
     app.add_event_handler("shutdown", on_shutdown)
     return app
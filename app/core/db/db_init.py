@@ -1,21 +1,149 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from typing import Any
 
+from sqlalchemy import URL, event, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
+
+from app.core.db.db_metrics import instrument_engine
+from app.core.db.db_partitions import maintain_partitions
+from app.core.db.db_migrations import (
+    CURRENT_REVISIONS,
+    SchemaRevisionError,
+    head_revisions,
+)
+from app.core.db.db_pool import InstrumentedAsyncPool
 from app.models.auth_model import Base
 
 from app.utils.config import settings
 
 
+def _engine_options(url: URL) -> dict[str, Any]:
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            # every connection to :memory: opens a new, empty database, so
+            # keep exactly one and never recycle it
+            return {"pool_size": 1, "max_overflow": 0, "pool_recycle": -1}
+        return {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        }
+
+    options: dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    # enforces ON DELETE CASCADE, off by default in SQLite
+    cursor.execute("PRAGMA foreign_keys=ON")
+    # readers do not block the writer (no-op for in-memory databases)
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def _create_engine(url: URL) -> AsyncEngine:
+    engine = create_async_engine(
+        url, poolclass=InstrumentedAsyncPool, **_engine_options(url)
+    )
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _configure_sqlite)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
 class DB:
-    def __init__(self):
-        self.engine = create_async_engine(
-            f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
-        )
+    """Engine and session factory for a database URL.
+
+    Postgres through asyncpg is the production backend. SQLite through
+    aiosqlite (e.g. ``sqlite+aiosqlite:///payments.db``) runs the same
+    models and repositories without a database server.
+
+    With ``replica_url`` (DATABASE_REPLICA_URL when the URLs come from the
+    settings) a second engine connects to a read replica, and
+    ``read_session`` opens sessions on it; without one ``read_session`` is
+    ``session``. The replica is never written to and its schema is
+    expected to follow the primary's.
+    """
+
+    def __init__(self, url: str | None = None, replica_url: str | None = None):
+        if url is None:
+            url = settings.database_url
+            replica_url = replica_url or settings.DATABASE_REPLICA_URL
+
+        self.engine = _create_engine(make_url(url))
         self.session = async_sessionmaker(self.engine, expire_on_commit=False)
 
+        self.replica_engine = None
+        self.read_session = self.session
+        if replica_url is not None:
+            self.replica_engine = _create_engine(make_url(replica_url))
+            self.read_session = async_sessionmaker(
+                self.replica_engine, expire_on_commit=False
+            )
+
+    @property
+    def engines(self) -> tuple[AsyncEngine, ...]:
+        if self.replica_engine is None:
+            return (self.engine,)
+        return (self.engine, self.replica_engine)
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
     async def setup_database(self):
-        async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        # a real replica already has the tables, so create_all only reads its
+        # catalog; a local one (another SQLite file) gets them created
+        for engine in self.engines:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+    async def maintain_partitions(self, **options) -> tuple[list[str], list[str]]:
+        """Creates (and with a retention, detaches) the monthly partitions of
+        the payment table on the primary; see ``db_partitions``.
+        """
+        return await maintain_partitions(self.engine, **options)
 
     async def drop_database(self):
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
+
+    async def verify_revision(self) -> set[str]:
+        """Checks with one query that the schema is at the migration head.
+
+        Returns the revisions, or raises SchemaRevisionError when the
+        database is behind, ahead or was never migrated. A read replica is
+        checked as well, so a worker does not start while the replica has
+        not replayed the migrations yet.
+        """
+        expected = head_revisions()
+        for engine in self.engines:
+            name = "Replica database" if engine is self.replica_engine else "Database"
+            try:
+                async with engine.connect() as conn:
+                    current = set((await conn.execute(CURRENT_REVISIONS)).scalars())
+            except DBAPIError as e:
+                raise SchemaRevisionError(
+                    f"{name} has no Alembic revision, run `alembic upgrade head`"
+                ) from e
+
+            if current != expected:
+                raise SchemaRevisionError(
+                    f"{name} schema is at revision "
+                    f"{', '.join(sorted(current)) or 'none'}, "
+                    f"the code expects {', '.join(sorted(expected))}; "
+                    "run `alembic upgrade head`"
+                )
+        return current
@@ -0,0 +1,41 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.metrics import db_statement_duration_seconds, db_statement_errors_total
+
+
+_STARTED = "metrics_statement_started"
+
+
+def _operation(statement: str) -> str:
+    # first keyword only: keeps the label set bounded
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info[_STARTED].pop()
+    db_statement_duration_seconds.observe(
+        time.perf_counter() - started, _operation(statement)
+    )
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is None or not conn.info.get(_STARTED):
+        return
+
+    conn.info[_STARTED].pop()
+    db_statement_errors_total.inc(_operation(exception_context.statement or ""))
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,262 @@
+"""Monthly partitions of the payment table.
+
+On Postgres, payment is partitioned by range of creation_time: one partition
+per calendar month (UTC), named ``payment_YYYY_MM``, and ``payment_default``
+for rows outside of them. Queries bounded in creation_time (keyset pages,
+joins on the payment's whole key) only visit the months they need.
+
+Maintenance creates the partitions of the next months ahead of time, so rows
+never land in the default partition, and with a retention detaches the
+partitions of months that are over: their payment_user rows are moved to a
+``payment_user_YYYY_MM`` table next to the detached partition and their
+payments are subtracted from the summaries. Both tables are then left to be
+archived and dropped.
+
+Everything here is a no-op on other databases.
+"""
+
+import datetime
+import logging
+
+from typing import Iterable
+
+from sqlalchemy import Connection, and_, bindparam, event, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.payment_model import PaymentModel
+from app.models.payment_summary_model import PaymentSummaryModel, SUMMARY_COLUMNS
+from app.models.payment_user_model import PaymentUserModel
+from app.utils.config import settings
+
+
+logger = logging.getLogger("app.db.partitions")
+
+PARENT = PaymentModel.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+# pg_try_advisory_xact_lock key: one maintenance run at a time
+_LOCK_KEY = 0x7061796D656E74
+
+_PARTITIONS = text(
+    "SELECT c.relname FROM pg_inherits i "
+    "JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = CAST(:parent AS regclass)"
+)
+_DEFAULT_ROWS = text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+
+
+def _archived_summaries():
+    owners = PaymentUserModel.__table__
+    payments = PaymentModel.__table__
+    summary = PaymentSummaryModel.__table__
+
+    deltas = {}
+    for status, prefix in SUMMARY_COLUMNS.items():
+        is_status = payments.c.status == status
+        deltas[f"{prefix}_count"] = func.count().filter(is_status)
+        deltas[f"{prefix}_amount"] = func.coalesce(
+            func.sum(payments.c.amount).filter(is_status), 0
+        )
+    archived = (
+        select(owners.c.user_email, *(v.label(k) for k, v in deltas.items()))
+        .join(
+            payments,
+            and_(
+                payments.c.payment_id == owners.c.payment_id,
+                payments.c.creation_time == owners.c.creation_time,
+            ),
+        )
+        .where(
+            owners.c.creation_time >= bindparam("lower"),
+            owners.c.creation_time < bindparam("upper"),
+        )
+        .group_by(owners.c.user_email)
+        .subquery("archived")
+    )
+    return (
+        update(summary)
+        .where(summary.c.user_email == archived.c.user_email)
+        .values({k: summary.c[k] - archived.c[k] for k in deltas})
+    )
+
+
+# takes the payments of [lower, upper) out of their owners' summaries
+_SUBTRACT_ARCHIVED = _archived_summaries()
+
+
+def month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> datetime.date | None:
+    """The month of a ``payment_YYYY_MM`` partition, None for other tables."""
+    try:
+        return datetime.datetime.strptime(name, f"{PARENT}_%Y_%m").date()
+    except ValueError:
+        return None
+
+
+def _bounds(month: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
+    lower = datetime.datetime.combine(month, datetime.time(), datetime.timezone.utc)
+    upper = datetime.datetime.combine(
+        add_months(month, 1), datetime.time(), datetime.timezone.utc
+    )
+    return lower, upper
+
+
+def plan_partitions(
+    existing: Iterable[datetime.date],
+    today: datetime.date,
+    months_ahead: int,
+    retention_months: int | None = None,
+) -> tuple[list[datetime.date], list[datetime.date]]:
+    """Months to create and months to detach.
+
+    Creates the current month and the ``months_ahead`` next ones; with a
+    retention, detaches the months older than the last ``retention_months``
+    (the current one included).
+    """
+    existing = set(existing)
+    current = month_start(today)
+    create = [
+        month
+        for month in (add_months(current, i) for i in range(months_ahead + 1))
+        if month not in existing
+    ]
+    detach = []
+    if retention_months is not None:
+        oldest_kept = add_months(current, 1 - max(retention_months, 1))
+        detach = sorted(month for month in existing if month < oldest_kept)
+    return create, detach
+
+
+def existing_partitions(conn: Connection) -> list[datetime.date]:
+    names = conn.execute(_PARTITIONS, {"parent": PARENT}).scalars()
+    return sorted(month for month in map(partition_month, names) if month)
+
+
+def create_partition(conn: Connection, month: datetime.date) -> None:
+    lower, upper = _bounds(month)
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} "
+            f"PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    )
+
+
+def detach_partition(conn: Connection, month: datetime.date) -> None:
+    lower, upper = _bounds(month)
+    name = partition_name(month)
+    owners = f"{PaymentUserModel.__tablename__}_{month:%Y_%m}"
+    params = {"lower": lower, "upper": upper}
+
+    conn.execute(_SUBTRACT_ARCHIVED, params)
+    conn.execute(
+        text(
+            f"CREATE TABLE {owners} "
+            f"(LIKE {PaymentUserModel.__tablename__} INCLUDING DEFAULTS)"
+        )
+    )
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {PaymentUserModel.__tablename__} "
+            "WHERE creation_time >= :lower AND creation_time < :upper "
+            f"RETURNING *) INSERT INTO {owners} SELECT * FROM moved"
+        ),
+        params,
+    )
+    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+
+
+def maintain(
+    conn: Connection,
+    today: datetime.date,
+    months_ahead: int,
+    retention_months: int | None = None,
+    dry_run: bool = False,
+) -> tuple[list[str], list[str]]:
+    """Creates and detaches partitions, in the connection's transaction.
+
+    Returns the names of the created and the detached partitions (to be,
+    with ``dry_run``). Does nothing while another run holds the lock.
+    """
+    if conn.dialect.name != "postgresql":
+        return [], []
+    if not conn.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}
+    ).scalar():
+        logger.info("Partition maintenance is already running elsewhere")
+        return [], []
+
+    create, detach = plan_partitions(
+        existing_partitions(conn), today, months_ahead, retention_months
+    )
+    if not dry_run:
+        # DDL on payment waits for the queries on it, and the queries that
+        # come next wait behind the DDL: give up rather than stall them
+        timeout_ms = int(settings.PAYMENT_PARTITION_LOCK_TIMEOUT * 1000)
+        conn.execute(text(f"SET LOCAL lock_timeout = {timeout_ms}"))
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+                f"PARTITION OF {PARENT} DEFAULT"
+            )
+        )
+        for month in create:
+            create_partition(conn, month)
+        for month in detach:
+            detach_partition(conn, month)
+
+        misplaced = conn.execute(_DEFAULT_ROWS).scalar()
+        if misplaced:
+            logger.warning(
+                "%d payments are in %s: create their months' partitions "
+                "after moving them out",
+                misplaced,
+                DEFAULT_PARTITION,
+            )
+
+    return [partition_name(m) for m in create], [partition_name(m) for m in detach]
+
+
+async def maintain_partitions(
+    engine: AsyncEngine,
+    months_ahead: int | None = None,
+    retention_months: int | None = None,
+    dry_run: bool = False,
+    today: datetime.date | None = None,
+) -> tuple[list[str], list[str]]:
+    """``maintain`` in a transaction of its own on ``engine``.
+
+    Defaults to PAYMENT_PARTITION_MONTHS_AHEAD months ahead, and detaches
+    nothing unless given a retention.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PAYMENT_PARTITION_MONTHS_AHEAD
+    if today is None:
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+    async with engine.begin() as conn:
+        return await conn.run_sync(
+            maintain, today, months_ahead, retention_months, dry_run
+        )
+
+
+@event.listens_for(PaymentModel.__table__, "after_create")
+def _create_partitions(target, connection: Connection, **kw) -> None:
+    # a table created by create_all gets its first partitions right away;
+    # the migration creates them for a migrated database
+    maintain(
+        connection,
+        datetime.datetime.now(datetime.timezone.utc).date(),
+        settings.PAYMENT_PARTITION_MONTHS_AHEAD,
+    )
@@ -0,0 +1,58 @@
+import time
+
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long checkouts take.
+
+    The acquire time covers waiting for a free slot and, when the pool has
+    room to grow, opening (and pre-pinging) the connection.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.acquire_time_total = 0.0
+        self.acquire_time_max = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        elapsed = time.perf_counter() - started
+        self.acquired += 1
+        self.acquire_time_total += elapsed
+        self.acquire_time_max = max(self.acquire_time_max, elapsed)
+        return conn
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            # QueuePool counts overflow from -pool_size until the pool is full
+            "overflow": max(self.overflow(), 0),
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "acquire_time_avg": (
+                self.acquire_time_total / self.acquired if self.acquired else 0.0
+            ),
+            "acquire_time_max": self.acquire_time_max,
+        }
@@ -0,0 +1,111 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+
+class RequestScope:
+    """One connection and one session shared by every repository call of a request.
+
+    The connection is checked out lazily, on the first repository call, so
+    requests that never touch the database do not take one. Transactions
+    stay explicit: repositories commit or roll back as before, and whatever
+    is left uncommitted when the request ends is rolled back.
+
+    With a read replica, reads take a second connection, to the replica,
+    until the request's first write. From then on the request is marked as
+    having written and its reads go to the primary, so it reads its own
+    writes even when the replica lags behind.
+
+    The session is not safe for concurrent use; repository calls within
+    one request must be awaited one after another.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        read_session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.wrote = False
+        self._connection: AsyncConnection | None = None
+        self._session: AsyncSession | None = None
+        self._read_connection: AsyncConnection | None = None
+        self._read_session: AsyncSession | None = None
+
+    async def get_session(self, read: bool = False) -> AsyncSession:
+        if (
+            read
+            and not self.wrote
+            and self.read_session_factory is not self.session_factory
+        ):
+            if self._read_session is None:
+                self._read_connection, self._read_session = await self._open(
+                    self.read_session_factory
+                )
+            return self._read_session
+
+        if not read:
+            self.wrote = True
+        return await self.get_primary_session()
+
+    async def get_primary_session(self) -> AsyncSession:
+        """The primary's session, for a read that must not see replica lag.
+
+        Unlike ``get_session()`` it does not mark the request as having
+        written, so the request's other reads stay on the replica.
+        """
+        if self._session is None:
+            self._connection, self._session = await self._open(self.session_factory)
+        return self._session
+
+    async def close(self) -> None:
+        try:
+            await self._close(self._read_connection, self._read_session)
+        finally:
+            await self._close(self._connection, self._session)
+            self._session = self._read_session = None
+            self._connection = self._read_connection = None
+
+    @staticmethod
+    async def _open(
+        session_factory: async_sessionmaker[AsyncSession],
+    ) -> tuple[AsyncConnection, AsyncSession]:
+        connection = await session_factory.kw["bind"].connect()
+        return connection, session_factory(bind=connection)
+
+    @staticmethod
+    async def _close(
+        connection: AsyncConnection | None, session: AsyncSession | None
+    ) -> None:
+        try:
+            if session is not None:
+                await session.close()
+        finally:
+            if connection is not None:
+                await connection.close()
+
+
+_current_scope: ContextVar[RequestScope | None] = ContextVar(
+    "db_request_scope", default=None
+)
+
+
+def current_scope() -> RequestScope | None:
+    return _current_scope.get()
+
+
+@asynccontextmanager
+async def request_scope(
+    session_factory: async_sessionmaker[AsyncSession],
+    read_session_factory: async_sessionmaker[AsyncSession] | None = None,
+) -> AsyncIterator[RequestScope]:
+    scope = RequestScope(session_factory, read_session_factory)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        await scope.close()
@@ -1,10 +1,16 @@
 from app.core.db.db_init import DB
 from app.core.db.operations.db_auth_opers import DBAuthRepository
+from app.core.db.operations.db_idempotency_opers import DBIdempotencyRepository
 from app.core.db.operations.db_payment_opers import DBPaymentRepository
 from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
 
 db = DB()
 
-db_auth = DBAuthRepository(db.session)
-db_payment = DBPaymentRepository(db.session)
-db_payment_user = DBPaymentUserRepository(db.session)
+db_auth = DBAuthRepository(db.session, read_session=db.read_session)
+db_payment = DBPaymentRepository(db.session, db.read_session)
+db_payment_user = DBPaymentUserRepository(db.session, db.read_session)
+db_payment_uow = DBPaymentUnitOfWork(db.session, db.read_session)
+db_payment_summary = DBPaymentSummaryRepository(db.session, db.read_session)
+db_idempotency = DBIdempotencyRepository(db.session, read_session=db.read_session)
@@ -1,96 +1,140 @@
 from typing import Sequence
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import bindparam, select, update, delete
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.schemas.auth_schema import UserSchema
 from app.models.auth_model import AuthModel
-from app.core.db.operations.db_operations import DBRepository
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.pagination import DEFAULT_PAGE_SIZE, KeysetQuery
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+
+
+AUTH_KEYSET = (AuthModel.id,)
+AUTH_KEYSET_PARSERS = (int,)
+
+_GET_USER = select(AuthModel).filter(AuthModel.user_email == bindparam("user_email"))
+_GET_ALL_USERS = select(AuthModel)
+_USER_PAGE = KeysetQuery(select(AuthModel), AUTH_KEYSET, AUTH_KEYSET_PARSERS)
 
 
 class DBAuthRepository(DBRepository):
+    def __init__(
+        self,
+        session: async_sessionmaker[AsyncSession],
+        cache: TTLCache[str, AuthModel] | None = None,
+        read_session: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        super().__init__(session, read_session)
+        if cache is None:
+            cache = TTLCache(
+                maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+            )
+        self.cache = cache
+
+    @connection
     async def create(
         self,
         user_data: UserSchema,
+        *,
+        session: AsyncSession,
     ) -> UserSchema:
-        @self.connection
-        async def inner_create(
-            inner_user_data: UserSchema,
-            session: AsyncSession,
-        ):
-            new_user = AuthModel(
-                first_name=inner_user_data.first_name,
-                last_name=inner_user_data.last_name,
-                user_email=inner_user_data.user_email,
-                user_password_hash=inner_user_data.user_password,
-            )
-
-            try:
-                session.add(new_user)
-                await session.commit()
-                await session.refresh(new_user)
-                return new_user
-            except IntegrityError:
-                await session.rollback()
-                return None
-            except Exception:
-                await session.rollback()
-                raise
+        new_user = AuthModel(
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            user_email=user_data.user_email,
+            user_password_hash=user_data.user_password,
+        )
 
-        return await inner_create(user_data)
+        try:
+            session.add(new_user)
+            await session.commit()
+            await session.refresh(new_user)
+            return new_user
+        except IntegrityError:
+            await session.rollback()
+            return None
+        except Exception:
+            await session.rollback()
+            raise
 
     async def get(self, user_email: AuthModel.user_email) -> AuthModel | None:
-        @self.connection
-        async def inner_get(
-            inner_user_email: AuthModel.user_email, session: AsyncSession
-        ):
-            query = select(AuthModel).filter_by(user_email=inner_user_email)
-            res = await session.execute(query)
-            return res.scalars().one_or_none()
+        user = self.cache.get(user_email)
+        if user is not None:
+            return user
+
+        user = await self._load(user_email)
+        if user is not None:
+            self.cache.set(user_email, user)
+        return user
 
-        return await inner_get(user_email)
+    # what is cached comes from the primary, so a lagging replica cannot put
+    # back a password or a user that update or delete just dropped
+    @connection(primary=True)
+    async def _load(
+        self, user_email: AuthModel.user_email, *, session: AsyncSession
+    ) -> AuthModel | None:
+        res = await session.execute(_GET_USER, {"user_email": user_email})
+        return res.scalars().one_or_none()
 
     async def update(
         self,
         user_email: AuthModel.user_email,
         user_password_hash: str,
     ) -> None:
-        @self.connection
-        async def inner_update(
-            inner_user_email: AuthModel.user_email,
-            inner_user_pass_hash: str,
-            session: AsyncSession,
-        ):
-            stmt = (
-                update(AuthModel)
-                .values(user_password_hash=inner_user_pass_hash)
-                .filter_by(user_email=inner_user_email)
-            )
-            await session.execute(stmt)
-            await session.commit()
+        try:
+            return await self._update(user_email, user_password_hash)
+        finally:
+            self.cache.pop(user_email)
 
-        return await inner_update(user_email, user_password_hash)
+    @connection
+    async def _update(
+        self,
+        user_email: AuthModel.user_email,
+        user_password_hash: str,
+        *,
+        session: AsyncSession,
+    ) -> None:
+        stmt = (
+            update(AuthModel)
+            .values(user_password_hash=user_password_hash)
+            .filter_by(user_email=user_email)
+        )
+        await session.execute(stmt)
+        await session.commit()
 
     async def delete(
         self,
         user_email: AuthModel.user_email,
     ) -> None:
-        @self.connection
-        async def inner_delete(
-            inner_user_email: AuthModel.user_email, session: AsyncSession
-        ):
-            stmt = delete(AuthModel).filter_by(user_email=inner_user_email)
-            await session.execute(stmt)
-            await session.commit()
+        try:
+            return await self._delete(user_email)
+        finally:
+            self.cache.pop(user_email)
 
-        return await inner_delete(user_email)
+    @connection
+    async def _delete(
+        self, user_email: AuthModel.user_email, *, session: AsyncSession
+    ) -> None:
+        stmt = delete(AuthModel).filter_by(user_email=user_email)
+        await session.execute(stmt)
+        await session.commit()
 
-    async def get_all(self) -> Sequence[AuthModel]:
-        @self.connection
-        async def inner_get_all(session: AsyncSession):
-            query = select(AuthModel)
-            res = await session.execute(query)
-            return res.scalars().all()
+    @connection
+    async def get_all(self, *, session: AsyncSession) -> Sequence[AuthModel]:
+        res = await session.execute(_GET_ALL_USERS)
+        return res.scalars().all()
 
-        return await inner_get_all()
+    @connection
+    async def get_page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[AuthModel], str | None]:
+        stmt, params = _USER_PAGE.statement(cursor, limit)
+        res = await session.execute(stmt, params)
+        return _USER_PAGE.page(res.scalars().all(), limit)
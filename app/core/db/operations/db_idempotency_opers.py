@@ -0,0 +1,113 @@
+import datetime
+
+from pydantic import EmailStr
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.dialects import PerDialect
+from app.models.idempotency_model import IdempotencyKeyModel
+from app.utils.cache import TTLCache
+from app.utils.config import settings
+
+
+_keys = IdempotencyKeyModel.__table__
+
+# Live (not expired) key of a user.
+GET_KEY = select(IdempotencyKeyModel).filter(
+    IdempotencyKeyModel.user_email == bindparam("user_email"),
+    IdempotencyKeyModel.key == bindparam("key"),
+    IdempotencyKeyModel.expires_at > bindparam("now"),
+)
+
+
+def _claim_key(insert):
+    stmt = insert(_keys).values(
+        user_email=bindparam("user_email"),
+        key=bindparam("key"),
+        request_hash=bindparam("request_hash"),
+        expires_at=bindparam("expires_at"),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[_keys.c.user_email, _keys.c.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "payment_id": None,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=_keys.c.expires_at <= bindparam("now"),
+    ).returning(_keys.c.key)
+
+
+# Claims a key for a new request and returns it. An expired key is taken
+# over. A live key returns no row, and so does a key claimed by a
+# concurrent transaction: the insert waits on the primary key until that
+# transaction commits.
+CLAIM_KEY = PerDialect(_claim_key)
+
+SET_KEY_PAYMENT = (
+    update(_keys)
+    .values(payment_id=bindparam("payment_id"))
+    .where(
+        _keys.c.user_email == bindparam("owner"),
+        _keys.c.key == bindparam("idempotency_key"),
+    )
+)
+
+_DELETE_EXPIRED = delete(_keys).where(_keys.c.expires_at <= bindparam("now"))
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class DBIdempotencyRepository(DBRepository):
+    """Completed idempotent requests, fronted by an in-process LRU.
+
+    Keys are claimed in the unit of work, in the same transaction as the
+    writes they protect, so only completed requests are ever visible here.
+    """
+
+    def __init__(
+        self,
+        session: async_sessionmaker[AsyncSession],
+        cache: TTLCache[tuple[str, str], IdempotencyKeyModel] | None = None,
+        read_session: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        super().__init__(session, read_session)
+        if cache is None:
+            cache = TTLCache(
+                maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+                ttl=settings.IDEMPOTENCY_KEY_TTL,
+            )
+        self.cache = cache
+
+    async def get(self, user_email: EmailStr, key: str) -> IdempotencyKeyModel | None:
+        record = self.cache.get((user_email, key))
+        if record is not None:
+            return record
+
+        record = await self._get(user_email, key)
+        if record is not None:
+            self.remember(record)
+        return record
+
+    def remember(self, record: IdempotencyKeyModel) -> None:
+        ttl = (record.expires_at - utcnow()).total_seconds()
+        if ttl > 0:
+            self.cache.set((record.user_email, record.key), record, ttl)
+
+    @connection
+    async def delete_expired(self, *, session: AsyncSession) -> int:
+        res = await session.execute(_DELETE_EXPIRED, {"now": utcnow()})
+        await session.commit()
+        return res.rowcount
+
+    @connection
+    async def _get(
+        self, user_email: EmailStr, key: str, *, session: AsyncSession
+    ) -> IdempotencyKeyModel | None:
+        res = await session.execute(
+            GET_KEY, {"user_email": user_email, "key": key, "now": utcnow()}
+        )
+        return res.scalars().one_or_none()
@@ -1,26 +1,94 @@
-from functools import wraps
-from typing import Callable, Coroutine, Any, TypeVar
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from typing import AsyncIterator, Callable, Coroutine, Any, TypeVar
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
+from app.core.db.db_request_scope import current_scope
+
 
 R = TypeVar("R")
 
 
 class DBRepository:
-    def __init__(self, session: async_sessionmaker[AsyncSession]):
+    def __init__(
+        self,
+        session: async_sessionmaker[AsyncSession],
+        read_session: async_sessionmaker[AsyncSession] | None = None,
+    ):
         self.session = session
+        # a read replica's session factory; reads use the primary without one
+        self.read_session = read_session or session
+
+    @asynccontextmanager
+    async def streaming_session(self) -> AsyncIterator[AsyncSession]:
+        """A read session held open for a streamed result.
+
+        Inside a request it is the request's own read session (the
+        replica's, or the primary's once the request has written), so a
+        stream takes no connection besides the request's; otherwise a new
+        read session is opened and closed around the block.
+        """
+        scope = current_scope()
+        if scope is not None and scope.session_factory is self.session:
+            session = await scope.get_session(read=True)
+            try:
+                yield session
+            except Exception as e:
+                await session.rollback()
+                raise e
+            return
+
+        async with self.read_session() as session:
+            yield session
+
+
+def is_read(method: Callable[..., Any]) -> bool:
+    """``get*`` and ``search*`` methods only read, and may be served by a replica."""
+    return method.__name__.lstrip("_").startswith(("get", "search"))
+
+
+def connection(
+    method: Callable[..., Coroutine[Any, Any, R]] | None = None,
+    *,
+    primary: bool = False,
+) -> Any:
+    """Decorates a repository method, passing it a session as ``session=``.
+
+    Applied once, in the class body. Inside a request the request's session
+    is reused; otherwise a new one is opened and closed around the call.
+    Reads (see ``is_read``) go to the read replica when there is one, and
+    to the primary once the request has written.
+
+    ``@connection(primary=True)`` reads from the primary whatever the name,
+    without marking the request as having written, so its later reads
+    still go to the replica.
+    """
+    if method is None:
+        return partial(connection, primary=primary)
+
+    read = is_read(method) and not primary
+
+    @wraps(method)
+    async def wrapper(self: DBRepository, *args: Any, **kwargs: Any) -> R:
+        scope = current_scope()
+        if scope is not None and scope.session_factory is self.session:
+            if primary:
+                session = await scope.get_primary_session()
+            else:
+                session = await scope.get_session(read)
+            try:
+                return await method(self, *args, session=session, **kwargs)
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+        session_factory = self.read_session if read else self.session
+        async with session_factory() as session:
+            try:
+                return await method(self, *args, session=session, **kwargs)
+            except Exception as e:
+                await session.rollback()
+                raise e
 
-    def connection(
-        self, method: Callable[..., Coroutine[Any, Any, R]]
-    ) -> Callable[..., Coroutine[Any, Any, R]]:
-        @wraps(method)
-        async def wrapper(*args: Any, **kwargs: Any) -> R:
-            async with self.session() as session:
-                try:
-                    return await method(*args, session=session, **kwargs)
-                except Exception as e:
-                    await session.rollback()
-                    raise e
-
-        return wrapper
+    return wrapper
@@ -0,0 +1,113 @@
+from pydantic import EmailStr
+from sqlalchemy import Integer, Update, and_, bindparam, case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.dialects import PerDialect
+from app.models.init_model import PaymentStatus
+from app.models.payment_model import PaymentModel
+from app.models.payment_summary_model import PaymentSummaryModel, SUMMARY_COLUMNS
+from app.models.payment_user_model import PaymentUserModel
+
+
+# Core statements on the table: the ORM bulk insert path does not take
+# ON CONFLICT updates keyed by column name
+_summary = PaymentSummaryModel.__table__
+
+
+def _accumulate(stmt, columns):
+    # a user's first payment inserts the row, later ones add to it
+    return stmt.on_conflict_do_update(
+        index_elements=[_summary.c.user_email],
+        set_={column: _summary.c[column] + stmt.excluded[column] for column in columns},
+    )
+
+
+def _apply_payment(insert):
+    sign = bindparam("sign", type_=Integer)
+    deltas = {}
+    for status, prefix in SUMMARY_COLUMNS.items():
+        is_status = PaymentModel.status == status
+        deltas[f"{prefix}_count"] = case((is_status, sign), else_=0)
+        deltas[f"{prefix}_amount"] = case(
+            (is_status, PaymentModel.amount * sign), else_=0
+        )
+
+    # the row lock makes concurrent status changes of one payment apply
+    # their deltas one after another, each seeing the committed status
+    source = (
+        select(PaymentUserModel.user_email, *deltas.values())
+        .join(
+            PaymentModel,
+            and_(
+                PaymentModel.payment_id == PaymentUserModel.payment_id,
+                PaymentModel.creation_time == PaymentUserModel.creation_time,
+            ),
+        )
+        .filter(PaymentUserModel.payment_id == bindparam("payment_id"))
+        .with_for_update(of=PaymentModel)
+    )
+    stmt = insert(_summary).from_select(["user_email", *deltas], source)
+    return _accumulate(stmt, deltas)
+
+
+# Adds ("sign": 1) or subtracts ("sign": -1) one payment, with its current
+# status and amount, to its owner's summary. Payments without an owner are
+# not counted.
+APPLY_PAYMENT = PerDialect(_apply_payment)
+
+
+def move_status(payments, old: PaymentStatus, new: PaymentStatus) -> Update:
+    """Moves ``payments`` (rows with payment_id, creation_time and amount)
+    from the ``old`` status to the ``new`` one in their owners' summaries.
+
+    Owners always have a summary row, so a plain UPDATE is enough.
+    """
+    owners = PaymentUserModel.__table__
+    old_prefix, new_prefix = SUMMARY_COLUMNS[old], SUMMARY_COLUMNS[new]
+    return (
+        update(_summary)
+        .where(
+            _summary.c.user_email == owners.c.user_email,
+            owners.c.payment_id == payments.c.payment_id,
+            owners.c.creation_time == payments.c.creation_time,
+        )
+        .values(
+            {
+                f"{old_prefix}_count": _summary.c[f"{old_prefix}_count"] - 1,
+                f"{old_prefix}_amount": _summary.c[f"{old_prefix}_amount"]
+                - payments.c.amount,
+                f"{new_prefix}_count": _summary.c[f"{new_prefix}_count"] + 1,
+                f"{new_prefix}_amount": _summary.c[f"{new_prefix}_amount"]
+                + payments.c.amount,
+            }
+        )
+    )
+
+
+def _add_created(insert):
+    stmt = insert(_summary).values(
+        user_email=bindparam("user_email"),
+        created_count=bindparam("count"),
+        created_amount=bindparam("amount"),
+    )
+    return _accumulate(stmt, ("created_count", "created_amount"))
+
+
+# Adds "count" new payments worth "amount" in total to the created status.
+ADD_CREATED = PerDialect(_add_created)
+
+_GET_SUMMARY = (
+    select(PaymentSummaryModel)
+    .filter(PaymentSummaryModel.user_email == bindparam("user_email"))
+    .execution_options(populate_existing=True)
+)
+
+
+class DBPaymentSummaryRepository(DBRepository):
+    @connection
+    async def get(
+        self, user_email: EmailStr, *, session: AsyncSession
+    ) -> PaymentSummaryModel | None:
+        res = await session.execute(_GET_SUMMARY, {"user_email": user_email})
+        return res.scalars().one_or_none()
@@ -2,92 +2,108 @@ from typing import Sequence
 import uuid as _uuid
 
 from pydantic import EmailStr
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
-from app.core.db.operations.db_operations import DBRepository
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.db_paym_summary_opers import APPLY_PAYMENT
+from app.core.db.operations.pagination import DEFAULT_PAGE_SIZE, KeysetQuery
+from app.models.payment_model import PaymentModel
 from app.models.payment_user_model import PaymentUserModel
 
 
+PAYMENT_USER_KEYSET = (PaymentUserModel.payment_id,)
+PAYMENT_USER_KEYSET_PARSERS = (_uuid.UUID,)
+
+_GET_RECORD = select(PaymentUserModel).filter(
+    PaymentUserModel.payment_id == bindparam("payment_id")
+)
+_GET_USER_RECORDS = select(PaymentUserModel).filter(
+    PaymentUserModel.user_email == bindparam("user_email")
+)
+_GET_ALL_RECORDS = select(PaymentUserModel)
+_RECORD_PAGE = KeysetQuery(
+    select(PaymentUserModel), PAYMENT_USER_KEYSET, PAYMENT_USER_KEYSET_PARSERS
+)
+
+
 class DBPaymentUserRepository(DBRepository):
+    @connection
     async def create(
-        self, user_email: EmailStr, payment_id: _uuid.UUID
+        self, user_email: EmailStr, payment_id: _uuid.UUID, *, session: AsyncSession
     ) -> PaymentUserModel:
-        @self.connection
-        async def inner_create(
-            inner_user_email: EmailStr,
-            inner_payment_id: _uuid.UUID,
-            session: AsyncSession,
-        ):
-            new_record = PaymentUserModel(
-                user_email=inner_user_email,
-                payment_id=inner_payment_id,
-            )
-
-            try:
-                session.add(new_record)
-                await session.commit()
-                await session.refresh(new_record)
-                return new_record
-            except IntegrityError:
-                await session.rollback()
-                return None
-            except Exception:
-                await session.rollback()
-                raise
+        new_record = PaymentUserModel(
+            user_email=user_email,
+            payment_id=payment_id,
+            # NULL, and so an IntegrityError, when the payment does not exist
+            creation_time=select(PaymentModel.creation_time)
+            .filter(PaymentModel.payment_id == payment_id)
+            .scalar_subquery(),
+        )
 
-        return await inner_create(user_email, payment_id)
+        try:
+            session.add(new_record)
+            await session.flush()
+            await session.execute(
+                APPLY_PAYMENT(session), {"payment_id": payment_id, "sign": 1}
+            )
+            await session.commit()
+            await session.refresh(new_record)
+            return new_record
+        except IntegrityError:
+            await session.rollback()
+            return None
+        except Exception:
+            await session.rollback()
+            raise
 
+    @connection
     async def get(
         self,
         payment_id: _uuid.UUID,
+        *,
+        session: AsyncSession,
     ) -> PaymentUserModel | None:
-        @self.connection
-        async def inner_get(
-            inner_payment_id: _uuid.UUID,
-            session: AsyncSession,
-        ):
-            query = select(PaymentUserModel).filter_by(payment_id=inner_payment_id)
-            res = await session.execute(query)
-            return res.scalars().one_or_none()
-
-        return await inner_get(payment_id)
+        res = await session.execute(_GET_RECORD, {"payment_id": payment_id})
+        return res.scalars().one_or_none()
 
     async def update(self): ...
 
+    @connection
     async def delete(
         self,
         payment_id: _uuid.UUID,
+        *,
+        session: AsyncSession,
     ) -> None:
-        @self.connection
-        async def inner_delete(
-            inner_payment_id: _uuid.UUID,
-            session: AsyncSession,
-        ):
-            stmt = delete(PaymentUserModel).filter_by(payment_id=inner_payment_id)
-            await session.execute(stmt)
-            await session.commit()
+        stmt = delete(PaymentUserModel).filter_by(payment_id=payment_id)
+        await session.execute(
+            APPLY_PAYMENT(session), {"payment_id": payment_id, "sign": -1}
+        )
+        await session.execute(stmt)
+        await session.commit()
 
-        return await inner_delete(payment_id)
+    @connection
+    async def get_all(self, *, session: AsyncSession) -> Sequence[PaymentUserModel]:
+        res = await session.execute(_GET_ALL_RECORDS)
+        return res.scalars().all()
 
-    async def get_all(self) -> Sequence[PaymentUserModel]:
-        @self.connection
-        async def inner_get_all(session: AsyncSession):
-            query = select(PaymentUserModel)
-            res = await session.execute(query)
-            return res.scalars().all()
-
-        return await inner_get_all()
-
-    async def get_by_user(self, user_email: EmailStr) -> Sequence[PaymentUserModel]:
-        @self.connection
-        async def inner_get_by_user(
-            inner_user_email: EmailStr,
-            session: AsyncSession,
-        ):
-            query = select(PaymentUserModel).filter_by(user_email=inner_user_email)
-            res = await session.execute(query)
-            return res.scalars().all()
+    @connection
+    async def get_page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentUserModel], str | None]:
+        stmt, params = _RECORD_PAGE.statement(cursor, limit)
+        res = await session.execute(stmt, params)
+        return _RECORD_PAGE.page(res.scalars().all(), limit)
 
-        return await inner_get_by_user(user_email)
+    @connection
+    async def get_by_user(
+        self, user_email: EmailStr, *, session: AsyncSession
+    ) -> Sequence[PaymentUserModel]:
+        res = await session.execute(_GET_USER_RECORDS, {"user_email": user_email})
+        return res.scalars().all()
@@ -1,130 +1,398 @@
-from typing import Sequence
+import datetime
+import decimal
+import functools
+from typing import AsyncIterator, Sequence
 import uuid as _uuid
 
-from sqlalchemy import select, update, delete
+from pydantic import EmailStr
+from sqlalchemy import Row, Select, and_, bindparam, select, update, delete
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db.operations.db_operations import DBRepository
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.db_paym_summary_opers import APPLY_PAYMENT, move_status
+from app.core.db.operations.dialects import dialect_name
+from app.core.db.operations.pagination import DEFAULT_PAGE_SIZE, KeysetQuery
 from app.models.init_model import PaymentStatus
 from app.models.payment_model import PaymentModel
-from app.schemas.payment_schema import PaymentSchema
+from app.models.payment_summary_model import SUMMARY_COLUMNS
+from app.models.payment_user_model import PaymentUserModel
+from app.schemas.payment_schema import PaymentSchema, PaymentSearchSchema
+
+
+PAYMENT_KEYSET = (PaymentModel.creation_time, PaymentModel.payment_id)
+PAYMENT_KEYSET_PARSERS = (datetime.datetime.fromisoformat, _uuid.UUID)
+
+
+def _user_payments_query() -> Select:
+    return (
+        select(PaymentModel)
+        .join(
+            PaymentUserModel,
+            and_(
+                PaymentUserModel.payment_id == PaymentModel.payment_id,
+                PaymentUserModel.creation_time == PaymentModel.creation_time,
+            ),
+        )
+        .filter(PaymentUserModel.user_email == bindparam("user_email"))
+    )
+
+
+_GET_PAYMENT = select(PaymentModel).filter(
+    PaymentModel.payment_id == bindparam("payment_id")
+)
+_GET_PAYMENT_BY_STATUS = _GET_PAYMENT.filter(PaymentModel.status == bindparam("status"))
+_GET_PAYMENT_BY_AMOUNT = _GET_PAYMENT.filter(PaymentModel.amount < bindparam("amount"))
+_GET_ALL_PAYMENTS = select(PaymentModel)
+
+
+def _update_if_created(status: PaymentStatus) -> Select:
+    # One statement: the conditional UPDATE and the summary change run as
+    # data-modifying CTEs. A concurrent change of the same payment blocks on
+    # the row lock and then no longer matches status = 'Создан'.
+    moved = (
+        update(PaymentModel.__table__)
+        .where(
+            # named after a column, the parameter would also be SET
+            PaymentModel.payment_id == bindparam("target_id"),
+            PaymentModel.status == "Создан",
+        )
+        .values(status=status)
+        .returning(*PaymentModel.__table__.c)
+        .cte("moved")
+    )
+    stmt = select(aliased(PaymentModel, moved))
+    if status != "Создан":
+        stmt = stmt.add_cte(move_status(moved, "Создан", status).cte("summary"))
+    return stmt.execution_options(populate_existing=True)
+
+
+_UPDATE_IF_CREATED = {status: _update_if_created(status) for status in SUMMARY_COLUMNS}
+
+# Databases without data-modifying CTEs (SQLite) run the same two changes
+# as separate statements, one after the other in the transaction.
+_SET_STATUS_IF_CREATED = {
+    status: update(PaymentModel)
+    .where(
+        PaymentModel.payment_id == bindparam("target_id"),
+        PaymentModel.status == "Создан",
+    )
+    .values(status=status)
+    .returning(PaymentModel)
+    .execution_options(populate_existing=True)
+    for status in SUMMARY_COLUMNS
+}
+_MOVE_SUMMARY = {
+    status: move_status(PaymentModel.__table__, "Создан", status).where(
+        PaymentModel.payment_id == bindparam("target_id")
+    )
+    for status in SUMMARY_COLUMNS
+    if status != "Создан"
+}
+
+_PAYMENT_PAGE = KeysetQuery(
+    select(PaymentModel), PAYMENT_KEYSET, PAYMENT_KEYSET_PARSERS
+)
+_USER_PAYMENT_PAGE = KeysetQuery(
+    _user_payments_query(), PAYMENT_KEYSET, PAYMENT_KEYSET_PARSERS
+)
+_USER_PAYMENT_BY_STATUS_PAGE = KeysetQuery(
+    _user_payments_query().filter(PaymentModel.status == bindparam("status")),
+    PAYMENT_KEYSET,
+    PAYMENT_KEYSET_PARSERS,
+)
+_USER_PAYMENT_BY_AMOUNT_PAGE = KeysetQuery(
+    _user_payments_query().filter(PaymentModel.amount < bindparam("amount")),
+    PAYMENT_KEYSET,
+    PAYMENT_KEYSET_PARSERS,
+)
+
+# Search filters by name. Time bounds apply to both tables: on payment they
+# prune its partitions, on payment_user they bound the range read from its
+# (user_email, creation_time, payment_id) index.
+_created_from = bindparam("created_from", type_=PaymentModel.creation_time.type)
+_created_to = bindparam("created_to", type_=PaymentModel.creation_time.type)
+_SEARCH_FILTERS = {
+    "status": PaymentModel.status.in_(bindparam("status", expanding=True)),
+    "amount_min": PaymentModel.amount >= bindparam("amount_min"),
+    "amount_max": PaymentModel.amount <= bindparam("amount_max"),
+    "created_from": and_(
+        PaymentUserModel.creation_time >= _created_from,
+        PaymentModel.creation_time >= _created_from,
+    ),
+    "created_to": and_(
+        PaymentUserModel.creation_time < _created_to,
+        PaymentModel.creation_time < _created_to,
+    ),
+    # the schema only lets letters, '-' and ' ' through: nothing to escape
+    "name": (PaymentModel.first_name + " " + PaymentModel.last_name).startswith(
+        bindparam("name")
+    ),
+}
+
+
+def _decimal(value: str) -> decimal.Decimal:
+    try:
+        return decimal.Decimal(value)
+    except decimal.InvalidOperation as e:
+        raise ValueError(value) from e
+
+
+# Pages in creation order go by payment_user's copy of the key, which its
+# index is sorted by; pages by amount sort the user's matching payments.
+_SEARCH_KEYSETS = {
+    "creation_time": (
+        (PaymentUserModel.creation_time, PaymentUserModel.payment_id),
+        PAYMENT_KEYSET_PARSERS,
+    ),
+    "amount": (
+        (PaymentModel.amount, *PAYMENT_KEYSET),
+        (_decimal, *PAYMENT_KEYSET_PARSERS),
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _search_page(filters: frozenset[str], sort: str) -> KeysetQuery:
+    """The statements of one combination of filters and sort order.
+
+    Built on first use, then reused: there are only so many combinations.
+    """
+    query = _user_payments_query().filter(
+        *(condition for name, condition in _SEARCH_FILTERS.items() if name in filters)
+    )
+    columns, parsers = _SEARCH_KEYSETS[sort.lstrip("-")]
+    return KeysetQuery(query, columns, parsers, descending=sort.startswith("-"))
 
 
 class DBPaymentRepository(DBRepository):
-    async def create(self, payment_data: PaymentSchema) -> PaymentModel | None:
-        @self.connection
-        async def inner_create(
-            inner_payment_data: PaymentSchema, session: AsyncSession
-        ):
-            new_payment = PaymentModel(
-                card_number=inner_payment_data.card_number,
-                first_name=inner_payment_data.first_name,
-                last_name=inner_payment_data.last_name,
-                second_name=inner_payment_data.second_name,
-                amount=inner_payment_data.amount,
-                status="Создан",
-            )
+    @connection
+    async def create(
+        self, payment_data: PaymentSchema, *, session: AsyncSession
+    ) -> PaymentModel | None:
+        new_payment = PaymentModel(
+            card_number=payment_data.card_number,
+            first_name=payment_data.first_name,
+            last_name=payment_data.last_name,
+            second_name=payment_data.second_name,
+            amount=payment_data.amount,
+            status="Создан",
+        )
 
-            try:
-                session.add(new_payment)
-                await session.commit()
-                await session.refresh(new_payment)
-                return new_payment
-            except IntegrityError:
-                await session.rollback()
-                return None
-            except Exception:
-                await session.rollback()
-                raise
-
-        return await inner_create(payment_data)
-
-    async def get(self, payment_id: _uuid.UUID) -> PaymentModel | None:
-        @self.connection
-        async def inner_get(
-            inner_payment_id: _uuid.UUID,
-            session: AsyncSession,
-        ):
-            query = select(PaymentModel).filter_by(payment_id=inner_payment_id)
-            res = await session.execute(query)
-            return res.scalars().one_or_none()
-
-        return await inner_get(payment_id)
+        try:
+            session.add(new_payment)
+            await session.commit()
+            await session.refresh(new_payment)
+            return new_payment
+        except IntegrityError:
+            await session.rollback()
+            return None
+        except Exception:
+            await session.rollback()
+            raise
+
+    @connection
+    async def get(
+        self, payment_id: _uuid.UUID, *, session: AsyncSession
+    ) -> PaymentModel | None:
+        res = await session.execute(_GET_PAYMENT, {"payment_id": payment_id})
+        return res.scalars().one_or_none()
 
+    @connection
     async def update(
         self,
         payment_id: _uuid.UUID,
         status: PaymentStatus,
+        *,
+        session: AsyncSession,
     ) -> None:
-        @self.connection
-        async def inner_update(
-            inner_payment_id: _uuid.UUID,
-            inner_status: PaymentStatus,
-            session: AsyncSession,
-        ):
-            stmt = (
-                update(PaymentModel)
-                .values(status=inner_status)
-                .filter_by(payment_id=inner_payment_id)
-            )
-            await session.execute(stmt)
-            await session.commit()
+        stmt = (
+            update(PaymentModel).values(status=status).filter_by(payment_id=payment_id)
+        )
+        # move the payment from its old status to the new one in the summary
+        await session.execute(
+            APPLY_PAYMENT(session), {"payment_id": payment_id, "sign": -1}
+        )
+        await session.execute(stmt)
+        await session.execute(
+            APPLY_PAYMENT(session), {"payment_id": payment_id, "sign": 1}
+        )
+        await session.commit()
+
+    @connection
+    async def update_if_created(
+        self,
+        payment_id: _uuid.UUID,
+        status: PaymentStatus,
+        *,
+        session: AsyncSession,
+    ) -> PaymentModel | None:
+        """Changes the status of a payment that is still "Создан".
 
-        return await inner_update(payment_id, status)
+        Returns the updated payment, or None when the payment does not
+        exist or its status is already final.
+        """
+        params = {"target_id": payment_id}
+        if dialect_name(session) == "postgresql":
+            res = await session.execute(_UPDATE_IF_CREATED[status], params)
+            payment = res.scalars().one_or_none()
+        else:
+            res = await session.execute(_SET_STATUS_IF_CREATED[status], params)
+            payment = res.scalars().one_or_none()
+            if payment is not None and status in _MOVE_SUMMARY:
+                await session.execute(_MOVE_SUMMARY[status], params)
+        await session.commit()
+        return payment
 
+    @connection
     async def delete(
         self,
         payment_id: _uuid.UUID,
+        *,
+        session: AsyncSession,
     ) -> None:
-        @self.connection
-        async def inner_delete(inner_payment_id: _uuid.UUID, session: AsyncSession):
-            stmt = delete(PaymentModel).filter_by(payment_id=inner_payment_id)
-            await session.execute(stmt)
-            await session.commit()
+        stmt = delete(PaymentModel).filter_by(payment_id=payment_id)
+        await session.execute(
+            APPLY_PAYMENT(session), {"payment_id": payment_id, "sign": -1}
+        )
+        await session.execute(stmt)
+        await session.commit()
 
-        return await inner_delete(payment_id)
+    @connection
+    async def get_all(self, *, session: AsyncSession) -> Sequence[PaymentModel]:
+        res = await session.execute(_GET_ALL_PAYMENTS)
+        return res.scalars().all()
 
-    async def get_all(self) -> Sequence[PaymentModel]:
-        @self.connection
-        async def inner_get_all(session: AsyncSession):
-            query = select(PaymentModel)
-            res = await session.execute(query)
-            return res.scalars().all()
-
-        return await inner_get_all()
+    @connection
+    async def get_page(
+        self,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentModel], str | None]:
+        stmt, params = _PAYMENT_PAGE.statement(cursor, limit)
+        res = await session.execute(stmt, params)
+        return _PAYMENT_PAGE.page(res.scalars().all(), limit)
 
-    async def get_by_status(
-        self, payment_id: _uuid.UUID, status: PaymentStatus
-    ) -> Sequence[PaymentModel]:
-        @self.connection
-        async def inner_get_by_status(
-            inner_payment_id: _uuid.UUID,
-            inner_status: PaymentStatus,
-            session: AsyncSession,
-        ):
-            query = select(PaymentModel).filter_by(
-                payment_id=inner_payment_id, status=inner_status
+    async def stream_with_users(self, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        query = (
+            select(
+                PaymentModel.payment_id,
+                PaymentUserModel.user_email,
+                PaymentModel.card_number,
+                PaymentModel.first_name,
+                PaymentModel.last_name,
+                PaymentModel.second_name,
+                PaymentModel.amount,
+                PaymentModel.creation_time,
+                PaymentModel.status,
             )
-            res = await session.execute(query)
-            return res.scalars().one_or_none()
+            .outerjoin(
+                PaymentUserModel,
+                and_(
+                    PaymentUserModel.payment_id == PaymentModel.payment_id,
+                    PaymentUserModel.creation_time == PaymentModel.creation_time,
+                ),
+            )
+            .order_by(*PAYMENT_KEYSET)
+            .execution_options(yield_per=batch_size)
+        )
+
+        # within a request, on the request's own connection; the result is
+        # closed even when the client goes away mid-export, as the session
+        # outlives the stream
+        async with self.streaming_session() as session:
+            res = await session.stream(query)
+            try:
+                async for batch in res.partitions():
+                    yield batch
+            finally:
+                await res.close()
 
-        return await inner_get_by_status(payment_id, status)
+    @connection
+    async def get_by_status(
+        self, payment_id: _uuid.UUID, status: PaymentStatus, *, session: AsyncSession
+    ) -> PaymentModel | None:
+        res = await session.execute(
+            _GET_PAYMENT_BY_STATUS, {"payment_id": payment_id, "status": status}
+        )
+        return res.scalars().one_or_none()
 
+    @connection
     async def get_by_amount(
-        self, payment_id: _uuid.UUID, amount: PaymentModel.amount
-    ) -> Sequence[PaymentModel]:
-        @self.connection
-        async def inner_get_by_amount(
-            inner_payment_id: _uuid.UUID,
-            inner_amount: PaymentModel.creation_time,
-            session: AsyncSession,
-        ):
-            query = select(PaymentModel).filter(
-                PaymentModel.payment_id == inner_payment_id,
-                PaymentModel.amount < inner_amount,
-            )
-            res = await session.execute(query)
-            return res.scalars().one_or_none()
+        self,
+        payment_id: _uuid.UUID,
+        amount: PaymentModel.amount,
+        *,
+        session: AsyncSession,
+    ) -> PaymentModel | None:
+        res = await session.execute(
+            _GET_PAYMENT_BY_AMOUNT, {"payment_id": payment_id, "amount": amount}
+        )
+        return res.scalars().one_or_none()
+
+    @connection
+    async def get_by_user(
+        self,
+        user_email: EmailStr,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentModel], str | None]:
+        stmt, params = _USER_PAYMENT_PAGE.statement(
+            cursor, limit, user_email=user_email
+        )
+        res = await session.execute(stmt, params)
+        return _USER_PAYMENT_PAGE.page(res.scalars().all(), limit)
 
-        return await inner_get_by_amount(payment_id, amount)
+    @connection
+    async def get_by_user_and_status(
+        self,
+        user_email: EmailStr,
+        status: PaymentStatus,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentModel], str | None]:
+        stmt, params = _USER_PAYMENT_BY_STATUS_PAGE.statement(
+            cursor, limit, user_email=user_email, status=status
+        )
+        res = await session.execute(stmt, params)
+        return _USER_PAYMENT_BY_STATUS_PAGE.page(res.scalars().all(), limit)
+
+    @connection
+    async def get_by_user_and_amount(
+        self,
+        user_email: EmailStr,
+        amount: PaymentModel.amount,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentModel], str | None]:
+        stmt, params = _USER_PAYMENT_BY_AMOUNT_PAGE.statement(
+            cursor, limit, user_email=user_email, amount=amount
+        )
+        res = await session.execute(stmt, params)
+        return _USER_PAYMENT_BY_AMOUNT_PAGE.page(res.scalars().all(), limit)
+
+    @connection
+    async def search(
+        self,
+        user_email: EmailStr,
+        filters: PaymentSearchSchema,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        *,
+        session: AsyncSession,
+    ) -> tuple[Sequence[PaymentModel], str | None]:
+        """A page of the user's payments matching all of ``filters``."""
+        params = filters.model_dump(exclude={"sort"}, exclude_none=True)
+        page = _search_page(frozenset(params), filters.sort)
+        stmt, params = page.statement(cursor, limit, user_email=user_email, **params)
+        res = await session.execute(stmt, params)
+        return page.page(res.scalars().all(), limit)
@@ -0,0 +1,217 @@
+import datetime
+import uuid as _uuid
+
+from typing import Sequence
+
+from pydantic import EmailStr
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.operations.db_idempotency_opers import (
+    CLAIM_KEY,
+    GET_KEY,
+    SET_KEY_PAYMENT,
+    utcnow,
+)
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.db.operations.db_paym_summary_opers import ADD_CREATED
+from app.models.idempotency_model import IdempotencyKeyModel
+from app.models.payment_model import PaymentModel
+from app.models.payment_user_model import PaymentUserModel
+from app.schemas.payment_schema import PaymentSchema
+
+
+class DBPaymentUnitOfWork(DBRepository):
+    """Writes that span the payment, payment_user, summary and
+    idempotency tables.
+
+    Every method runs in a single transaction: either all rows are
+    written or none are.
+    """
+
+    @connection
+    async def create_payment(
+        self,
+        user_email: EmailStr,
+        payment_data: PaymentSchema,
+        *,
+        session: AsyncSession,
+    ) -> _uuid.UUID | None:
+        try:
+            payment_id = await self._insert_payment(session, user_email, payment_data)
+            await session.commit()
+            return payment_id
+        except IntegrityError:
+            await session.rollback()
+            return None
+        except Exception:
+            await session.rollback()
+            raise
+
+    @connection
+    async def create_payment_once(
+        self,
+        user_email: EmailStr,
+        payment_data: PaymentSchema,
+        key: str,
+        request_hash: str,
+        ttl: float,
+        *,
+        session: AsyncSession,
+    ) -> tuple[IdempotencyKeyModel | None, bool]:
+        """Creates a payment unless ``key`` already created one.
+
+        Returns the key's record and whether this call created the payment.
+        Concurrent calls with the same key are serialised by the key's
+        primary key, so exactly one of them creates a payment.
+        """
+        now = utcnow()
+        record = IdempotencyKeyModel(
+            user_email=user_email,
+            key=key,
+            request_hash=request_hash,
+            expires_at=now + datetime.timedelta(seconds=ttl),
+        )
+
+        try:
+            claimed = await session.execute(
+                CLAIM_KEY(session),
+                {
+                    "user_email": user_email,
+                    "key": key,
+                    "request_hash": request_hash,
+                    "expires_at": record.expires_at,
+                    "now": now,
+                },
+            )
+            if claimed.first() is None:
+                res = await session.execute(
+                    GET_KEY, {"user_email": user_email, "key": key, "now": now}
+                )
+                existing = res.scalars().one()
+                # release the row lock taken by ON CONFLICT; rollback would
+                # expire the record if it stayed in the session
+                session.expunge(existing)
+                await session.rollback()
+                return existing, False
+
+            record.payment_id = await self._insert_payment(
+                session, user_email, payment_data
+            )
+            await session.execute(
+                SET_KEY_PAYMENT,
+                {
+                    "payment_id": record.payment_id,
+                    "owner": user_email,
+                    "idempotency_key": key,
+                },
+            )
+            await session.commit()
+            return record, True
+        except IntegrityError:
+            await session.rollback()
+            return None, False
+        except Exception:
+            await session.rollback()
+            raise
+
+    @connection
+    async def create_payments(
+        self,
+        user_email: EmailStr,
+        payments_data: Sequence[PaymentSchema],
+        chunk_size: int,
+        *,
+        session: AsyncSession,
+    ) -> list[_uuid.UUID] | None:
+        payment_stmt = insert(PaymentModel).returning(
+            PaymentModel.payment_id,
+            PaymentModel.creation_time,
+            sort_by_parameter_order=True,
+        )
+        relation_stmt = insert(PaymentUserModel)
+
+        payment_ids = []
+        try:
+            for start in range(0, len(payments_data), chunk_size):
+                chunk = payments_data[start : start + chunk_size]
+                res = await session.execute(
+                    payment_stmt,
+                    [
+                        {
+                            "payment_id": _uuid.uuid4(),
+                            "card_number": el.card_number,
+                            "first_name": el.first_name,
+                            "last_name": el.last_name,
+                            "second_name": el.second_name,
+                            "amount": el.amount,
+                            "status": "Создан",
+                        }
+                        for el in chunk
+                    ],
+                )
+                chunk_keys = res.all()
+                await session.execute(
+                    relation_stmt,
+                    [
+                        {
+                            "user_email": user_email,
+                            "payment_id": payment_id,
+                            "creation_time": creation_time,
+                        }
+                        for payment_id, creation_time in chunk_keys
+                    ],
+                )
+                payment_ids.extend(payment_id for payment_id, _ in chunk_keys)
+
+            await session.execute(
+                ADD_CREATED(session),
+                {
+                    "user_email": user_email,
+                    "count": len(payment_ids),
+                    "amount": sum(el.amount for el in payments_data),
+                },
+            )
+            await session.commit()
+            return payment_ids
+        except IntegrityError:
+            await session.rollback()
+            return None
+        except Exception:
+            await session.rollback()
+            raise
+
+    async def _insert_payment(
+        self,
+        session: AsyncSession,
+        user_email: EmailStr,
+        payment_data: PaymentSchema,
+    ) -> _uuid.UUID:
+        payment_stmt = (
+            insert(PaymentModel)
+            .values(
+                card_number=payment_data.card_number,
+                first_name=payment_data.first_name,
+                last_name=payment_data.last_name,
+                second_name=payment_data.second_name,
+                amount=payment_data.amount,
+                status="Создан",
+            )
+            .returning(PaymentModel.payment_id, PaymentModel.creation_time)
+        )
+
+        res = await session.execute(payment_stmt)
+        payment_id, creation_time = res.one()
+        await session.execute(
+            insert(PaymentUserModel).values(
+                user_email=user_email,
+                payment_id=payment_id,
+                creation_time=creation_time,
+            )
+        )
+        await session.execute(
+            ADD_CREATED(session),
+            {"user_email": user_email, "count": 1, "amount": payment_data.amount},
+        )
+        return payment_id
@@ -0,0 +1,38 @@
+from typing import Any, Callable, Generic, TypeVar
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+T = TypeVar("T")
+
+# dialects with an INSERT ... ON CONFLICT construct, Postgres first
+INSERTS: dict[str, Callable[..., Any]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+DEFAULT_DIALECT = "postgresql"
+
+
+def dialect_name(session: AsyncSession) -> str:
+    """Name of the database dialect ``session`` is bound to.
+
+    Postgres when the session is not bound to a supported one.
+    """
+    name = getattr(getattr(session.bind, "dialect", None), "name", None)
+    return name if name in INSERTS else DEFAULT_DIALECT
+
+
+class PerDialect(Generic[T]):
+    """A statement prebuilt once per dialect, for SQL that differs between them.
+
+    ``build`` is called at import time with each dialect's ``insert``
+    construct; calling the instance with a session picks the statement for
+    the session's database.
+    """
+
+    def __init__(self, build: Callable[[Callable[..., Any]], T]):
+        self.statements = {name: build(insert) for name, insert in INSERTS.items()}
+
+    def __call__(self, session: AsyncSession) -> T:
+        return self.statements[dialect_name(session)]
@@ -0,0 +1,107 @@
+import base64
+import binascii
+import datetime
+import json
+
+from typing import Any, Callable, Sequence, TypeVar
+
+from sqlalchemy import Integer, Select, and_, bindparam, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError): ...
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values],
+        default=str,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise InvalidCursorError("Invalid cursor")
+
+    try:
+        return [parse(v) for parse, v in zip(parsers, values)]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+class KeysetQuery:
+    """Prebuilt first-page and next-page statements for a keyset-paginated query.
+
+    The cursor values and the page size are bound parameters, so both
+    statements are built (and their cache keys computed) once, at import
+    time, instead of on every call. With ``descending`` the pages go from
+    the largest keys down, all columns in the same direction.
+    """
+
+    def __init__(
+        self,
+        query: Select,
+        columns: Sequence[InstrumentedAttribute],
+        parsers: Sequence[Callable[[Any], Any]],
+        descending: bool = False,
+    ):
+        self.columns = tuple(columns)
+        self.parsers = tuple(parsers)
+        self._after = tuple(f"after_{c.key}" for c in self.columns)
+
+        after = [bindparam(name, type_=c.type) for name, c in zip(self._after, columns)]
+        if len(columns) == 1:
+            condition = columns[0] < after[0] if descending else columns[0] > after[0]
+        elif descending:
+            condition = and_(columns[0] <= after[0], tuple_(*columns) < tuple_(*after))
+        else:
+            # the leading column on its own as well: a row comparison does
+            # not prune partitions or bound an index range on that column
+            condition = and_(columns[0] >= after[0], tuple_(*columns) > tuple_(*after))
+
+        order = [c.desc() for c in columns] if descending else columns
+        # one extra row tells whether there is a next page
+        limit = bindparam("page_limit", type_=Integer)
+        self.first_page = query.order_by(*order).limit(limit)
+        self.next_page = query.filter(condition).order_by(*order).limit(limit)
+
+    def statement(
+        self, cursor: str | None, limit: int, **params: Any
+    ) -> tuple[Select, dict[str, Any]]:
+        params["page_limit"] = limit + 1
+        if cursor is None:
+            return self.first_page, params
+
+        params.update(zip(self._after, decode_cursor(cursor, self.parsers)))
+        return self.next_page, params
+
+    def page(self, rows: Sequence[T], limit: int) -> tuple[list[T], str | None]:
+        return keyset_page(rows, self.columns, limit)
+
+
+def keyset_page(
+    rows: Sequence[T],
+    columns: Sequence[InstrumentedAttribute],
+    limit: int,
+) -> tuple[list[T], str | None]:
+    items = list(rows)
+    if len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(*(getattr(last, c.key) for c in columns))
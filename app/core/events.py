@@ -1,9 +1,89 @@
-from app.core.db.db_sessions import db
+import asyncio
+import contextlib
+import logging
+
+from app.core.db.db_sessions import db, db_idempotency
+from app.services.hash_service import hash_service
+from app.utils.config import settings
+
+
+logger = logging.getLogger("app.events")
+background_tasks: set[asyncio.Task] = set()
+# set on shutdown: the background tasks finish the run they are in and return
+_stopping = asyncio.Event()
+# how long shutdown waits for them before cancelling
+BACKGROUND_TASK_STOP_TIMEOUT = 10.0
+
+
+async def _stopped_within(interval: float) -> bool:
+    """Sleeps for ``interval``; True as soon as shutdown begins instead."""
+    try:
+        await asyncio.wait_for(_stopping.wait(), interval)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def purge_idempotency_keys(interval: float) -> None:
+    while not await _stopped_within(interval):
+        try:
+            deleted = await db_idempotency.delete_expired()
+            logger.info("Purged %d expired idempotency keys", deleted)
+        except Exception as e:
+            logger.exception("Failed to purge expired idempotency keys: %s", e)
+
+
+async def maintain_payment_partitions(interval: float) -> None:
+    # the first run is an interval after start: a restart takes no lock and
+    # runs no DDL, boot-time maintenance is left to app.serve's parent
+    # (create_all) or to `python -m app.partitions`
+    while not await _stopped_within(interval):
+        try:
+            created, detached = await db.maintain_partitions(
+                retention_months=settings.PAYMENT_PARTITION_RETENTION_MONTHS
+            )
+            if created or detached:
+                logger.info(
+                    "Created partitions %s, detached partitions %s",
+                    ", ".join(created) or "none",
+                    ", ".join(detached) or "none",
+                )
+        except Exception as e:
+            logger.exception("Failed to maintain payment partitions: %s", e)
 
 
 async def on_startup():
-    await db.setup_database()
+    _stopping.clear()
+    hash_service.start()
+    if settings.DB_STARTUP_MODE == "verify_revision":
+        revisions = await db.verify_revision()
+        logger.info("Database schema is at revision %s", ", ".join(sorted(revisions)))
+    else:
+        await db.setup_database()
+    background_tasks.add(
+        asyncio.create_task(purge_idempotency_keys(settings.IDEMPOTENCY_PURGE_INTERVAL))
+    )
+    background_tasks.add(
+        asyncio.create_task(
+            maintain_payment_partitions(settings.PAYMENT_PARTITION_MAINTENANCE_INTERVAL)
+        )
+    )
 
 
 async def on_shutdown():
-    await db.engine.dispose()
+    # cancelled while opening a connection, a task would leave that
+    # connection open behind the pool's back: let them return on their own
+    _stopping.set()
+    if background_tasks:
+        _, pending = await asyncio.wait(
+            background_tasks, timeout=BACKGROUND_TASK_STOP_TIMEOUT
+        )
+        for task in pending:
+            logger.warning("Background task %s did not stop, cancelling it", task)
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    background_tasks.clear()
+
+    await db.dispose()
+    hash_service.shutdown()
@@ -0,0 +1,55 @@
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+
+class MetricsMiddleware:
+    """Records per-route request counts and latencies.
+
+    Requests are labelled with the route template (``/payment/{payment_id}``),
+    not the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+
+            # the router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+
+            http_requests_total.inc(method, path, str(status))
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started, method, path
+            )
+
+
+def init_metrics_middleware(app: FastAPI) -> None:
+    app.add_middleware(MetricsMiddleware)
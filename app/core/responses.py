@@ -0,0 +1,27 @@
+import logging
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.utils.config import settings
+
+
+logger = logging.getLogger("app.responses")
+
+
+def get_response_class() -> type[JSONResponse]:
+    """Response class for routes that return JSON.
+
+    ``ORJSONResponse`` renders the already serialised response body with
+    orjson instead of ``json.dumps``. orjson is optional, so without it the
+    stdlib encoder is used.
+    """
+    if not settings.ORJSON_RESPONSES:
+        return JSONResponse
+
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        logger.warning("ORJSON_RESPONSES is set but orjson is not installed")
+        return JSONResponse
+
+    return ORJSONResponse
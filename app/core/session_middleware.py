@@ -0,0 +1,40 @@
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.db.db_request_scope import request_scope
+from app.core.db.db_sessions import db
+
+
+class RequestSessionMiddleware:
+    """Opens a database request scope around each HTTP request.
+
+    The scope lives until the response has been sent, so streamed
+    responses can still use it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        session_factory: async_sessionmaker[AsyncSession],
+        read_session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self.app = app
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with request_scope(self.session_factory, self.read_session_factory):
+            await self.app(scope, receive, send)
+
+
+def init_session_middleware(app: FastAPI) -> None:
+    app.add_middleware(
+        RequestSessionMiddleware,
+        session_factory=db.session,
+        read_session_factory=db.read_session,
+    )
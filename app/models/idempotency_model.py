@@ -0,0 +1,26 @@
+import datetime
+import uuid as _uuid
+
+from typing import Optional
+
+from sqlalchemy import Index, String, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .init_model import Base, UTCDateTime
+
+
+class IdempotencyKeyModel(Base):
+    """Result of a request made with an ``Idempotency-Key`` header.
+
+    Keys are scoped to the user. The primary key is what collapses
+    concurrent requests with the same key into one.
+    """
+
+    __tablename__ = "idempotency_key"
+    __table_args__ = (Index("ix_idempotency_key_expires_at", "expires_at"),)
+
+    user_email: Mapped[str] = mapped_column(String(255), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    payment_id: Mapped[Optional[_uuid.UUID]] = mapped_column(Uuid, nullable=True)
+    expires_at: Mapped[datetime.datetime] = mapped_column(UTCDateTime, nullable=False)
@@ -4,11 +4,38 @@ import uuid as _uuid
 from typing import Annotated, Optional, Literal
 from decimal import Decimal
 
-from sqlalchemy import Integer, String, Enum, Numeric, DateTime
+from sqlalchemy import Integer, String, Enum, Numeric, DateTime, TypeDecorator, Uuid
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase, mapped_column
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import now
 
-from sqlalchemy.dialects.postgresql import UUID
+
+class UTCDateTime(TypeDecorator):
+    """``DateTime(timezone=True)`` that is timezone-aware on every database.
+
+    SQLite keeps no offset, so values are stored in UTC and read back as UTC.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value
+
+
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has whole seconds, which would not compare equal to
+    # the same instant written by SQLAlchemy as "YYYY-MM-DD HH:MM:SS.ffffff"
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
 
 
 int_pk = Annotated[int, mapped_column(Integer, primary_key=True, autoincrement=True)]
@@ -30,20 +57,33 @@ email_str = Annotated[str, mapped_column(String(255), nullable=False)]
 hash_str = Annotated[str, mapped_column(String(128), nullable=False)]
 
 uuid_pk = Annotated[
-    _uuid.UUID, mapped_column(UUID(as_uuid=True), primary_key=True, default=_uuid.uuid4)
+    _uuid.UUID, mapped_column(Uuid, primary_key=True, default=_uuid.uuid4)
 ]
 
 dec = Annotated[Decimal, mapped_column(Numeric(12, 3), nullable=False)]
 
+counter = Annotated[int, mapped_column(Integer, nullable=False, server_default="0")]
+
+dec_total = Annotated[
+    Decimal, mapped_column(Numeric(18, 3), nullable=False, server_default="0")
+]
+
 timestamp = Annotated[
-    datetime.datetime, mapped_column(DateTime(timezone=True), server_default=func.now())
+    datetime.datetime, mapped_column(UTCDateTime, server_default=func.now())
 ]
 
 PaymentStatus = Literal["Создан", "Оплачен", "Отменен"]
 payment_status = Annotated[
     PaymentStatus,
     mapped_column(
-        Enum("Создан", "Оплачен", "Отменен", name="payment_status_enum"),
+        # a native enum on Postgres, a CHECK constraint elsewhere
+        Enum(
+            "Создан",
+            "Оплачен",
+            "Отменен",
+            name="payment_status_enum",
+            create_constraint=True,
+        ),
         nullable=False,
     ),
 ]
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Mapped
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column
 
 from .init_model import (
     Base,
@@ -15,6 +16,12 @@ from .init_model import (
 
 class PaymentModel(Base):
     __tablename__ = "payment"
+    __table_args__ = (
+        Index("ix_payment_creation_time_payment_id", "creation_time", "payment_id"),
+        Index("ix_payment_status_creation_time", "status", "creation_time"),
+        # one partition per month on Postgres, see app.core.db.db_partitions
+        {"postgresql_partition_by": "RANGE (creation_time)"},
+    )
 
     payment_id: Mapped[uuid_pk]
     card_number: Mapped[str_4]
@@ -22,5 +29,6 @@ class PaymentModel(Base):
     last_name: Mapped[str_64]
     second_name: Mapped[optional_str]
     amount: Mapped[dec]
-    creation_time: Mapped[timestamp]
+    # part of the key: a partitioned table's key includes the partition key
+    creation_time: Mapped[timestamp] = mapped_column(primary_key=True)
     status: Mapped[payment_status]
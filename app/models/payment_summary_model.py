@@ -0,0 +1,30 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .init_model import Base, PaymentStatus, counter, dec_total
+
+
+# status -> prefix of its "<prefix>_count" and "<prefix>_amount" columns
+SUMMARY_COLUMNS: dict[PaymentStatus, str] = {
+    "Создан": "created",
+    "Оплачен": "paid",
+    "Отменен": "cancelled",
+}
+
+
+class PaymentSummaryModel(Base):
+    """Per-user payment counts and totals by status.
+
+    Kept in step with payment and payment_user by the repositories, in the
+    same transaction as the write that changes them.
+    """
+
+    __tablename__ = "payment_user_summary"
+
+    user_email: Mapped[str] = mapped_column(String(255), primary_key=True)
+    created_count: Mapped[counter]
+    created_amount: Mapped[dec_total]
+    paid_count: Mapped[counter]
+    paid_amount: Mapped[dec_total]
+    cancelled_count: Mapped[counter]
+    cancelled_amount: Mapped[dec_total]
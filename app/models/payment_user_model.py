@@ -1,13 +1,32 @@
+import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column
 
-from sqlalchemy import ForeignKey
-from app.models.init_model import Base, uuid_pk, email_str
+from sqlalchemy import ForeignKeyConstraint, Index
+from app.models.init_model import Base, UTCDateTime, uuid_pk, email_str
 
 
 class PaymentUserModel(Base):
     __tablename__ = "payment_user"
+    __table_args__ = (
+        # a user's payments in creation order, within a time range
+        Index(
+            "ix_payment_user_user_email_creation_time_payment_id",
+            "user_email",
+            "creation_time",
+            "payment_id",
+        ),
+        # the payment's whole key: joins on it only visit the payment's month
+        ForeignKeyConstraint(
+            ["payment_id", "creation_time"],
+            ["payment.payment_id", "payment.creation_time"],
+            ondelete="CASCADE",
+        ),
+    )
 
     user_email: Mapped[email_str]
-    payment_id: Mapped[uuid_pk] = mapped_column(
-        ForeignKey("payment.payment_id", ondelete="CASCADE"), nullable=False, index=True
+    payment_id: Mapped[uuid_pk] = mapped_column(nullable=False, index=True)
+    # copied from the payment
+    creation_time: Mapped[datetime.datetime] = mapped_column(
+        UTCDateTime, nullable=False
     )
@@ -0,0 +1,54 @@
+"""Maintenance of the monthly partitions of the payment table.
+
+    python -m app.partitions [--months-ahead N] [--retention-months N] [--dry-run]
+
+Creates the partitions of the current month and the next ``--months-ahead``
+(PAYMENT_PARTITION_MONTHS_AHEAD) ones. With ``--retention-months``
+(PAYMENT_PARTITION_RETENTION_MONTHS) it also detaches the partitions of
+older months; see ``app.core.db.db_partitions`` for what happens to their
+rows. The app runs the same maintenance every
+PAYMENT_PARTITION_MAINTENANCE_INTERVAL seconds; this is for cron jobs and
+for running it by hand, e.g. with ``--dry-run`` first.
+"""
+
+import argparse
+import asyncio
+
+from app.core.db.db_sessions import db
+from app.utils.config import settings
+
+
+async def run(months_ahead: int, retention_months: int | None, dry_run: bool):
+    try:
+        return await db.maintain_partitions(
+            months_ahead=months_ahead,
+            retention_months=retention_months,
+            dry_run=dry_run,
+        )
+    finally:
+        await db.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--months-ahead", type=int, default=settings.PAYMENT_PARTITION_MONTHS_AHEAD
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.PAYMENT_PARTITION_RETENTION_MONTHS,
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    created, detached = asyncio.run(
+        run(args.months_ahead, args.retention_months, args.dry_run)
+    )
+    prefix = "would be " if args.dry_run else ""
+    print(f"{prefix}created: {', '.join(created) or 'none'}")
+    print(f"{prefix}detached: {', '.join(detached) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
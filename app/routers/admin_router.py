@@ -1,13 +1,28 @@
 import logging
+import os
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 
-from app.core.db.db_sessions import db_payment_user
+from app.core.db.db_sessions import db, db_auth, db_payment, db_payment_user
+from app.core.db.operations.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+)
+from app.schemas.page_schema import Page
+from app.schemas.payment_schema import PaymentUserOut
 from app.services.authorization_handler import get_current_user
+from app.services.export_handler import ExportFormat, MEDIA_TYPES, export_stream
+from app.services.hash_service import hash_service
+from app.services.jwt_handler import verified_tokens
 from app.utils.config import settings
+from app.utils.logger_config import queue_handler
 
 
 logger = logging.getLogger("app.admin")
+# the monitoring endpoints report the state of the worker process that
+# handles the request, whose pid they return as "worker"
 router = APIRouter(prefix="/admin")
 
 
@@ -15,8 +30,13 @@ router = APIRouter(prefix="/admin")
     "/user_payment/all",
     tags=["Пользователь-платеж"],
     summary="Получить все записи пользователь-платёж (для суперпользователя)",
+    response_model=Page[PaymentUserOut],
 )
-async def get_all_payment_user_data(current_user=Depends(get_current_user)):
+async def get_all_payment_user_data(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
+):
     logger.debug(
         "Request to get all user-payment records by %s",
         getattr(current_user, "user_email", "anonymous"),
@@ -30,7 +50,10 @@ async def get_all_payment_user_data(current_user=Depends(get_current_user)):
         raise HTTPException(status_code=401, detail="Permission denied")
 
     try:
-        res = await db_payment_user.get_all()
+        res, next_cursor = await db_payment_user.get_page(limit, cursor)
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r when requesting user-payment records", cursor)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.exception(
             "Database error while fetching all user-payment records requested by %s: %s",
@@ -39,7 +62,7 @@ async def get_all_payment_user_data(current_user=Depends(get_current_user)):
         )
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    if res is None or len(res) == 0:
+    if len(res) == 0 and cursor is None:
         logger.info(
             "No user-payment records found (db returned None/empty) for requester %s",
             current_user.user_email,
@@ -48,7 +71,95 @@ async def get_all_payment_user_data(current_user=Depends(get_current_user)):
 
     logger.info(
         "Returning %d user-payment records to superuser %s",
-        len(res) if isinstance(res, list) else 0,
+        len(res),
+        current_user.user_email,
+    )
+    return {"items": res, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/export/payments",
+    tags=["Пользователь-платеж"],
+    summary="Выгрузить все платежи с владельцами в NDJSON/CSV (для суперпользователя)",
+)
+async def export_payments(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    current_user=Depends(get_current_user),
+):
+    if current_user.user_email != settings.SU:
+        logger.warning(
+            "Permission denied for %s when requesting payments export",
+            current_user.user_email,
+        )
+        raise HTTPException(status_code=401, detail="Permission denied")
+
+    logger.info(
+        "Streaming %s payments export to superuser %s",
+        export_format,
         current_user.user_email,
     )
-    return res
+    batches = db_payment.stream_with_users(settings.EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        export_stream(batches, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="payments.{export_format}"'
+        },
+    )
+
+
+@router.get(
+    "/hash_pool",
+    tags=["Мониторинг"],
+    summary="Состояние пула хеширования паролей (для суперпользователя)",
+)
+async def get_hash_pool_stats(current_user=Depends(get_current_user)):
+    if current_user.user_email != settings.SU:
+        raise HTTPException(status_code=401, detail="Permission denied")
+
+    return {"worker": os.getpid(), **hash_service.stats()}
+
+
+@router.get(
+    "/cache_stats",
+    tags=["Мониторинг"],
+    summary="Статистика внутрипроцессных кешей (для суперпользователя)",
+)
+async def get_cache_stats(current_user=Depends(get_current_user)):
+    if current_user.user_email != settings.SU:
+        raise HTTPException(status_code=401, detail="Permission denied")
+
+    return {
+        "worker": os.getpid(),
+        "users": db_auth.cache.stats(),
+        "tokens": verified_tokens.stats(),
+    }
+
+
+@router.get(
+    "/db_pool",
+    tags=["Мониторинг"],
+    summary="Состояние пула соединений с БД (для суперпользователя)",
+)
+async def get_db_pool_stats(current_user=Depends(get_current_user)):
+    if current_user.user_email != settings.SU:
+        raise HTTPException(status_code=401, detail="Permission denied")
+
+    # with a replica, the reads use its pool
+    return {
+        "worker": os.getpid(),
+        "primary": db.engine.pool.stats(),
+        "replica": db.replica_engine.pool.stats() if db.replica_engine else None,
+    }
+
+
+@router.get(
+    "/log_queue",
+    tags=["Мониторинг"],
+    summary="Состояние очереди логирования (для суперпользователя)",
+)
+async def get_log_queue_stats(current_user=Depends(get_current_user)):
+    if current_user.user_email != settings.SU:
+        raise HTTPException(status_code=401, detail="Permission denied")
+
+    return {"worker": os.getpid(), **queue_handler.stats()}
@@ -1,10 +1,17 @@
 import logging
 
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query
 
-from app.schemas.auth_schema import UserSchema, AuthSchema
+from app.schemas.auth_schema import UserSchema, AuthSchema, UserOut
+from app.schemas.page_schema import Page
 from app.core.db.db_sessions import db_auth
+from app.core.db.operations.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+)
 from app.services.hash_handler import get_hash, is_hash_eq
+from app.services.hash_service import hash_service
 from app.services.jwt_handler import create_access_token, set_cookies
 from app.services.authorization_handler import get_current_user
 from app.utils.config import settings
@@ -28,8 +35,8 @@ async def add_user(user_data: UserSchema):
         )
         raise HTTPException(status_code=409, detail="User already exist")
 
+    user_data.user_password = await hash_service.run(get_hash, user_data.user_password)
     try:
-        user_data.user_password = get_hash(user_data.user_password)
         created = await db_auth.create(user_data)
         if created:
             logger.info("User created: %s", user_data.user_email)
@@ -55,7 +62,9 @@ async def authentication(auth_data: AuthSchema):
     if res is None:
         raise HTTPException(status_code=401, detail="Incorrect credentials")
 
-    if is_hash_eq(auth_data.user_password, res.user_password_hash):
+    if await hash_service.run(
+        is_hash_eq, auth_data.user_password, res.user_password_hash
+    ):
         access_token = create_access_token(subj=auth_data.user_email)
         return set_cookies(access_token)
     raise HTTPException(status_code=401, detail="Incorrect credentials")
@@ -65,16 +74,22 @@ async def authentication(auth_data: AuthSchema):
     "/all",
     tags=["Аутентефикация"],
     summary="Получить данные всех пользователей (для суперпользователя)",
+    response_model=Page[UserOut],
 )
-async def get_users(current_user=Depends(get_current_user)):
+async def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
+):
     if current_user.user_email != settings.SU:
         raise HTTPException(status_code=401, detail="Permission denied")
 
-    res = await db_auth.get_all()
-    if res is None:
-        raise HTTPException(status_code=404, detail="Users doesn't exitst")
+    try:
+        res, next_cursor = await db_auth.get_page(limit, cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    return res
+    return {"items": res, "next_cursor": next_cursor}
 
 
 @router.put(
@@ -86,8 +101,8 @@ async def update_password(
     new_user_password: str = Body(..., min_length=4),
     current_user=Depends(get_current_user),
 ):
+    new_user_password_hash = await hash_service.run(get_hash, new_user_password)
     try:
-        new_user_password_hash = get_hash(new_user_password)
         await db_auth.update(current_user.user_email, new_user_password_hash)
         return {"ok": True, "msg": "Password was changed"}
     except Exception as e:
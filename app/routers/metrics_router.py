@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.utils.metrics import CONTENT_TYPE, registry
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    tags=["Мониторинг"],
+    summary="Метрики приложения в формате Prometheus",
+)
+async def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,10 +1,35 @@
+import datetime
+import hashlib
+import json
 import logging
 import uuid as _uuid
 
-from fastapi import APIRouter, HTTPException, Depends
+from decimal import Decimal
+from typing import Any, Dict, List
 
-from app.core.db.db_sessions import db_payment, db_payment_user
-from app.schemas.payment_schema import PaymentSchema
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Header, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.core.db.db_sessions import (
+    db_idempotency,
+    db_payment,
+    db_payment_summary,
+    db_payment_uow,
+)
+from app.core.db.operations.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+)
+from app.schemas.page_schema import Page
+from app.schemas.payment_schema import (
+    PaymentOut,
+    PaymentSchema,
+    PaymentSearchSchema,
+    PaymentSort,
+    PaymentSummaryOut,
+)
 from app.models.init_model import PaymentStatus, dec
 from app.services.authorization_handler import get_current_user
 from app.utils.config import settings
@@ -14,60 +39,257 @@ logger = logging.getLogger("app.payment")
 router = APIRouter(prefix="/payment")
 
 
+def validate_payment(payment_body: Any) -> PaymentSchema:
+    try:
+        return PaymentSchema.model_validate(payment_body)
+    except ValidationError as e:
+        # same error shape as FastAPI's own body validation
+        raise RequestValidationError(
+            [
+                {**err, "loc": ("body", *err["loc"])}
+                for err in e.errors(include_url=False)
+            ]
+        )
+
+
+def search_filters(
+    status: List[PaymentStatus] | None = Query(None),
+    amount_min: Decimal | None = None,
+    amount_max: Decimal | None = None,
+    created_from: datetime.datetime | None = None,
+    created_to: datetime.datetime | None = None,
+    name: str | None = Query(None, description="Начало строки «ИМЯ ФАМИЛИЯ»"),
+    sort: PaymentSort = "-creation_time",
+) -> PaymentSearchSchema:
+    try:
+        return PaymentSearchSchema(
+            status=status,
+            amount_min=amount_min,
+            amount_max=amount_max,
+            created_from=created_from,
+            created_to=created_to,
+            name=name,
+            sort=sort,
+        )
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**err, "loc": ("query", *err["loc"])}
+                for err in e.errors(include_url=False)
+            ]
+        )
+
+
+def request_hash(payment_body: Any) -> str:
+    canonical = json.dumps(payment_body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 @router.post(
     "/",
     tags=["Платежи"],
     summary="Создать платёж",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": PaymentSchema.model_json_schema()}
+            }
+        }
+    },
 )
 async def create_payment(
-    payment_data: PaymentSchema, current_user=Depends(get_current_user)
+    response: Response,
+    payment_body: Any = Body(...),
+    idempotency_key: str | None = Header(
+        None, alias="Idempotency-Key", min_length=1, max_length=255
+    ),
+    current_user=Depends(get_current_user),
 ):
+    if idempotency_key is not None:
+        return await create_payment_once(
+            response, payment_body, idempotency_key, current_user
+        )
+
+    payment_data = validate_payment(payment_body)
     logger.info("Create payment requested by %s", current_user.user_email)
     try:
-        res = await db_payment.create(payment_data)
-        if not res:
-            logger.error(
-                "Failed to create payment in db for user %s", current_user.user_email
-            )
-            raise HTTPException(status_code=400, detail="Failed to create payment")
+        payment_id = await db_payment_uow.create_payment(
+            current_user.user_email, payment_data
+        )
+    except Exception as e:
+        logger.exception(
+            "Unexpected error when creating payment for %s: %s",
+            current_user.user_email,
+            e,
+        )
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if payment_id is None:
+        logger.error(
+            "Failed to create payment in db for user %s", current_user.user_email
+        )
+        raise HTTPException(status_code=400, detail="Failed to create payment")
+
+    logger.info("Payment created %s for user %s", payment_id, current_user.user_email)
+    return {"ok": True, "msg": "Payment was created", "payment_id": payment_id}
+
+
+async def create_payment_once(
+    response: Response, payment_body: Any, idempotency_key: str, current_user
+):
+    """Retries with the same key get the first response back.
+
+    A completed key is answered from the cache or one primary key lookup,
+    without validating the body again.
+    """
+    body_hash = request_hash(payment_body)
+    record = await db_idempotency.get(current_user.user_email, idempotency_key)
+    created = False
 
-        rel_created = await db_payment_user.create(
-            current_user.user_email, res.payment_id
+    if record is None:
+        payment_data = validate_payment(payment_body)
+        logger.info(
+            "Create payment with idempotency key %r requested by %s",
+            idempotency_key,
+            current_user.user_email,
         )
-        if rel_created:
-            logger.info(
-                "Payment created %s for user %s",
-                res.payment_id,
+        try:
+            record, created = await db_payment_uow.create_payment_once(
                 current_user.user_email,
+                payment_data,
+                idempotency_key,
+                body_hash,
+                settings.IDEMPOTENCY_KEY_TTL,
             )
-            return {"ok": True, "msg": "Payment was created"}
+        except Exception as e:
+            logger.exception(
+                "Unexpected error when creating payment for %s: %s",
+                current_user.user_email,
+                e,
+            )
+            raise HTTPException(status_code=500, detail="Internal server error")
 
-        await db_payment.delete(res.payment_id)
-        logger.error(
-            "Failed to create payment-user relation for payment %s user %s; payment deleted",
-            res.payment_id,
+        if record is None:
+            logger.error(
+                "Failed to create payment in db for user %s", current_user.user_email
+            )
+            raise HTTPException(status_code=400, detail="Failed to create payment")
+        db_idempotency.remember(record)
+
+    if record.request_hash != body_hash:
+        logger.warning(
+            "Idempotency key %r reused with a different request by %s",
+            idempotency_key,
             current_user.user_email,
         )
         raise HTTPException(
-            status_code=400, detail="Failed to create payment-user relation"
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request",
         )
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(
-            "Unexpected error when creating payment for %s: %s",
+
+    if created:
+        logger.info(
+            "Payment created %s for user %s",
+            record.payment_id,
             current_user.user_email,
-            e,
         )
-        raise HTTPException(status_code=500, detail="Internal server error")
+    else:
+        logger.info(
+            "Replaying payment %s for idempotency key %r of user %s",
+            record.payment_id,
+            idempotency_key,
+            current_user.user_email,
+        )
+        response.headers["Idempotent-Replayed"] = "true"
+
+    return {"ok": True, "msg": "Payment was created", "payment_id": record.payment_id}
+
+
+@router.post(
+    "/batch",
+    tags=["Платежи"],
+    summary="Создать несколько платежей одним запросом",
+)
+async def create_payments_batch(
+    payments_data: List[Dict[str, Any]] = Body(
+        ..., min_length=1, max_length=settings.PAYMENT_BATCH_MAX_SIZE
+    ),
+    current_user=Depends(get_current_user),
+):
+    logger.info(
+        "Batch of %d payments requested by %s",
+        len(payments_data),
+        current_user.user_email,
+    )
+
+    results: List[Dict[str, Any]] = []
+    valid = []
+    for index, item in enumerate(payments_data):
+        try:
+            valid.append(PaymentSchema.model_validate(item))
+            results.append({"index": index, "ok": True})
+        except ValidationError as e:
+            results.append(
+                {
+                    "index": index,
+                    "ok": False,
+                    "errors": e.errors(
+                        include_url=False, include_context=False, include_input=False
+                    ),
+                }
+            )
+
+    payment_ids = []
+    if valid:
+        try:
+            payment_ids = await db_payment_uow.create_payments(
+                current_user.user_email, valid, settings.PAYMENT_BATCH_CHUNK_SIZE
+            )
+        except Exception as e:
+            logger.exception(
+                "Unexpected error when creating payment batch for %s: %s",
+                current_user.user_email,
+                e,
+            )
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+        if payment_ids is None:
+            logger.error(
+                "Failed to create payment batch in db for user %s",
+                current_user.user_email,
+            )
+            raise HTTPException(status_code=400, detail="Failed to create payments")
+
+    created = iter(payment_ids)
+    for result in results:
+        if result["ok"]:
+            result["payment_id"] = next(created)
+
+    logger.info(
+        "Batch for user %s: %d payments created, %d rejected",
+        current_user.user_email,
+        len(payment_ids),
+        len(results) - len(payment_ids),
+    )
+    return {
+        "ok": len(payment_ids) == len(results),
+        "created": len(payment_ids),
+        "failed": len(results) - len(payment_ids),
+        "results": results,
+    }
 
 
 @router.get(
     "/all",
     tags=["Платежи"],
     summary="Получить все платежи (для суперпользователя)",
+    response_model=Page[PaymentOut],
 )
-async def get_payments(current_user=Depends(get_current_user)):
+async def get_payments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
+):
     logger.debug(
         "Get all payments requested by %s",
         getattr(current_user, "user_email", "anonymous"),
@@ -79,23 +301,70 @@ async def get_payments(current_user=Depends(get_current_user)):
         )
         raise HTTPException(status_code=401, detail="Permission denied")
 
-    res = await db_payment.get_all()
-    if res is None:
-        logger.info("No payments found (db returned None)")
-        raise HTTPException(status_code=404, detail="Payments doesn't exist")
+    try:
+        res, next_cursor = await db_payment.get_page(limit, cursor)
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r when requesting all payments", cursor)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     logger.info(
         "Returning %d payments to superuser %s",
-        len(res) if isinstance(res, list) else 0,
+        len(res),
         current_user.user_email,
     )
-    return res
+    return {"items": res, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/summary",
+    tags=["Платежи"],
+    summary="Получить количество и сумму платежей пользователя по статусам",
+    response_model=PaymentSummaryOut,
+)
+async def get_payment_summary(current_user=Depends(get_current_user)):
+    logger.debug("Get payment summary for user %s", current_user.user_email)
+    summary = await db_payment_summary.get(current_user.user_email)
+
+    logger.info("Returning payment summary for user %s", current_user.user_email)
+    return PaymentSummaryOut.from_summary(current_user.user_email, summary)
+
+
+@router.get(
+    "/search",
+    tags=["Платежи"],
+    summary="Найти платежи пользователя по статусам, сумме, времени и имени",
+    response_model=Page[PaymentOut],
+)
+async def search_user_payments(
+    filters: PaymentSearchSchema = Depends(search_filters),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
+):
+    logger.debug(
+        "Search payments of user %s: %s",
+        current_user.user_email,
+        filters.model_dump(exclude_none=True),
+    )
+    try:
+        res, next_cursor = await db_payment.search(
+            current_user.user_email, filters, limit, cursor
+        )
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r from %s", cursor, current_user.user_email)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    logger.info(
+        "Returning %d found payments for user %s", len(res), current_user.user_email
+    )
+    return {"items": res, "next_cursor": next_cursor}
 
 
 @router.get(
     "/{payment_id}",
     tags=["Платежи"],
     summary="Получить информацию о конкретном платеже",
+    response_model=PaymentOut,
 )
 async def get_payment(payment_id: _uuid.UUID, current_user=Depends(get_current_user)):
     logger.debug(
@@ -116,86 +385,96 @@ async def get_payment(payment_id: _uuid.UUID, current_user=Depends(get_current_u
     "/user_email/all",
     tags=["Платежи"],
     summary="Получить все платежи пользователя",
+    response_model=Page[PaymentOut],
 )
-async def get_user_payments(current_user=Depends(get_current_user)):
+async def get_user_payments(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
+):
     logger.debug("Get payments for user %s", current_user.user_email)
-    res = await db_payment_user.get_by_user(current_user.user_email)
-    if res is None or len(res) == 0:
+    try:
+        res, next_cursor = await db_payment.get_by_user(
+            current_user.user_email, limit, cursor
+        )
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r from %s", cursor, current_user.user_email)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if len(res) == 0 and cursor is None:
         logger.info("User %s has no payments", current_user.user_email)
         raise HTTPException(status_code=404, detail="This user has no payments")
 
-    result = []
-    for el in res:
-        record = await db_payment.get(el.payment_id)
-        if record:
-            result.append(record)
-
-    logger.info(
-        "Returning %d payments for user %s", len(result), current_user.user_email
-    )
-    return result
+    logger.info("Returning %d payments for user %s", len(res), current_user.user_email)
+    return {"items": res, "next_cursor": next_cursor}
 
 
 @router.get(
     "/user_email/status/{status}",
     tags=["Платежи"],
     summary="Получить все платежи пользователя с определённым статусом",
+    description="Устарело: используйте GET /payment/search.",
+    deprecated=True,
+    response_model=Page[PaymentOut],
 )
 async def get_user_payments_by_status(
-    status: PaymentStatus, current_user=Depends(get_current_user)
+    status: PaymentStatus,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
 ):
     logger.debug(
         "Get payments by status=%s for user %s", status, current_user.user_email
     )
-    res = await db_payment_user.get_by_user(current_user.user_email)
-    if res is None or len(res) == 0:
-        logger.info("User %s has no payments", current_user.user_email)
-        raise HTTPException(status_code=404, detail="This user has no payments")
-
-    result = []
-    for el in res:
-        record = await db_payment.get_by_status(el.payment_id, status)
-        if record:
-            result.append(record)
+    try:
+        res, next_cursor = await db_payment.get_by_user_and_status(
+            current_user.user_email, status, limit, cursor
+        )
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r from %s", cursor, current_user.user_email)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     logger.info(
         "Returning %d payments with status %s for user %s",
-        len(result),
+        len(res),
         status,
         current_user.user_email,
     )
-    return result
+    return {"items": res, "next_cursor": next_cursor}
 
 
 @router.get(
     "/user_email/amount/{amount}",
     tags=["Платежи"],
     summary="Получить все платежи пользователя с определённой суммой платежа",
+    description="Устарело: используйте GET /payment/search.",
+    deprecated=True,
+    response_model=Page[PaymentOut],
 )
 async def get_user_payments_by_amount(
-    amount: dec, current_user=Depends(get_current_user)
+    amount: dec,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user=Depends(get_current_user),
 ):
     logger.debug(
         "Get payments by amount=%s for user %s", amount, current_user.user_email
     )
-    res = await db_payment_user.get_by_user(current_user.user_email)
-    if res is None or len(res) == 0:
-        logger.info("User %s has no payments", current_user.user_email)
-        raise HTTPException(status_code=404, detail="This user has no payments")
-
-    result = []
-    for el in res:
-        record = await db_payment.get_by_amount(el.payment_id, amount)
-        if record:
-            result.append(record)
+    try:
+        res, next_cursor = await db_payment.get_by_user_and_amount(
+            current_user.user_email, amount, limit, cursor
+        )
+    except InvalidCursorError:
+        logger.warning("Invalid cursor %r from %s", cursor, current_user.user_email)
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     logger.info(
         "Returning %d payments with amount %s for user %s",
-        len(result),
+        len(res),
         amount,
         current_user.user_email,
     )
-    return result
+    return {"items": res, "next_cursor": next_cursor}
 
 
 @router.put(
@@ -214,28 +493,8 @@ async def update_payment_status(
         status,
         current_user.user_email,
     )
-    res = await db_payment.get(payment_id)
-    if res is None:
-        logger.warning("Payment %s not found when updating status", payment_id)
-        raise HTTPException(status_code=404, detail="Payment doesn't exist")
-
-    if res.status == "Оплачен" or res.status == "Отменен":
-        logger.warning(
-            "Attempt to change already final payment %s status=%s",
-            payment_id,
-            res.status,
-        )
-        raise HTTPException(status_code=400, detail="Payment complete")
-
     try:
-        await db_payment.update(payment_id, status)
-        logger.info(
-            "Payment %s status changed to %s by %s",
-            payment_id,
-            status,
-            current_user.user_email,
-        )
-        return {"ok": True, "msg": "Payment status was changed"}
+        updated = await db_payment.update_if_created(payment_id, status)
     except Exception as e:
         logger.exception(
             "Failed to change payment %s status to %s: %s", payment_id, status, e
@@ -243,3 +502,25 @@ async def update_payment_status(
         raise HTTPException(
             status_code=404, detail=f"Failed to change payment status: {e}"
         )
+
+    if updated is None:
+        # only failed updates pay for a second query, to tell why
+        res = await db_payment.get(payment_id)
+        if res is None:
+            logger.warning("Payment %s not found when updating status", payment_id)
+            raise HTTPException(status_code=404, detail="Payment doesn't exist")
+
+        logger.warning(
+            "Attempt to change already final payment %s status=%s",
+            payment_id,
+            res.status,
+        )
+        raise HTTPException(status_code=400, detail="Payment complete")
+
+    logger.info(
+        "Payment %s status changed to %s by %s",
+        payment_id,
+        status,
+        current_user.user_email,
+    )
+    return {"ok": True, "msg": "Payment status was changed"}
@@ -2,6 +2,7 @@ from typing import Optional
 
 from pydantic import (
     BaseModel,
+    ConfigDict,
     Field,
     field_validator,
     ValidationError,
@@ -23,3 +24,12 @@ class UserSchema(AuthSchema):
     @field_validator("last_name", "first_name")
     def must_be_valid_name_wrapper(cls, val: Optional[str]) -> Optional[str]:
         return must_be_valid_name(val, "User")
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    first_name: str
+    last_name: str
+    user_email: str
@@ -0,0 +1,11 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
@@ -1,10 +1,34 @@
-from typing import Optional
+import datetime
+import re
+import uuid as _uuid
 
-from pydantic import BaseModel, Field, field_validator, ValidationError, condecimal
+from decimal import Decimal
+from typing import Annotated, Dict, List, Literal, Optional
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PlainSerializer,
+    field_validator,
+    model_validator,
+    ValidationError,
+    condecimal,
+)
+
+from app.models.init_model import PaymentStatus
+from app.models.payment_summary_model import PaymentSummaryModel, SUMMARY_COLUMNS
 
 from .validation_funcs import must_be_four_digit_int, must_be_valid_name
 
 
+# a prefix of "FIRST_NAME LAST_NAME": no LIKE wildcards can get through
+NAME_PREFIX_RE = re.compile(r"^[A-Za-z -]+$")
+
+# Amounts have always been sent as JSON numbers, keep it that way.
+Amount = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
+
+
 class PaymentSchema(BaseModel):
     card_number: str = Field(min_length=4, max_length=4)
     last_name: str = Field(min_length=1, max_length=64)
@@ -19,3 +43,106 @@ class PaymentSchema(BaseModel):
     @field_validator("last_name", "first_name", "second_name")
     def must_be_valid_name_wrapper(cls, val: Optional[str]) -> Optional[str]:
         return must_be_valid_name(val, "Payment")
+
+
+PaymentSort = Literal["creation_time", "-creation_time", "amount", "-amount"]
+
+
+class PaymentSearchSchema(BaseModel):
+    """Filters of a search among a user's payments; all given ones must match.
+
+    Amounts are inclusive at both ends, creation times from ``created_from``
+    up to, not including, ``created_to``; naive times are UTC. ``name`` is a
+    prefix of "FIRST_NAME LAST_NAME". ``sort`` is a column, ``-`` first for
+    descending order.
+    """
+
+    status: Optional[List[PaymentStatus]] = Field(None, min_length=1)
+    amount_min: Optional[condecimal(ge=0, max_digits=12, decimal_places=3)] = None
+    amount_max: Optional[condecimal(ge=0, max_digits=12, decimal_places=3)] = None
+    created_from: Optional[datetime.datetime] = None
+    created_to: Optional[datetime.datetime] = None
+    name: Optional[str] = Field(None, min_length=1, max_length=97)
+    sort: PaymentSort = "-creation_time"
+
+    @field_validator("status")
+    def no_repeated_statuses(cls, val: Optional[List[str]]) -> Optional[List[str]]:
+        return None if val is None else sorted(set(val))
+
+    @field_validator("created_from", "created_to")
+    def naive_times_are_utc(
+        cls, val: Optional[datetime.datetime]
+    ) -> Optional[datetime.datetime]:
+        if val is not None and val.tzinfo is None:
+            return val.replace(tzinfo=datetime.timezone.utc)
+        return val
+
+    @field_validator("name")
+    def must_be_name_prefix(cls, val: Optional[str]) -> Optional[str]:
+        if val is None:
+            return val
+        if not NAME_PREFIX_RE.match(val):
+            raise ValueError(
+                "Field contains invalid characters — "
+                "only latin letters, '-' and ' ' allowed"
+            )
+        # names are stored uppercase
+        return val.upper()
+
+    @model_validator(mode="after")
+    def ranges_must_not_be_empty(self) -> "PaymentSearchSchema":
+        if (
+            self.amount_min is not None
+            and self.amount_max is not None
+            and self.amount_min > self.amount_max
+        ):
+            raise ValueError("amount_min must not be greater than amount_max")
+        if (
+            self.created_from is not None
+            and self.created_to is not None
+            and self.created_from >= self.created_to
+        ):
+            raise ValueError("created_from must be earlier than created_to")
+        return self
+
+
+class PaymentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    payment_id: _uuid.UUID
+    card_number: str
+    first_name: str
+    last_name: str
+    second_name: Optional[str] = None
+    amount: Amount
+    creation_time: Optional[datetime.datetime] = None
+    status: PaymentStatus
+
+
+class PaymentUserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_email: str
+    payment_id: _uuid.UUID
+
+
+class StatusSummaryOut(BaseModel):
+    count: int
+    amount: Amount
+
+
+class PaymentSummaryOut(BaseModel):
+    user_email: str
+    statuses: Dict[PaymentStatus, StatusSummaryOut]
+
+    @classmethod
+    def from_summary(
+        cls, user_email: str, summary: PaymentSummaryModel | None
+    ) -> "PaymentSummaryOut":
+        statuses = {}
+        for status, prefix in SUMMARY_COLUMNS.items():
+            statuses[status] = StatusSummaryOut(
+                count=getattr(summary, f"{prefix}_count", None) or 0,
+                amount=getattr(summary, f"{prefix}_amount", None) or Decimal(0),
+            )
+        return cls(user_email=user_email, statuses=statuses)
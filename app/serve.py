@@ -0,0 +1,228 @@
+"""Production entry point: pre-forked uvicorn workers.
+
+    python -m app.serve [--workers N] [--host HOST] [--port PORT]
+
+The parent imports the app once, binds the listening socket and forks the
+workers, so everything loaded at import is shared between them copy-on-write.
+The collector is disabled while importing and the imported objects are moved
+to the permanent generation with ``gc.freeze()`` before the fork: a worker's
+collections never touch them, so their pages stay shared. With
+``DB_STARTUP_MODE=create_all`` the parent also creates the schema and the
+payment partitions due, once; the workers maintain the partitions from one
+``PAYMENT_PARTITION_MAINTENANCE_INTERVAL`` after they start.
+
+Each worker runs a uvicorn server on the inherited socket, on uvloop and
+httptools when they are installed. SIGTERM or SIGINT is forwarded to the
+workers, which stop accepting connections and finish the requests in flight
+within ``WEB_GRACEFUL_TIMEOUT`` seconds. A worker that dies is replaced; if a
+worker fails to start (e.g. the database is not migrated), all of them are
+stopped.
+
+Each worker logs to a file of its own, ``logs/app.<pid>.log``.
+
+``app.main`` remains the development entry point (one process, reload).
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+
+from typing import NoReturn
+
+import uvicorn
+
+from app.utils.config import settings
+
+
+# nothing imported here may have side effects: the hash pool's spawned
+# processes import this module again (as __mp_main__), and must not build
+# database engines or start a log listener; those come with app.main
+logger = logging.getLogger("app.serve")
+
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+# exit code of a worker whose server did not start
+STARTUP_FAILURE = 3
+
+
+def default_workers() -> int:
+    """WEB_WORKERS, or one worker per CPU available to the process."""
+    if settings.WEB_WORKERS:
+        return settings.WEB_WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        # respects the container's cpuset, unlike os.cpu_count()
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def protocols() -> tuple[str, str]:
+    """Event loop and HTTP parser for the workers: the fastest installed."""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+
+async def prepare_database() -> None:
+    from app.core.db.db_sessions import db
+
+    # once, before the fork: workers running create_all side by side race
+    # to create the same tables
+    if settings.DB_STARTUP_MODE == "create_all":
+        await db.setup_database()
+        # detaching old months is left to the workers' maintenance
+        created, _ = await db.maintain_partitions()
+        if created:
+            logger.info("Created partitions %s", ", ".join(created))
+    await db.dispose()
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket) -> NoReturn:
+    from app.core.db.db_sessions import db
+    from app.utils.logger_config import stop_listener
+
+    gc.enable()
+    server = uvicorn.Server(config)
+
+    def exit_worker(sig: int, frame) -> None:
+        # a signal that arrives before uvicorn installs its own handlers
+        # still stops the server, right after it starts
+        server.should_exit = True
+
+    for sig in SIGNALS:
+        signal.signal(sig, exit_worker)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+
+    # connections are never shared with the parent (or between workers)
+    for engine in db.engines:
+        engine.sync_engine.dispose(close=False)
+
+    code = 1
+    try:
+        logger.info(
+            "Worker %d starting (loop=%s, http=%s)",
+            os.getpid(),
+            config.loop,
+            config.http,
+        )
+        server.run(sockets=[sock])
+        code = 0 if server.started else STARTUP_FAILURE
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+    finally:
+        logger.info("Worker %d exited with %d", os.getpid(), code)
+        stop_listener()
+        os._exit(code)
+
+
+class Supervisor:
+    """Forks the workers, replaces the ones that die and stops them all."""
+
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.pids: set[int] = set()
+        self.stopping = False
+        self.failed = False
+
+    def spawn(self) -> None:
+        # held back until the child has its own handlers: delivered in
+        # between, a signal would run the supervisor's handler in the worker
+        signal.pthread_sigmask(signal.SIG_BLOCK, SIGNALS)
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.config, self.sock)
+        self.pids.add(pid)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+        if self.stopping:
+            # stopped while forking: the new worker missed the signal
+            os.kill(pid, signal.SIGTERM)
+
+    def stop(self, sig: int = signal.SIGTERM, frame=None) -> None:
+        if not self.stopping:
+            logger.info("Stopping %d workers", len(self.pids))
+        self.stopping = True
+        # always SIGTERM: on Ctrl+C the workers get SIGINT from the terminal
+        # too, and a second SIGINT would make uvicorn skip the graceful part
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        for sig in SIGNALS:
+            signal.signal(sig, self.stop)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.pids:
+                continue
+            self.pids.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+
+            if self.stopping:
+                continue
+            if code == STARTUP_FAILURE:
+                logger.error("Worker %d failed to start", pid)
+                self.failed = True
+                self.stop()
+            else:
+                logger.warning("Worker %d exited with %d, replacing it", pid, code)
+                self.spawn()
+
+        logger.info("All workers stopped")
+        return 1 if self.failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    args = parser.parse_args()
+
+    # no collections while the app is built: they would leave gaps in the
+    # pages shared with the workers; everything is frozen before the fork
+    gc.disable()
+    from app.main import app
+
+    loop, http = protocols()
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+    )
+    # imports the protocol classes in the parent as well
+    config.load()
+    asyncio.run(prepare_database())
+    sock = config.bind_socket()
+
+    logger.info(
+        "Serving on %s:%d with %d workers (loop=%s, http=%s)",
+        args.host,
+        args.port,
+        args.workers,
+        loop,
+        http,
+    )
+    gc.freeze()
+    sys.exit(Supervisor(config, sock, args.workers).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import csv
+import datetime
+import io
+import json
+
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from sqlalchemy import Row
+
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = (
+    "payment_id",
+    "user_email",
+    "card_number",
+    "first_name",
+    "last_name",
+    "second_name",
+    "amount",
+    "creation_time",
+    "status",
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _to_str(val: Any) -> str | None:
+    if val is None:
+        return None
+    if isinstance(val, datetime.datetime):
+        return val.isoformat()
+    return str(val)
+
+
+async def to_ndjson(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_to_str, row))), ensure_ascii=False)
+            + "\n"
+            for row in batch
+        ).encode()
+
+
+async def to_csv(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    writer.writerow(EXPORT_FIELDS)
+    yield buf.getvalue().encode()
+
+    async for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(
+            ["" if v is None else v for v in map(_to_str, row)] for row in batch
+        )
+        yield buf.getvalue().encode()
+
+
+def export_stream(
+    batches: AsyncIterator[Sequence[Row]], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        return to_csv(batches)
+    return to_ndjson(batches)
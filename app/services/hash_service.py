@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from fastapi import HTTPException
+
+from app.utils.config import settings
+from app.utils.metrics import hash_duration_seconds, hash_wait_seconds
+
+
+R = TypeVar("R")
+
+logger = logging.getLogger("app.hash")
+
+
+class HashService:
+    """Runs argon2 work off the event loop.
+
+    Calls are executed in a process pool once ``start()`` has been called
+    (and in the loop's default thread pool before that, e.g. in scripts and
+    tests). At most ``max_concurrency`` calls run at a time, at most
+    ``max_queue`` wait for a slot, and anything beyond that gets a 503.
+    """
+
+    def __init__(self, max_workers: int, max_concurrency: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., R], *args: Any) -> R:
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning(
+                "Hash queue is full (%d waiting), rejecting request", self.waiting
+            )
+            raise HTTPException(
+                status_code=503,
+                detail="Service is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        hash_wait_seconds.observe(waited)
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            hash_duration_seconds.observe(
+                time.perf_counter() - started, getattr(fn, "__name__", "unknown")
+            )
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "process_pool": self._executor is not None,
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_time_avg": (
+                self.wait_time_total / self.completed if self.completed else 0.0
+            ),
+            "wait_time_max": self.wait_time_max,
+        }
+
+
+hash_service = HashService(
+    max_workers=settings.HASH_POOL_WORKERS,
+    max_concurrency=settings.HASH_MAX_CONCURRENCY,
+    max_queue=settings.HASH_MAX_QUEUE,
+)
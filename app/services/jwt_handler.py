@@ -1,4 +1,6 @@
+import hashlib
 import logging
+import time
 
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
@@ -8,6 +10,7 @@ from fastapi.responses import JSONResponse
 
 import jwt
 
+from app.utils.cache import TTLCache
 from app.utils.config import settings
 
 
@@ -15,6 +18,10 @@ JWT_SECRET = settings.JWT_SECRET
 JWT_ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+verified_tokens: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_TTL
+)
+
 
 def create_access_token(subj: str, expires_delta: timedelta | None = None) -> str:
     now = datetime.now()
@@ -32,18 +39,25 @@ logger = logging.getLogger(__name__)
 
 
 def verify_jwt_token(token: str) -> Dict[str, Any]:
-    logger.info("now_utc: %s", datetime.now().isoformat())
-    logger.debug("token: %s...", token[:40])
+    key = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(key)
+    if payload is not None:
+        return payload
 
+    logger.debug("token: %s...", token[:40])
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        print(payload)
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    exp = payload.get("exp")
+    ttl = None if exp is None else exp - time.time()
+    if ttl is None or ttl > 0:
+        verified_tokens.set(key, payload, ttl)
+    return payload
+
 
 def set_cookies(access_token: str) -> JSONResponse:
     max_age = ACCESS_TOKEN_EXPIRE_MINUTES * 60
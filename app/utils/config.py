@@ -1,22 +1,77 @@
+from typing import Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     HOST: str
     PORT: int
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
+    WEB_WORKERS: int | None = None
+    WEB_GRACEFUL_TIMEOUT: float = 30.0
+    DATABASE_URL: str | None = None
+    DATABASE_REPLICA_URL: str | None = None
+    POSTGRES_USER: str | None = None
+    POSTGRES_PASSWORD: str | None = None
     POSTGRES_HOST: str = "db"
     POSTGRES_PORT: int = 5432
-    POSTGRES_DB: str
+    POSTGRES_DB: str | None = None
     BASE_URL_1: str
     BASE_URL_2: str
     JWT_SECRET: str
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     SU: str
+    EXPORT_BATCH_SIZE: int = 1000
+    HASH_POOL_WORKERS: int = 2
+    HASH_MAX_CONCURRENCY: int = 2
+    HASH_MAX_QUEUE: int = 64
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: float = 30.0
+    JWT_CACHE_SIZE: int = 4096
+    JWT_CACHE_TTL: float = 60.0
+    PAYMENT_BATCH_CHUNK_SIZE: int = 500
+    PAYMENT_BATCH_MAX_SIZE: int = 10000
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_STARTUP_MODE: Literal["create_all", "verify_revision"] = "create_all"
+    ORJSON_RESPONSES: bool = False
+    IDEMPOTENCY_KEY_TTL: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_PURGE_INTERVAL: float = 3600.0
+    PAYMENT_PARTITION_MONTHS_AHEAD: int = 3
+    PAYMENT_PARTITION_RETENTION_MONTHS: int | None = None
+    PAYMENT_PARTITION_MAINTENANCE_INTERVAL: float = 86400.0
+    PAYMENT_PARTITION_LOCK_TIMEOUT: float = 5.0
 
     model_config = SettingsConfigDict(env_file=".env")
 
+    @model_validator(mode="after")
+    def check_database(self) -> "Settings":
+        if self.DATABASE_URL is None and None in (
+            self.POSTGRES_USER,
+            self.POSTGRES_PASSWORD,
+            self.POSTGRES_DB,
+        ):
+            raise ValueError(
+                "Set DATABASE_URL, or POSTGRES_USER, POSTGRES_PASSWORD and POSTGRES_DB"
+            )
+        return self
+
+    @property
+    def database_url(self) -> str:
+        """SQLAlchemy async URL: DATABASE_URL, or one built from POSTGRES_*."""
+        if self.DATABASE_URL is not None:
+            return self.DATABASE_URL
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
 
 settings = Settings()
@@ -1,32 +1,148 @@
+import atexit
 import logging
 import os
+import queue
 import sys
 
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Literal
 
 
+OverflowPolicy = Literal["block", "drop", "drop-debug-first"]
+
 LOG_DIR = os.environ.get("APP_LOG_DIR", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE = os.path.join(LOG_DIR, "app.log")
 
+LOG_QUEUE_SIZE = int(os.environ.get("APP_LOG_QUEUE_SIZE", "10000"))
+LOG_OVERFLOW: OverflowPolicy = os.environ.get(  # type: ignore[assignment]
+    "APP_LOG_OVERFLOW", "drop-debug-first"
+)
+
 formatter = logging.Formatter(
     "%(asctime)s %(levelname)s [%(name)s] %(message)s", "%Y-%m-%d %H:%M:%S"
 )
 
-file_handler = RotatingFileHandler(
-    LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
-)
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(formatter)
 
-console = logging.StreamHandler(stream=sys.stdout)
-console.setFormatter(formatter)
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler over a bounded queue with a policy for when it fills up.
+
+    - ``block``: wait for the listener to make room;
+    - ``drop``: discard the record;
+    - ``drop-debug-first``: records below WARNING are discarded once the
+      queue is 90% full, so warnings and errors keep the remaining room and
+      only block if the queue is completely full.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: OverflowPolicy = "block"):
+        if policy not in ("block", "drop", "drop-debug-first"):
+            raise ValueError(f"Unknown log overflow policy: {policy!r}")
+
+        super().__init__(log_queue)
+        self.policy = policy
+        self.high_water = max(1, int(log_queue.maxsize * 0.9))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the queue never leaves the process, so formatting (and merging
+        # args into msg) is left to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+
+        if self.policy == "drop-debug-first":
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+                return
+            if self.queue.qsize() >= self.high_water:
+                self.dropped += 1
+                return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "queue_size": self.queue.qsize(),
+            "queue_maxsize": self.queue.maxsize,
+            "dropped": self.dropped,
+        }
+
+
+def file_handler(log_file: str = LOG_FILE) -> RotatingFileHandler:
+    handler = RotatingFileHandler(
+        log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+    )
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def worker_log_file(log_file: str, pid: int) -> str:
+    """``logs/app.log`` -> ``logs/app.<pid>.log``."""
+    root, ext = os.path.splitext(log_file)
+    return f"{root}.{pid}{ext}"
+
+
+def build_handlers(log_file: str = LOG_FILE) -> List[logging.Handler]:
+    console = logging.StreamHandler(stream=sys.stdout)
+    console.setFormatter(formatter)
+
+    return [console, file_handler(log_file)]
+
+
+def stop_listener() -> None:
+    """Writes out the queued records and stops the listener thread."""
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+
+
+def _restart_listener() -> None:
+    # threads do not survive fork(): a forked worker starts a listener of
+    # its own, on a new queue so it does not write out the parent's records.
+    # Rotation renames the file, which is only safe with a single writer:
+    # the worker writes a file of its own.
+    global listener
+    if listener is None:
+        return
+    handlers = [
+        (
+            file_handler(worker_log_file(handler.baseFilename, os.getpid()))
+            if isinstance(handler, RotatingFileHandler)
+            else handler
+        )
+        for handler in listener.handlers
+    ]
+    queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+
 
 root_logger = logging.getLogger()
 root_logger.setLevel(logging.INFO)
 
-if not any(isinstance(h, logging.StreamHandler) for h in root_logger.handlers):
-    root_logger.addHandler(console)
+queue_handler = next(
+    (h for h in root_logger.handlers if isinstance(h, BoundedQueueHandler)), None
+)
+listener: QueueListener | None = None
+
+if queue_handler is None:
+    # file writes and rotation happen on the listener thread,
+    # not on the event loop that emitted the record
+    queue_handler = BoundedQueueHandler(queue.Queue(LOG_QUEUE_SIZE), LOG_OVERFLOW)
+    listener = QueueListener(
+        queue_handler.queue, *build_handlers(), respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(stop_listener)
+    os.register_at_fork(after_in_child=_restart_listener)
 
-if not any(isinstance(h, RotatingFileHandler) for h in root_logger.handlers):
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(queue_handler)
@@ -0,0 +1,226 @@
+import bisect
+import math
+import os
+
+from typing import Dict, Iterator, List, Sequence, Tuple, TypeVar
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(names: Sequence[str], values: Sequence[str], const: Labels = ()) -> str:
+    labels = [*const, *zip(names, values)]
+    if not labels:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in labels)
+    return "{" + pairs + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labelvalues: Sequence[str]) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {labelvalues}"
+            )
+        return tuple(labelvalues)
+
+    def samples(self, const: Labels = ()) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self, const: Labels = ()) -> str:
+        header = (
+            f"# HELP {self.name} {_escape(self.documentation)}\n"
+            f"# TYPE {self.name} {self.kind}\n"
+        )
+        return header + "".join(line + "\n" for line in self.samples(const))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        key = self._key(labelvalues)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(self._key(labelvalues), 0.0)
+
+    def samples(self, const: Labels = ()) -> Iterator[str]:
+        for key, value in self._values.items():
+            labels = _labels(self.labelnames, key, const)
+            yield f"{self.name}{labels} {_number(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        self._values[self._key(labelvalues)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: [bucket counts (not cumulative)], sum, count
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        key = self._key(labelvalues)
+        item = self._values.get(key)
+        if item is None:
+            item = self._values[key] = ([0] * len(self.buckets), [0.0, 0.0])
+
+        counts, totals = item
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        item = self._values.get(self._key(labelvalues))
+        return int(item[1][1]) if item else 0
+
+    def samples(self, const: Labels = ()) -> Iterator[str]:
+        names = self.labelnames + ("le",)
+        for key, (counts, (total, count)) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _labels(names, key + (_number(bound),), const)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, key, const)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {_number(count)}"
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    """In-process metric registry rendered in the Prometheus text format.
+
+    Metrics are updated from the event loop thread only, so no locking is
+    done.
+
+    The values are those of the process: under ``app.serve`` each worker
+    keeps its own and a scrape gets the ones of the worker that took it.
+    With ``per_worker`` every sample is labelled ``worker="<pid>"``, so
+    the workers' series stay apart and can be summed by Prometheus.
+    """
+
+    def __init__(self, per_worker: bool = False):
+        self._metrics: Dict[str, _Metric] = {}
+        self.per_worker = per_worker
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        # the pid when rendering: the registry is created before the fork
+        const = (("worker", str(os.getpid())),) if self.per_worker else ()
+        return "".join(m.render(const) for m in self._metrics.values())
+
+
+registry = MetricsRegistry(per_worker=True)
+
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "Handled HTTP requests.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled.",
+    ("method",),
+)
+db_statement_duration_seconds = registry.histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing SQL statements.",
+    ("operation",),
+)
+db_statement_errors_total = registry.counter(
+    "db_statement_errors_total",
+    "SQL statements that raised.",
+    ("operation",),
+)
+hash_duration_seconds = registry.histogram(
+    "hash_duration_seconds",
+    "Time spent in argon2 hashing/verification.",
+    ("function",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+hash_wait_seconds = registry.histogram(
+    "hash_wait_seconds",
+    "Time argon2 calls waited for a free hashing slot.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
@@ -0,0 +1,53 @@
+"""Per-request token verification overhead.
+
+Run from the project root::
+
+    python -m benchmarks.bench_jwt [-n 20000]
+
+Logging is configured the same way as in ``app.main``, so anything the
+verification path logs or prints is part of the measured cost.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from datetime import timedelta
+
+import app.utils.logger_config  # noqa: F401
+
+from app.services import jwt_handler as jh
+
+
+def bench(fn, iterations: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - started) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = jh.create_access_token("bench@example.com", timedelta(minutes=10))
+    cache = getattr(jh, "verified_tokens", None)
+
+    def cold():
+        if cache is not None:
+            cache.clear()
+        jh.verify_jwt_token(token)
+
+    def hot():
+        jh.verify_jwt_token(token)
+
+    for label, fn in (("cold (full decode)", cold), ("hot (same token)", hot)):
+        per_call = bench(fn, args.iterations)
+        print(f"{label:<20} {per_call * 1e6:8.2f} us/call {1 / per_call:12.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""Throughput and latency of every API route, with a regression gate.
+
+Run from the project root, against the database configured for the app
+(``DATABASE_URL`` or ``POSTGRES_*``, from ``.env`` or the environment)::
+
+    python -m benchmarks.bench_load --reset --save      # record a baseline
+    python -m benchmarks.bench_load --reset             # compare against it
+
+The schema of that database is dropped and recreated, so only point it at
+a scratch database; ``--reset`` confirms that. Without a Postgres server,
+use e.g. ``DATABASE_URL=sqlite+aiosqlite:////tmp/load.db``.
+
+The app built by ``create_app()`` is driven in process through
+``httpx.ASGITransport``, with its startup and shutdown handlers, so every
+request goes through the middlewares, the routers and the real database,
+without a network hop. The database is seeded with users and payments,
+then each route is measured in turn: after a few warm-up requests,
+``--concurrency`` clients send ``--requests`` requests between them, in
+``--rounds`` rounds. Every route reports the median over the rounds of
+requests per second and p50/p95/p99 latency. Before that, the cold start
+of a worker is measured in new processes (see ``bench_startup``).
+
+``--save`` writes the results to the baseline file. Otherwise the results
+are compared with it and the exit status is 1 when a route answers with
+an unexpected status code, or its throughput drops by more than
+``--max-rps-drop`` or its p95 latency rises by more than
+``--max-latency-rise`` (fractions of the baseline), or the cold start
+total rises by more than ``--max-latency-rise``. Baselines only compare
+well on the machine and settings they were recorded with.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import math
+import platform
+import re
+import statistics
+import sys
+import time
+import uuid
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import httpx
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from app.core.app import create_app
+from benchmarks.bench_startup import median_cold_start
+from app.core.db.db_sessions import db, db_payment_uow
+from app.schemas.payment_schema import PaymentSchema
+from app.utils.config import settings
+
+
+DEFAULT_BASELINE = Path(__file__).with_name("load_baseline.json")
+MEASURED_PREFIXES = ("/auth", "/payment", "/admin")
+
+USER = "load@example.com"
+LOGIN_USER = "login@example.com"
+PASSWORD = "password"
+BATCH_SIZE = 10
+
+
+def payment_body(i: int) -> dict[str, Any]:
+    return {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": i % 100 + 1,
+    }
+
+
+@dataclass
+class Seed:
+    """What the routes are measured against."""
+
+    payment_ids: list[uuid.UUID] = field(default_factory=list)
+    # payments still in the created status, one per status change request
+    pending_ids: list[uuid.UUID] = field(default_factory=list)
+
+
+@dataclass
+class Route:
+    name: str
+    # request number -> keyword arguments of ``AsyncClient.request``
+    request: Callable[[int], dict[str, Any]]
+    client: str = "user"
+    status: int = 200
+
+
+def get(path: str, **kwargs) -> Callable[[int], dict[str, Any]]:
+    return lambda i: {"method": "GET", "url": path, **kwargs}
+
+
+def make_routes(seed: Seed) -> list[Route]:
+    def some_payment(i: int) -> uuid.UUID:
+        return seed.payment_ids[i % len(seed.payment_ids)]
+
+    return [
+        Route(
+            "POST /auth/registration",
+            lambda i: {
+                "method": "POST",
+                "url": "/auth/registration",
+                "json": {
+                    "user_email": f"new{i}@example.com",
+                    "user_password": PASSWORD,
+                    "first_name": "JOHN",
+                    "last_name": "DOE",
+                },
+            },
+            client="anonymous",
+        ),
+        Route(
+            "POST /auth/authentication",
+            lambda i: {
+                "method": "POST",
+                "url": "/auth/authentication",
+                "json": {"user_email": LOGIN_USER, "user_password": PASSWORD},
+            },
+            client="anonymous",
+        ),
+        Route("GET /auth/all", get("/auth/all"), client="su"),
+        Route(
+            "PUT /auth/{user_email}",
+            lambda i: {"method": "PUT", "url": f"/auth/{USER}", "json": PASSWORD},
+        ),
+        Route(
+            "POST /payment/",
+            lambda i: {"method": "POST", "url": "/payment/", "json": payment_body(i)},
+        ),
+        Route(
+            "POST /payment/batch",
+            lambda i: {
+                "method": "POST",
+                "url": "/payment/batch",
+                "json": [payment_body(i + j) for j in range(BATCH_SIZE)],
+            },
+        ),
+        Route("GET /payment/all", get("/payment/all"), client="su"),
+        Route("GET /payment/summary", get("/payment/summary")),
+        Route(
+            "GET /payment/{payment_id}",
+            lambda i: {"method": "GET", "url": f"/payment/{some_payment(i)}"},
+        ),
+        Route(
+            "GET /payment/search",
+            get(
+                "/payment/search",
+                params={
+                    "status": ["Создан", "Оплачен"],
+                    "amount_min": 10,
+                    "amount_max": 60,
+                    "name": "JOHN D",
+                    "sort": "-amount",
+                },
+            ),
+        ),
+        Route("GET /payment/user_email/all", get("/payment/user_email/all")),
+        Route(
+            "GET /payment/user_email/status/{status}",
+            get("/payment/user_email/status/Создан"),
+        ),
+        Route(
+            "GET /payment/user_email/amount/{amount}",
+            lambda i: {
+                "method": "GET",
+                "url": f"/payment/user_email/amount/{i % 100 + 1}",
+            },
+        ),
+        Route(
+            "PUT /payment/{payment_id}",
+            lambda i: {
+                "method": "PUT",
+                "url": f"/payment/{seed.pending_ids[i]}",
+                "params": {"status": "Оплачен"},
+            },
+        ),
+        Route(
+            "GET /admin/user_payment/all", get("/admin/user_payment/all"), client="su"
+        ),
+        Route(
+            "GET /admin/export/payments",
+            get("/admin/export/payments", params={"format": "ndjson"}),
+            client="su",
+        ),
+        Route("GET /admin/hash_pool", get("/admin/hash_pool"), client="su"),
+        Route("GET /admin/cache_stats", get("/admin/cache_stats"), client="su"),
+        Route("GET /admin/db_pool", get("/admin/db_pool"), client="su"),
+        Route("GET /admin/log_queue", get("/admin/log_queue"), client="su"),
+    ]
+
+
+def unmeasured_routes(app: FastAPI, routes: Sequence[Route]) -> list[str]:
+    """Routes of the measured routers that have no entry in ``routes``."""
+    names = {route.name for route in routes}
+    missing = []
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path.startswith(MEASURED_PREFIXES):
+            missing.extend(
+                f"{method} {route.path}"
+                for method in sorted(route.methods)
+                if f"{method} {route.path}" not in names
+            )
+    return missing
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, defined for any number of values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    route: Route,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    rounds: int,
+) -> dict[str, float]:
+    """Median of ``rounds`` rounds of ``requests`` requests each."""
+    errors = 0
+
+    async def send(i: int) -> float:
+        nonlocal errors
+        started = time.perf_counter()
+        res = await client.request(**route.request(i))
+        elapsed = time.perf_counter() - started
+        if res.status_code != route.status:
+            errors += 1
+            if errors == 1:
+                print(
+                    f"  {route.name}: {res.status_code} {res.text[:200]}",
+                    file=sys.stderr,
+                )
+        return elapsed
+
+    for i in range(warmup):
+        await send(i)
+
+    samples: list[dict[str, float]] = []
+    for start in range(warmup, warmup + rounds * requests, requests):
+        # workers share one iterator, so each request number is sent once
+        numbers = iter(range(start, start + requests))
+        latencies: list[float] = []
+
+        async def worker() -> None:
+            for i in numbers:
+                latencies.append(await send(i))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        samples.append(
+            {
+                "rps": requests / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+            }
+        )
+
+    result = {
+        metric: statistics.median(sample[metric] for sample in samples)
+        for metric in samples[0]
+    }
+    result["errors"] = errors
+    return result
+
+
+def regressions(
+    baseline: dict[str, dict[str, float]],
+    results: dict[str, dict[str, float]],
+    max_rps_drop: float,
+    max_latency_rise: float,
+) -> list[str]:
+    """Routes that failed or got slower than ``baseline`` allows.
+
+    Routes missing from the baseline only have their errors checked.
+    """
+    failures = []
+    for name, result in results.items():
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} unexpected responses")
+
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - max_rps_drop):
+            failures.append(
+                f"{name}: {result['rps']:.0f} rps, baseline {base['rps']:.0f}"
+            )
+        if result["p95_ms"] > base["p95_ms"] * (1 + max_latency_rise):
+            failures.append(
+                f"{name}: p95 {result['p95_ms']:.1f} ms, "
+                f"baseline {base['p95_ms']:.1f} ms"
+            )
+    return failures
+
+
+def client(app: FastAPI) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def login(app: FastAPI, user_email: str) -> httpx.AsyncClient:
+    ac = client(app)
+    for path, body in (
+        (
+            "/auth/registration",
+            {
+                "user_email": user_email,
+                "user_password": PASSWORD,
+                "first_name": "JOHN",
+                "last_name": "DOE",
+            },
+        ),
+        ("/auth/authentication", {"user_email": user_email, "user_password": PASSWORD}),
+    ):
+        (await ac.post(path, json=body)).raise_for_status()
+    return ac
+
+
+async def seed_payments(count: int) -> list[uuid.UUID]:
+    payments = [PaymentSchema(**payment_body(i)) for i in range(count)]
+    return await db_payment_uow.create_payments(
+        USER, payments, settings.PAYMENT_BATCH_CHUNK_SIZE
+    )
+
+
+async def run(
+    args: argparse.Namespace,
+) -> tuple[dict[str, dict[str, float]], dict[str, float]]:
+    await db.drop_database()
+
+    app = create_app()
+    seed = Seed()
+    routes = [
+        route
+        for route in make_routes(seed)
+        if args.routes is None or re.search(args.routes, route.name)
+    ]
+    for name in unmeasured_routes(app, make_routes(seed)):
+        print(f"warning: {name} is not measured", file=sys.stderr)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        clients = {
+            "anonymous": client(app),
+            "user": await login(app, USER),
+            "su": await login(app, settings.SU),
+        }
+        await login(app, LOGIN_USER)
+        seed.payment_ids = await seed_payments(args.payments)
+        seed.pending_ids = await seed_payments(
+            args.warmup + args.rounds * args.requests
+        )
+
+        # the schema was just made by create_all, not by migrations
+        cold = await asyncio.to_thread(
+            median_cold_start, "create_all", args.cold_starts
+        )
+        print(
+            f"cold start (median of {args.cold_starts}): "
+            f"import {cold['import_ms']:.0f} ms, startup {cold['startup_ms']:.0f} ms, "
+            f"first request {cold['first_request_ms']:.0f} ms, "
+            f"total {cold['total_ms']:.0f} ms"
+        )
+        print(
+            f"{args.rounds} x {args.requests} requests per route, "
+            f"concurrency {args.concurrency}, "
+            f"{args.payments} seeded payments"
+        )
+        print(
+            f"{'route':<42} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7}"
+        )
+        for route in routes:
+            result = await measure(
+                clients[route.client],
+                route,
+                args.requests,
+                args.concurrency,
+                args.warmup,
+                args.rounds,
+            )
+            results[route.name] = result
+            print(
+                f"{route.name:<42} {result['rps']:8.0f} {result['p50_ms']:8.1f} "
+                f"{result['p95_ms']:8.1f} {result['p99_ms']:8.1f} "
+                f"{result['errors']:7d}"
+            )
+
+        for ac in clients.values():
+            await ac.aclose()
+    return results, cold
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="confirm that the configured database may be dropped",
+    )
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--payments", type=int, default=1000)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--routes", help="only measure routes matching this regex")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="write the results as the baseline"
+    )
+    parser.add_argument("--max-rps-drop", type=float, default=0.2)
+    parser.add_argument("--max-latency-rise", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # one INFO record per request from the client would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if not args.reset:
+        parser.error(
+            f"the schema of {db.engine.url!r} is dropped and recreated; "
+            "pass --reset to confirm"
+        )
+
+    settings.DB_STARTUP_MODE = "create_all"
+    results, cold = asyncio.run(run(args))
+
+    if args.save:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "recorded_at": datetime.datetime.now(
+                        datetime.timezone.utc
+                    ).isoformat(),
+                    "python": platform.python_version(),
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "rounds": args.rounds,
+                    "payments": args.payments,
+                    "cold_start": cold,
+                    "routes": results,
+                },
+                indent=2,
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        print(f"baseline written to {args.baseline}")
+        failures = regressions({}, results, args.max_rps_drop, args.max_latency_rise)
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        failures = regressions(
+            baseline["routes"], results, args.max_rps_drop, args.max_latency_rise
+        )
+        base_cold = baseline.get("cold_start")
+        if base_cold and cold["total_ms"] > base_cold["total_ms"] * (
+            1 + args.max_latency_rise
+        ):
+            failures.append(
+                f"cold start: {cold['total_ms']:.0f} ms, "
+                f"baseline {base_cold['total_ms']:.0f} ms"
+            )
+    else:
+        print(f"no baseline at {args.baseline}, run with --save to record one")
+        failures = regressions({}, results, args.max_rps_drop, args.max_latency_rise)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Request latency with logging off, with synchronous handlers, and behind a queue.
+
+Run from the project root::
+
+    python -m benchmarks.bench_logging [-n 5000] [-c 50]
+
+The endpoint logs three INFO lines per request, like the routers do. The
+console handler writes to /dev/null and the file handler to a temporary
+directory, so only the cost paid on the event loop is compared. Use
+``--io-delay-ms`` to model a slow disk or a full stdout pipe: every handler
+write then sleeps that long.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+from logging.handlers import QueueListener
+
+import httpx
+
+from fastapi import FastAPI
+
+from app.utils import logger_config
+
+
+logger = logging.getLogger("app.bench")
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        logger.info("Request to ping by %s", "bench@example.com")
+        logger.info("Ping handled for %s", "bench@example.com")
+        logger.info("Returning pong to %s", "bench@example.com")
+        return {"ok": True}
+
+    return app
+
+
+def slowed(emit, delay: float):
+    def wrapper(record):
+        time.sleep(delay)
+        emit(record)
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def configured(mode: str, log_dir: str, io_delay: float):
+    root = logging.getLogger()
+    saved = root.handlers[:]
+    root.handlers.clear()
+
+    handlers = logger_config.build_handlers(os.path.join(log_dir, f"{mode}.log"))
+    devnull = open(os.devnull, "w")
+    handlers[0].setStream(devnull)
+    if io_delay:
+        for h in handlers:
+            h.emit = slowed(h.emit, io_delay)
+    listener = None
+
+    if mode == "off":
+        logging.disable(logging.CRITICAL)
+    elif mode == "sync":
+        for h in handlers:
+            root.addHandler(h)
+    else:
+        qh = logger_config.BoundedQueueHandler(
+            queue.Queue(logger_config.LOG_QUEUE_SIZE), logger_config.LOG_OVERFLOW
+        )
+        listener = QueueListener(qh.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        root.addHandler(qh)
+
+    try:
+        yield
+    finally:
+        if listener is not None:
+            listener.stop()
+        logging.disable(logging.NOTSET)
+        for h in handlers:
+            h.close()
+        devnull.close()
+        root.handlers[:] = saved
+
+
+async def run(requests: int, concurrency: int) -> list[float]:
+    transport = httpx.ASGITransport(app=make_app())
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one():
+            async with sem:
+                started = time.perf_counter()
+                await c.get("/ping")
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("--io-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in ("off", "sync", "queue"):
+            with configured(mode, log_dir, args.io_delay_ms / 1e3):
+                started = time.perf_counter()
+                lat = sorted(asyncio.run(run(args.requests, args.concurrency)))
+                elapsed = time.perf_counter() - started
+
+            p99 = lat[int(len(lat) * 0.99) - 1]
+            print(
+                f"{mode:<6} {args.requests / elapsed:8.0f} req/s"
+                f"  p50 {statistics.median(lat) * 1e3:7.2f} ms"
+                f"  p99 {p99 * 1e3:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
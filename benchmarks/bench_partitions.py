@@ -0,0 +1,281 @@
+"""Plain vs monthly-partitioned payment table, on the same rows.
+
+Run from the project root against a scratch Postgres database::
+
+    python -m benchmarks.bench_partitions --url postgresql+asyncpg://... \\
+        [--rows 2000000] [--months 24] [-n 200]
+
+Builds two schemas in the database, ``bench_partitioned`` with the tables
+created from the models (one partition per month of the last ``--months``,
+plus the ones ahead) and ``bench_plain`` with the same columns and indexes
+in a plain payment table keyed by payment_id alone, fills both with the same
+``--rows`` payments spread evenly over the months, then times the repository
+calls on each: p50/p95 over ``-n`` runs, and the payment partitions one run
+of the query actually reads (EXPLAIN ANALYZE). Both schemas are dropped and
+recreated on every run.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.db import db_partitions
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.core.db.operations.pagination import encode_cursor
+from app.models.init_model import Base
+from app.schemas.payment_schema import PaymentSchema
+
+
+PLAIN, PARTITIONED = "bench_plain", "bench_partitioned"
+USERS = 10000
+EMAIL = "user42@example.com"
+# the inserts go to a user of their own, so the reads see the seeded rows only
+WRITER = "writer@example.com"
+PAYMENT = PaymentSchema(
+    card_number="1234", first_name="JOHN", last_name="DOE", amount=10
+)
+
+_SEED_PAYMENTS = text(
+    "INSERT INTO payment (payment_id, card_number, first_name, last_name, "
+    "amount, creation_time, status) "
+    "SELECT gen_random_uuid(), '1234', 'JOHN', 'DOE', i % 1000 + 0.5, "
+    "CAST(:start AS timestamptz) + (CAST(:end AS timestamptz) "
+    "- CAST(:start AS timestamptz)) * (i / CAST(:rows AS float)), "
+    "(CAST(ARRAY['Создан', 'Оплачен', 'Отменен'] AS payment_status_enum[]))"
+    "[1 + i % 3] "
+    "FROM generate_series(0, :rows - 1) AS i"
+)
+_SEED_OWNERS = text(
+    "INSERT INTO payment_user (user_email, payment_id, creation_time) "
+    "SELECT 'user' || abs(hashtext(CAST(payment_id AS text))) % :users "
+    "|| '@example.com', payment_id, creation_time FROM payment"
+)
+_SEED_SUMMARIES = text(
+    "INSERT INTO payment_user_summary "
+    "SELECT pu.user_email, "
+    "count(*) FILTER (WHERE p.status = 'Создан'), "
+    "coalesce(sum(p.amount) FILTER (WHERE p.status = 'Создан'), 0), "
+    "count(*) FILTER (WHERE p.status = 'Оплачен'), "
+    "coalesce(sum(p.amount) FILTER (WHERE p.status = 'Оплачен'), 0), "
+    "count(*) FILTER (WHERE p.status = 'Отменен'), "
+    "coalesce(sum(p.amount) FILTER (WHERE p.status = 'Отменен'), 0) "
+    "FROM payment_user AS pu JOIN payment AS p USING (payment_id, creation_time) "
+    "GROUP BY pu.user_email"
+)
+# a month of reports: the kind of time-bounded query partitions are for
+_MONTH_TOTALS = text(
+    "SELECT status, count(*), sum(amount) FROM payment "
+    "WHERE creation_time >= :lower AND creation_time < :upper GROUP BY status"
+)
+
+
+def schema_engine(url: str, schema: str) -> AsyncEngine:
+    # the enum type is only created with the partitioned tables
+    search_path = schema if schema == PARTITIONED else f"{schema}, {PARTITIONED}"
+    return create_async_engine(
+        url, connect_args={"server_settings": {"search_path": search_path}}
+    )
+
+
+async def build(url: str, rows: int, months: int) -> tuple[datetime.datetime, ...]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    current = db_partitions.month_start(now.date())
+    first = db_partitions.add_months(current, 1 - months)
+    start = datetime.datetime.combine(first, datetime.time(), datetime.timezone.utc)
+
+    admin = create_async_engine(url)
+    async with admin.begin() as conn:
+        for schema in (PLAIN, PARTITIONED):
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    await admin.dispose()
+
+    engine = schema_engine(url, PARTITIONED)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for i in range(months - 1):
+            await conn.run_sync(
+                db_partitions.create_partition, db_partitions.add_months(first, i)
+            )
+        params = {"start": start, "end": now, "rows": rows, "users": USERS}
+        await conn.execute(_SEED_PAYMENTS, params)
+        await conn.execute(_SEED_OWNERS, params)
+        await conn.execute(_SEED_SUMMARIES)
+    await engine.dispose()
+
+    # the tables before partitioning, with the same rows
+    engine = schema_engine(url, PLAIN)
+    async with engine.begin() as conn:
+        for table in ("payment", "payment_user", "payment_user_summary"):
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {table} (LIKE {PARTITIONED}.{table} "
+                    "INCLUDING DEFAULTS)"
+                )
+            )
+            await conn.execute(
+                text(f"INSERT INTO {table} SELECT * FROM {PARTITIONED}.{table}")
+            )
+        for ddl in (
+            "ALTER TABLE payment ADD PRIMARY KEY (payment_id)",
+            "CREATE INDEX ON payment (creation_time, payment_id)",
+            "CREATE INDEX ON payment (status, creation_time)",
+            "ALTER TABLE payment_user ADD PRIMARY KEY (payment_id)",
+            "CREATE INDEX ON payment_user (user_email, payment_id)",
+            "ALTER TABLE payment_user ADD FOREIGN KEY (payment_id) "
+            "REFERENCES payment (payment_id) ON DELETE CASCADE",
+            "ALTER TABLE payment_user_summary ADD PRIMARY KEY (user_email)",
+        ):
+            await conn.execute(text(ddl))
+    await engine.dispose()
+
+    admin = create_async_engine(url, isolation_level="AUTOCOMMIT")
+    async with admin.connect() as conn:
+        for schema in (PLAIN, PARTITIONED):
+            for table in ("payment", "payment_user", "payment_user_summary"):
+                await conn.execute(text(f"VACUUM ANALYZE {schema}.{table}"))
+    await admin.dispose()
+    return start, now
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+async def partitions_read(engine: AsyncEngine, statement: str, parameters) -> int:
+    async with engine.connect() as conn:
+        res = await conn.exec_driver_sql(
+            "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+        )
+        plan = res.scalar_one()
+        await conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return len(
+        {
+            node["Relation Name"]
+            for node in _walk_plan(plan[0]["Plan"])
+            if node.get("Relation Name", "").startswith("payment_")
+            and not node["Relation Name"].startswith("payment_user")
+            and node.get("Actual Loops", 0) > 0
+        }
+    )
+
+
+async def measure(engine: AsyncEngine, fn, runs: int) -> tuple[float, float, int]:
+    """p50 and p95 in ms, and the partitions read by the last SELECT."""
+    for _ in range(min(runs, 20)):
+        await fn()
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await fn()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    read = await partitions_read(engine, *statements[-1]) if statements else 0
+    p95 = statistics.quantiles(samples, n=20)[-1]
+    return statistics.median(samples), p95, read
+
+
+async def cases(engine: AsyncEngine, start: datetime.datetime, now: datetime.datetime):
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    payments = DBPaymentRepository(session)
+    uow = DBPaymentUnitOfWork(session)
+
+    async with engine.connect() as conn:
+        payment_id = (
+            await conn.execute(text("SELECT payment_id FROM payment LIMIT 1"))
+        ).scalar_one()
+
+    recent = encode_cursor(now - datetime.timedelta(days=7), uuid.UUID(int=0))
+    old = encode_cursor(start + (now - start) / 4, uuid.UUID(int=0))
+    month = db_partitions.add_months(db_partitions.month_start(now.date()), -6)
+    bounds = {
+        "lower": datetime.datetime.combine(
+            month, datetime.time(), datetime.timezone.utc
+        ),
+        "upper": datetime.datetime.combine(
+            db_partitions.add_months(month, 1), datetime.time(), datetime.timezone.utc
+        ),
+    }
+
+    async def month_totals():
+        async with engine.connect() as conn:
+            await conn.execute(_MONTH_TOTALS, bounds)
+
+    return (
+        ("create_payment", lambda: uow.create_payment(WRITER, PAYMENT)),
+        (
+            "create_payments x100",
+            lambda: uow.create_payments(WRITER, [PAYMENT] * 100, 100),
+        ),
+        ("get_page, recent cursor", lambda: payments.get_page(50, recent)),
+        ("get_page, old cursor", lambda: payments.get_page(50, old)),
+        ("get_by_user", lambda: payments.get_by_user(EMAIL, 50)),
+        ("month totals", month_totals),
+        ("get by payment_id", lambda: payments.get(payment_id)),
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("-n", "--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    start, now = await build(args.url, args.rows, args.months)
+    print(
+        f"{args.rows} payments over {args.months} months, "
+        f"built in {time.perf_counter() - started:.0f} s"
+    )
+
+    results = {}
+    for schema in (PLAIN, PARTITIONED):
+        engine = schema_engine(args.url, schema)
+        try:
+            for label, fn in await cases(engine, start, now):
+                results.setdefault(label, []).append(
+                    await measure(engine, fn, args.runs)
+                )
+        finally:
+            await engine.dispose()
+
+    print(
+        f"{'ms':<26} {'plain p50':>10} {'p95':>8} "
+        f"{'partitioned p50':>16} {'p95':>8} {'partitions':>11}"
+    )
+    for label, ((plain_p50, plain_p95, _), (p50, p95, read)) in results.items():
+        print(
+            f"{label:<26} {plain_p50:10.2f} {plain_p95:8.2f} "
+            f"{p50:16.2f} {p95:8.2f} {read:11d}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Calls per second of the hot repository read methods.
+
+Run from the project root::
+
+    python -m benchmarks.bench_repository [-n 5000] [--url postgresql+asyncpg://...]
+
+By default the tables live in an in-memory SQLite database, so the numbers
+are dominated by the Python side of each call (session handling, statement
+construction, compilation cache lookups, ORM loading) rather than by the
+database. Each method is measured twice: as standalone calls, each opening
+its own session, and as calls sharing one request scope, the way they run
+inside an HTTP request. The auth repository is given a disabled cache so ``get`` reaches
+the database every time. With ``--url`` the schema is dropped and recreated,
+so only point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import datetime
+import time
+import uuid
+
+from decimal import Decimal
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.db.db_request_scope import request_scope
+from app.core.db.operations.db_auth_opers import DBAuthRepository
+from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.models.auth_model import AuthModel
+from app.models.init_model import Base
+from app.models.payment_model import PaymentModel
+from app.models.payment_user_model import PaymentUserModel
+from app.utils.cache import TTLCache
+
+
+USERS = 100
+PAYMENTS_PER_USER = 20
+EMAIL = "user7@example.com"
+
+
+async def seed(engine) -> list[uuid.UUID]:
+    payment_ids = [uuid.uuid4() for _ in range(USERS * PAYMENTS_PER_USER)]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    created = [now - datetime.timedelta(seconds=j) for j in range(len(payment_ids))]
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        await conn.execute(
+            insert(AuthModel),
+            [
+                {
+                    "first_name": "JOHN",
+                    "last_name": "DOE",
+                    "user_email": f"user{i}@example.com",
+                    "user_password_hash": "hash",
+                }
+                for i in range(USERS)
+            ],
+        )
+        await conn.execute(
+            insert(PaymentModel),
+            [
+                {
+                    "payment_id": payment_id,
+                    "creation_time": created[j],
+                    "card_number": "1234",
+                    "first_name": "JOHN",
+                    "last_name": "DOE",
+                    "amount": Decimal(j),
+                    "status": "Создан",
+                }
+                for j, payment_id in enumerate(payment_ids)
+            ],
+        )
+        await conn.execute(
+            insert(PaymentUserModel),
+            [
+                {
+                    "user_email": f"user{j // PAYMENTS_PER_USER}@example.com",
+                    "payment_id": payment_id,
+                    "creation_time": created[j],
+                }
+                for j, payment_id in enumerate(payment_ids)
+            ],
+        )
+
+    return payment_ids
+
+
+async def calls_per_second(fn, iterations: int) -> float:
+    for _ in range(min(iterations, 100)):
+        await fn()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return iterations / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--iterations", type=int, default=5000)
+    parser.add_argument("--url", default="sqlite+aiosqlite://")
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.url)
+    try:
+        payment_ids = await seed(engine)
+        session = async_sessionmaker(engine, expire_on_commit=False)
+
+        auth = DBAuthRepository(session, cache=TTLCache(maxsize=0, ttl=0))
+        payments = DBPaymentRepository(session)
+        payment_users = DBPaymentUserRepository(session)
+        payment_id = payment_ids[len(payment_ids) // 2]
+        _, cursor = await payments.get_page(limit=10)
+
+        cases = (
+            ("DBAuthRepository.get", lambda: auth.get(EMAIL)),
+            ("DBPaymentRepository.get", lambda: payments.get(payment_id)),
+            ("DBPaymentRepository.get_page", lambda: payments.get_page(10)),
+            (
+                "DBPaymentRepository.get_page+cur",
+                lambda: payments.get_page(10, cursor),
+            ),
+            (
+                "DBPaymentRepository.get_by_user",
+                lambda: payments.get_by_user(EMAIL, 10),
+            ),
+            ("DBPaymentUserRepository.get", lambda: payment_users.get(payment_id)),
+        )
+        print(f"{'calls/s':<34} {'standalone':>12} {'in request':>12}")
+        for label, fn in cases:
+            standalone = await calls_per_second(fn, args.iterations)
+            async with request_scope(session):
+                scoped = await calls_per_second(fn, args.iterations)
+            print(f"{label:<34} {standalone:12.0f} {scoped:12.0f}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""Time to serialise a page of payments as a JSON response.
+
+Run from the project root::
+
+    python -m benchmarks.bench_serialization [-n 20] [--size 10000]
+
+Every route returns the same list of ``PaymentModel`` objects, which are
+built in memory so no database is needed. The routes differ only in how
+FastAPI turns them into a response body:
+
+- no ``response_model``: ``jsonable_encoder`` walks the attributes of every
+  object, which is how the routers used to work
+- ``response_model=Page[PaymentOut]``: pydantic-core validates the objects
+  ``from_attributes`` and serialises them in one pass, then the body is
+  rendered with ``json.dumps``
+- the same with ``ORJSONResponse``, which renders the body with orjson
+"""
+
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+import uuid
+
+from decimal import Decimal
+
+import httpx
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from app.models.payment_model import PaymentModel
+from app.schemas.page_schema import Page
+from app.schemas.payment_schema import PaymentOut
+
+
+def make_payments(size: int) -> list[PaymentModel]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        PaymentModel(
+            payment_id=uuid.uuid4(),
+            card_number="1234",
+            first_name="JOHN",
+            last_name="DOE",
+            second_name=None,
+            amount=Decimal("100.250"),
+            creation_time=now,
+            status="Создан",
+        )
+        for _ in range(size)
+    ]
+
+
+def make_app(payments: list[PaymentModel]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/encoder")
+    async def encoder():
+        return {"items": payments, "next_cursor": None}
+
+    @app.get("/model", response_model=Page[PaymentOut])
+    async def model():
+        return {"items": payments, "next_cursor": None}
+
+    @app.get(
+        "/model_orjson",
+        response_model=Page[PaymentOut],
+        response_class=ORJSONResponse,
+    )
+    async def model_orjson():
+        return {"items": payments, "next_cursor": None}
+
+    return app
+
+
+async def run(ac: httpx.AsyncClient, path: str, iterations: int) -> list[float]:
+    await ac.get(path)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        res = await ac.get(path)
+        timings.append(time.perf_counter() - started)
+        res.raise_for_status()
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--size", type=int, default=10000)
+    args = parser.parse_args()
+
+    app = make_app(make_payments(args.size))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        print(f"{args.size} payments per response")
+        print(f"{'route':<16} {'median ms':>10} {'p95 ms':>10} {'bytes':>10}")
+        for path in ("/encoder", "/model", "/model_orjson"):
+            timings = await run(ac, path, args.iterations)
+            size = len((await ac.get(path)).content)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(
+                f"{path:<16} {statistics.median(timings) * 1000:10.1f} "
+                f"{p95 * 1000:10.1f} {size:10d}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
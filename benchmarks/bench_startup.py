@@ -0,0 +1,144 @@
+"""Cold start of a worker: from a fresh interpreter to the first response.
+
+Run from the project root, against a database migrated with
+``alembic upgrade head``::
+
+    python -m benchmarks.bench_startup [-n 5] [--modes create_all verify_revision]
+
+Each run starts a new Python process, the way a worker boots, with
+``DB_STARTUP_MODE`` set to the mode being measured. The process imports
+the app and builds it with ``create_app()`` (import), runs the startup
+handlers (startup), then sends its first request, a failed login that
+reads the users table (first request). The total is measured by this
+process, from spawning the child until it reports, so it also covers
+interpreter startup. Medians over ``-n`` runs are reported.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import select
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+METRICS = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+
+
+async def child(report_fd: int) -> None:
+    started = time.perf_counter()
+    # imported here: importing the app is part of what is measured
+    from app.core.app import create_app
+
+    app = create_app()
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.post(
+                "/auth/authentication",
+                json={"user_email": "nobody@example.com", "user_password": "nobody"},
+            )
+        answered = time.perf_counter()
+
+        timings = {
+            "import_ms": (imported - started) * 1000,
+            "startup_ms": (ready - imported) * 1000,
+            "first_request_ms": (answered - ready) * 1000,
+        }
+        # a pipe of its own: the app's log records also go to stdout
+        with os.fdopen(report_fd, "w") as report:
+            report.write(json.dumps(timings))
+
+
+def _kill(proc: subprocess.Popen, reason: str) -> None:
+    proc.kill()
+    proc.wait()
+    raise RuntimeError(reason)
+
+
+def cold_start(mode: str | None = None, timeout: float = 60.0) -> dict[str, float]:
+    """Timings of one cold start, in a new process.
+
+    The child has ``timeout`` seconds to report, and as many again to exit;
+    it is killed otherwise.
+    """
+    env = dict(os.environ)
+    if mode is not None:
+        env["DB_STARTUP_MODE"] = mode
+
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child", str(write_fd)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        pass_fds=(write_fd,),
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as report:
+        if not select.select([report], [], [], timeout)[0]:
+            _kill(proc, f"app did not start in {timeout} s")
+        # returns once the child has answered its first request and closed
+        # the pipe; its shutdown is not counted
+        raw = report.read()
+    total_ms = (time.perf_counter() - started) * 1000
+
+    try:
+        returncode = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(proc, f"app did not exit {timeout} s after its first request")
+    if returncode != 0 or not raw:
+        raise RuntimeError(f"app failed to start in {mode or 'configured'} mode")
+    return {**json.loads(raw), "total_ms": total_ms}
+
+
+def median_cold_start(mode: str | None, runs: int) -> dict[str, float]:
+    samples = [cold_start(mode) for _ in range(runs)]
+    return {
+        metric: statistics.median(sample[metric] for sample in samples)
+        for metric in METRICS
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["create_all", "verify_revision"])
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        asyncio.run(child(args.child))
+        # the report is written and the app shut down: skip the interpreter's
+        # teardown, which would wait on any thread a library left running
+        from app.utils.logger_config import stop_listener
+
+        stop_listener()
+        logging.shutdown()
+        os._exit(0)
+
+    print(f"median of {args.runs} cold starts")
+    print(
+        f"{'mode':<16} {'import ms':>10} {'startup ms':>11} "
+        f"{'1st req ms':>11} {'total ms':>10}"
+    )
+    for mode in args.modes:
+        timings = median_cold_start(mode, args.runs)
+        print(
+            f"{mode:<16} {timings['import_ms']:10.1f} {timings['startup_ms']:11.1f} "
+            f"{timings['first_request_ms']:11.1f} {timings['total_ms']:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from app.core.app import create_app
+from benchmarks.bench_load import (
+    Seed,
+    make_routes,
+    percentile,
+    regressions,
+    unmeasured_routes,
+)
+
+
+BASELINE = {"GET /payment/all": {"rps": 100.0, "p95_ms": 10.0}}
+
+
+def _result(rps: float, p95_ms: float, errors: int = 0) -> dict:
+    return {"rps": rps, "p95_ms": p95_ms, "errors": errors}
+
+
+def test_every_api_route_is_measured():
+    assert unmeasured_routes(create_app(), make_routes(Seed())) == []
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7
+
+
+def test_within_thresholds_passes():
+    results = {"GET /payment/all": _result(85, 14)}
+    assert regressions(BASELINE, results, 0.2, 0.5) == []
+
+
+def test_throughput_drop_fails():
+    results = {"GET /payment/all": _result(79, 10)}
+    assert len(regressions(BASELINE, results, 0.2, 0.5)) == 1
+
+
+def test_latency_rise_fails():
+    results = {"GET /payment/all": _result(100, 16)}
+    assert len(regressions(BASELINE, results, 0.2, 0.5)) == 1
+
+
+def test_errors_fail_without_baseline():
+    results = {"GET /payment/summary": _result(100, 10, errors=3)}
+    assert regressions(BASELINE, results, 0.2, 0.5) == [
+        "GET /payment/summary: 3 unexpected responses"
+    ]
@@ -0,0 +1,11 @@
+from benchmarks.bench_startup import METRICS, cold_start
+
+
+def test_cold_start_reports_and_exits(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'cold.db'}")
+    monkeypatch.setenv("APP_LOG_DIR", str(tmp_path))
+
+    # raises instead of hanging if the child does not report or exit in time
+    timings = cold_start("create_all", timeout=60)
+    assert set(timings) == set(METRICS)
+    assert all(value > 0 for value in timings.values())
@@ -0,0 +1,39 @@
+import os
+
+import pytest_asyncio
+
+from app.core.db.db_init import DB
+from app.models.auth_model import Base
+
+
+# Integration tests run against TEST_DATABASE_URL when it is set, e.g.
+# TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/payment_test
+# and against a temporary SQLite file otherwise. The schema is dropped and
+# recreated, so never point it at real data. Read replica tests use a
+# second database, TEST_DATABASE_REPLICA_URL or another SQLite file; nothing
+# replicates between the two, as if the replica lagged behind forever.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TEST_DATABASE_REPLICA_URL = os.getenv("TEST_DATABASE_REPLICA_URL")
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    db = DB(TEST_DATABASE_URL or f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await db.drop_database()
+    await db.setup_database()
+    yield db.session
+    await db.engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def replicated_db(tmp_path):
+    db = DB(
+        TEST_DATABASE_URL or f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        TEST_DATABASE_REPLICA_URL or f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+    )
+    for engine in db.engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    yield db
+    await db.dispose()
@@ -0,0 +1,11 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def session_factory(fake_session):
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=fake_session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm)
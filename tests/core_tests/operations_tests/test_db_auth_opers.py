@@ -19,17 +19,8 @@ def fake_session():
 
 
 @pytest.fixture
-def repo():
-    r = DBAuthRepository(session=MagicMock())
-
-    def connection_decorator(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, **kwargs)
-
-        return wrapper
-
-    r.connection = connection_decorator
-    return r
+def repo(session_factory):
+    return DBAuthRepository(session=session_factory)
 
 
 @pytest.mark.asyncio
@@ -45,14 +36,6 @@ async def test_create_success(repo, fake_session):
     fake_session.commit = AsyncMock()
     fake_session.refresh = AsyncMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    repo.connection = connection_with_session
-
     result = await repo.create(user_in)
 
     assert result is not None
@@ -81,14 +64,6 @@ async def test_create_integrity_error(repo, fake_session):
     fake_session.rollback = AsyncMock()
     fake_session.refresh = MagicMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    repo.connection = connection_with_session
-
     result = await repo.create(user_in)
     assert result is None
     fake_session.rollback.assert_called()
@@ -104,14 +79,6 @@ async def test_get_returns_user(repo, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    repo.connection = connection_with_session
-
     res = await repo.get("a@b.com")
     assert isinstance(res, AuthModel)
     assert res.user_email == "a@b.com"
@@ -131,14 +98,6 @@ async def test_get_all(repo, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    repo.connection = connection_with_session
-
     res = await repo.get_all()
     assert isinstance(res, list)
     assert len(res) == 2
@@ -150,14 +109,6 @@ async def test_update_and_delete_call_execute_and_commit(repo, fake_session):
     fake_session.execute = AsyncMock()
     fake_session.commit = AsyncMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    repo.connection = connection_with_session
-
     await repo.update("u@u.com", "newhash")
     fake_session.execute.assert_called()
     fake_session.commit.assert_called()
@@ -168,3 +119,43 @@ async def test_update_and_delete_call_execute_and_commit(repo, fake_session):
     await repo.delete("u@u.com")
     fake_session.execute.assert_called()
     fake_session.commit.assert_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("invalidating_call", ["update", "delete"])
+async def test_get_is_cached_until_update_or_delete(
+    repo, fake_session, invalidating_call
+):
+    user = AuthModel(
+        first_name="A", last_name="B", user_email="a@b.com", user_password_hash="h"
+    )
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.one_or_none.return_value = user
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    assert await repo.get("a@b.com") is user
+    assert await repo.get("a@b.com") is user
+    assert fake_session.execute.await_count == 1
+    assert repo.cache.stats()["hits"] == 1
+
+    if invalidating_call == "update":
+        await repo.update("a@b.com", "newhash")
+    else:
+        await repo.delete("a@b.com")
+    assert len(repo.cache) == 0
+
+    fake_session.execute.reset_mock()
+    await repo.get("a@b.com")
+    fake_session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_missing_user_is_not_cached(repo, fake_session):
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.one_or_none.return_value = None
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    assert await repo.get("new@b.com") is None
+    assert await repo.get("new@b.com") is None
+    assert fake_session.execute.await_count == 2
+    assert len(repo.cache) == 0
@@ -0,0 +1,76 @@
+import datetime
+import uuid
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.db.operations.db_idempotency_opers import DBIdempotencyRepository
+from app.models.idempotency_model import IdempotencyKeyModel
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def fake_session():
+    sess = MagicMock()
+    sess.execute = AsyncMock()
+    sess.commit = AsyncMock()
+    sess.rollback = AsyncMock()
+    return sess
+
+
+@pytest.fixture
+def idempotency_repository(session_factory):
+    return DBIdempotencyRepository(
+        session=session_factory, cache=TTLCache(maxsize=10, ttl=60)
+    )
+
+
+def _record(expires_in: float) -> IdempotencyKeyModel:
+    return IdempotencyKeyModel(
+        user_email="john@example.com",
+        key="k1",
+        request_hash="h",
+        payment_id=uuid.uuid4(),
+        expires_at=datetime.datetime.now(datetime.timezone.utc)
+        + datetime.timedelta(seconds=expires_in),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_caches_completed_keys(
+    idempotency_repository, session_factory, fake_session
+):
+    record = _record(30)
+    res = MagicMock()
+    res.scalars.return_value.one_or_none.return_value = record
+    fake_session.execute = AsyncMock(return_value=res)
+
+    assert await idempotency_repository.get("john@example.com", "k1") is record
+    assert await idempotency_repository.get("john@example.com", "k1") is record
+
+    session_factory.assert_called_once()
+    params = fake_session.execute.await_args[0][1]
+    assert params["user_email"] == "john@example.com"
+    assert params["key"] == "k1"
+
+
+@pytest.mark.asyncio
+async def test_get_does_not_cache_unknown_keys(
+    idempotency_repository, session_factory, fake_session
+):
+    res = MagicMock()
+    res.scalars.return_value.one_or_none.return_value = None
+    fake_session.execute = AsyncMock(return_value=res)
+
+    assert await idempotency_repository.get("john@example.com", "k1") is None
+    assert await idempotency_repository.get("john@example.com", "k1") is None
+    assert session_factory.call_count == 2
+
+
+def test_remember_skips_expired_records(idempotency_repository):
+    idempotency_repository.remember(_record(-1))
+    assert len(idempotency_repository.cache) == 0
+
+    idempotency_repository.remember(_record(30))
+    assert len(idempotency_repository.cache) == 1
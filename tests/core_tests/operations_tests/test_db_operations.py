@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
-from app.core.db.operations.db_operations import DBRepository
+from app.core.db.operations.db_operations import DBRepository, connection
 
 
 @pytest.mark.asyncio
@@ -19,14 +19,13 @@ async def test_connection_passes_session():
 
     called = {}
 
-    async def target(x, *, session):
+    @connection
+    async def target(self, x, *, session):
         called["session_is_correct"] = session is mock_session_ctx
         called["x"] = x
         return "ok"
 
-    wrapped = repo.connection(target)
-
-    res = await wrapped(123)
+    res = await target(repo, 123)
     assert res == "ok"
     assert called["x"] == 123
     assert called["session_is_correct"] is True
@@ -48,13 +47,12 @@ async def test_connection_rolls_back_on_exception():
     session_factory = MagicMock(return_value=mock_session_cm)
     repo = DBRepository(session=session_factory)
 
-    async def target_raises(*, session):
+    @connection
+    async def target_raises(self, *, session):
         raise ValueError("boom")
 
-    wrapped = repo.connection(target_raises)
-
     with pytest.raises(ValueError):
-        await wrapped()
+        await target_raises(repo)
 
     mock_session_ctx.rollback.assert_awaited()
     mock_session_cm.__aenter__.assert_awaited()
@@ -21,17 +21,8 @@ def fake_session():
 
 
 @pytest.fixture
-def payment_repository():
-    r = DBPaymentRepository(session=MagicMock())
-
-    def connection_decorator(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, **kwargs)
-
-        return wrapper
-
-    r.connection = connection_decorator
-    return r
+def payment_repository(session_factory):
+    return DBPaymentRepository(session=session_factory)
 
 
 @pytest.mark.asyncio
@@ -49,14 +40,6 @@ async def test_create_payment_success(payment_repository, fake_session):
     fake_session.commit = AsyncMock()
     fake_session.refresh = AsyncMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     result = await payment_repository.create(payment_data)
 
     assert result is not None
@@ -87,14 +70,6 @@ async def test_create_payment_integrity_error(payment_repository, fake_session):
     fake_session.rollback = AsyncMock()
     fake_session.refresh = MagicMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     result = await payment_repository.create(payment_data)
     assert result is None
     fake_session.rollback.assert_called()
@@ -116,14 +91,6 @@ async def test_get_payment(payment_repository, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     res = await payment_repository.get(mock_scalars.one_or_none.return_value.payment_id)
     assert isinstance(res, PaymentModel)
     assert res.card_number == "3456"
@@ -155,14 +122,6 @@ async def test_get_all_payments(payment_repository, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     res = await payment_repository.get_all()
     assert isinstance(res, list)
     assert len(res) == 2
@@ -177,19 +136,43 @@ async def test_update_payment(payment_repository, fake_session):
     payment_id = uuid.uuid4()
     new_status = "Обработан"
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     await payment_repository.update(payment_id, new_status)
     fake_session.execute.assert_called()
     fake_session.commit.assert_called()
 
 
+@pytest.mark.asyncio
+async def test_update_if_created_is_one_statement(payment_repository, fake_session):
+    payment = PaymentModel(payment_id=uuid.uuid4(), status="Оплачен")
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.one_or_none.return_value = payment
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    res = await payment_repository.update_if_created(payment.payment_id, "Оплачен")
+
+    assert res is payment
+    fake_session.execute.assert_awaited_once()
+    stmt, params = fake_session.execute.await_args[0]
+    sql = str(stmt)
+    assert sql.startswith("WITH moved AS")
+    assert "WHERE payment.payment_id = :target_id AND payment.status = " in sql
+    assert "RETURNING payment.payment_id" in sql
+    assert "UPDATE payment_user_summary" in sql
+    assert params == {"target_id": payment.payment_id}
+    fake_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_update_if_created_returns_none_without_match(
+    payment_repository, fake_session
+):
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.one_or_none.return_value = None
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    assert await payment_repository.update_if_created(uuid.uuid4(), "Отменен") is None
+
+
 @pytest.mark.asyncio
 async def test_delete_payment(payment_repository, fake_session):
     fake_session.execute = AsyncMock()
@@ -197,14 +180,43 @@ async def test_delete_payment(payment_repository, fake_session):
 
     payment_id = uuid.uuid4()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_repository.connection = connection_with_session
-
     await payment_repository.delete(payment_id)
     fake_session.execute.assert_called()
     fake_session.commit.assert_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method, args",
+    [
+        ("get_by_user", ("john@example.com",)),
+        ("get_by_user_and_status", ("john@example.com", "Создан")),
+        ("get_by_user_and_amount", ("john@example.com", 100)),
+    ],
+)
+async def test_get_user_payments_single_joined_query(
+    payment_repository, fake_session, method, args
+):
+    payment = PaymentModel(
+        payment_id=uuid.uuid4(),
+        card_number="3456",
+        first_name="JOHN",
+        last_name="DOE",
+        second_name=None,
+        amount=50.00,
+        status="Создан",
+    )
+    mock_result = MagicMock()
+    mock_scalars = MagicMock()
+    mock_scalars.all.return_value = [payment]
+    mock_result.scalars.return_value = mock_scalars
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    res = await getattr(payment_repository, method)(*args)
+    assert res == ([payment], None)
+
+    fake_session.execute.assert_awaited_once()
+    sql = str(fake_session.execute.await_args[0][0])
+    assert "JOIN payment_user" in sql
+    assert "payment_user.user_email" in sql
+    assert "ORDER BY payment.creation_time, payment.payment_id" in sql
@@ -0,0 +1,37 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.models.payment_summary_model import PaymentSummaryModel
+
+
+@pytest.fixture
+def fake_session():
+    sess = MagicMock()
+    sess.execute = AsyncMock()
+    sess.rollback = AsyncMock()
+    return sess
+
+
+@pytest.fixture
+def summary_repository(session_factory):
+    return DBPaymentSummaryRepository(session=session_factory)
+
+
+@pytest.mark.asyncio
+async def test_get_summary_is_a_primary_key_lookup(summary_repository, fake_session):
+    summary = PaymentSummaryModel(
+        user_email="john@example.com", created_count=2, created_amount=Decimal("3")
+    )
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.one_or_none.return_value = summary
+    fake_session.execute = AsyncMock(return_value=mock_result)
+
+    res = await summary_repository.get("john@example.com")
+
+    assert res is summary
+    stmt, params = fake_session.execute.await_args[0]
+    assert "WHERE payment_user_summary.user_email = " in str(stmt)
+    assert params == {"user_email": "john@example.com"}
@@ -11,6 +11,7 @@ def fake_session():
     sess = MagicMock()
     sess.add = MagicMock()
     sess.refresh = AsyncMock()
+    sess.flush = AsyncMock()
     sess.execute = AsyncMock()
     sess.commit = AsyncMock()
     sess.rollback = AsyncMock()
@@ -18,17 +19,8 @@ def fake_session():
 
 
 @pytest.fixture
-def payment_user_repository():
-    r = DBPaymentUserRepository(session=MagicMock())
-
-    def connection_decorator(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, **kwargs)
-
-        return wrapper
-
-    r.connection = connection_decorator
-    return r
+def payment_user_repository(session_factory):
+    return DBPaymentUserRepository(session=session_factory)
 
 
 @pytest.mark.asyncio
@@ -40,14 +32,6 @@ async def test_create_payment_user_success(payment_user_repository, fake_session
     fake_session.commit = AsyncMock()
     fake_session.refresh = AsyncMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     result = await payment_user_repository.create(user_email, payment_id)
 
     assert result is not None
@@ -56,6 +40,13 @@ async def test_create_payment_user_success(payment_user_repository, fake_session
     assert result.payment_id == payment_id
 
     fake_session.add.assert_called()
+    fake_session.flush.assert_awaited_once()
+    summary_stmt = fake_session.execute.await_args[0][0]
+    assert "INSERT INTO payment_user_summary" in str(summary_stmt)
+    assert fake_session.execute.await_args[0][1] == {
+        "payment_id": payment_id,
+        "sign": 1,
+    }
     fake_session.commit.assert_called()
     fake_session.refresh.assert_called()
 
@@ -76,14 +67,6 @@ async def test_create_payment_user_integrity_error(
     fake_session.rollback = AsyncMock()
     fake_session.refresh = MagicMock()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     result = await payment_user_repository.create(user_email, payment_id)
     assert result is None
     fake_session.rollback.assert_called()
@@ -100,14 +83,6 @@ async def test_get_payment_user(payment_user_repository, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     res = await payment_user_repository.get(payment_id)
     assert isinstance(res, PaymentUserModel)
     assert res.user_email == "john@example.com"
@@ -123,14 +98,6 @@ async def test_get_all_payment_users(payment_user_repository, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     res = await payment_user_repository.get_all()
     assert isinstance(res, list)
     assert len(res) == 2
@@ -144,14 +111,6 @@ async def test_delete_payment_user(payment_user_repository, fake_session):
 
     payment_id = uuid.uuid4()
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     await payment_user_repository.delete(payment_id)
     fake_session.execute.assert_called()
     fake_session.commit.assert_called()
@@ -168,14 +127,6 @@ async def test_get_by_user_email(payment_user_repository, fake_session):
     mock_result.scalars.return_value = mock_scalars
     fake_session.execute = AsyncMock(return_value=mock_result)
 
-    def connection_with_session(fn):
-        async def wrapper(*args, **kwargs):
-            return await fn(*args, fake_session, **kwargs)
-
-        return wrapper
-
-    payment_user_repository.connection = connection_with_session
-
     res = await payment_user_repository.get_by_user(user_email)
     assert isinstance(res, list)
     assert len(res) == 2
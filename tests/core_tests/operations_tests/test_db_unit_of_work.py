@@ -0,0 +1,206 @@
+import datetime
+import uuid
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.schemas.payment_schema import PaymentSchema
+
+
+CREATED = datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def fake_session():
+    sess = MagicMock()
+    sess.add = MagicMock()
+    sess.refresh = AsyncMock()
+    sess.execute = AsyncMock()
+    sess.commit = AsyncMock()
+    sess.rollback = AsyncMock()
+    return sess
+
+
+@pytest.fixture
+def uow(session_factory):
+    return DBPaymentUnitOfWork(session=session_factory)
+
+
+@pytest.fixture
+def payment_data():
+    return PaymentSchema(
+        card_number="3456",
+        first_name="JOHN",
+        last_name="DOE",
+        second_name=None,
+        amount=100.00,
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_payment_inserts_both_rows_in_one_commit(
+    uow, fake_session, payment_data
+):
+    payment_id = uuid.uuid4()
+    returning = MagicMock()
+    returning.one.return_value = (payment_id, CREATED)
+    fake_session.execute = AsyncMock(side_effect=[returning, MagicMock(), MagicMock()])
+
+    res = await uow.create_payment("john@example.com", payment_data)
+    assert res == payment_id
+
+    assert fake_session.execute.await_count == 3
+    payment_stmt = fake_session.execute.await_args_list[0][0][0]
+    relation_stmt = fake_session.execute.await_args_list[1][0][0]
+    summary_stmt, summary_params = fake_session.execute.await_args_list[2][0]
+    assert "INSERT INTO payment " in str(payment_stmt)
+    assert "RETURNING payment.payment_id" in str(payment_stmt)
+    assert "INSERT INTO payment_user" in str(relation_stmt)
+    assert relation_stmt.compile().params["payment_id"] == payment_id
+    assert relation_stmt.compile().params["creation_time"] == CREATED
+    assert "INSERT INTO payment_user_summary" in str(summary_stmt)
+    assert summary_params == {
+        "user_email": "john@example.com",
+        "count": 1,
+        "amount": payment_data.amount,
+    }
+
+    fake_session.commit.assert_awaited_once()
+    fake_session.refresh.assert_not_called()
+    fake_session.rollback.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_rolls_back_both_rows_on_integrity_error(
+    uow, fake_session, payment_data
+):
+    returning = MagicMock()
+    returning.one.return_value = (uuid.uuid4(), CREATED)
+    fake_session.execute = AsyncMock(
+        side_effect=[
+            returning,
+            IntegrityError(statement="stmt", params={}, orig=None),
+        ]
+    )
+
+    res = await uow.create_payment("john@example.com", payment_data)
+    assert res is None
+    fake_session.rollback.assert_awaited_once()
+    fake_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_reraises_unexpected_errors(
+    uow, fake_session, payment_data
+):
+    fake_session.execute = AsyncMock(side_effect=RuntimeError("boom"))
+
+    with pytest.raises(RuntimeError):
+        await uow.create_payment("john@example.com", payment_data)
+    fake_session.rollback.assert_awaited()
+    fake_session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_payments_chunks_multi_row_inserts_in_one_commit(
+    uow, fake_session, payment_data
+):
+    def execute(stmt, params):
+        res = MagicMock()
+        if isinstance(params, list):
+            res.all.return_value = [(p.get("payment_id"), CREATED) for p in params]
+        return res
+
+    fake_session.execute = AsyncMock(side_effect=execute)
+
+    res = await uow.create_payments("john@example.com", [payment_data] * 5, 2)
+
+    assert len(res) == 5
+    assert len(set(res)) == 5
+    # 3 chunks, each one multi-row payment insert plus one relation insert,
+    # then a single summary update for the whole batch
+    assert fake_session.execute.await_count == 7
+    calls = fake_session.execute.await_args_list
+    chunk_sizes = [len(c[0][1]) for c in calls[:6]]
+    assert chunk_sizes == [2, 2, 2, 2, 1, 1]
+    assert calls[6][0][1] == {
+        "user_email": "john@example.com",
+        "count": 5,
+        "amount": payment_data.amount * 5,
+    }
+
+    relation_params = fake_session.execute.await_args_list[1][0][1]
+    assert relation_params == [
+        {"user_email": "john@example.com", "payment_id": pid, "creation_time": CREATED}
+        for pid in res[:2]
+    ]
+    fake_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_create_payments_rolls_back_whole_batch(uow, fake_session, payment_data):
+    fake_session.execute = AsyncMock(
+        side_effect=IntegrityError(statement="stmt", params={}, orig=None)
+    )
+
+    res = await uow.create_payments("john@example.com", [payment_data] * 3, 2)
+    assert res is None
+    fake_session.rollback.assert_awaited_once()
+    fake_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_once_claims_key_in_the_payment_transaction(
+    uow, fake_session, payment_data
+):
+    payment_id = uuid.uuid4()
+    claimed = MagicMock()
+    claimed.first.return_value = ("k1",)
+    returning = MagicMock()
+    returning.one.return_value = (payment_id, CREATED)
+    fake_session.execute = AsyncMock(
+        side_effect=[claimed, returning, MagicMock(), MagicMock(), MagicMock()]
+    )
+
+    record, created = await uow.create_payment_once(
+        "john@example.com", payment_data, "k1", "hash", 60
+    )
+
+    assert created
+    assert record.payment_id == payment_id
+    assert record.request_hash == "hash"
+    stmts = [str(c[0][0]) for c in fake_session.execute.await_args_list]
+    assert stmts[0].startswith("INSERT INTO idempotency_key")
+    assert "ON CONFLICT" in stmts[0]
+    assert stmts[4].startswith("UPDATE idempotency_key")
+    assert fake_session.execute.await_args_list[4][0][1] == {
+        "payment_id": payment_id,
+        "owner": "john@example.com",
+        "idempotency_key": "k1",
+    }
+    fake_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_once_returns_existing_key(
+    uow, fake_session, payment_data
+):
+    existing = MagicMock()
+    claimed = MagicMock()
+    claimed.first.return_value = None
+    found = MagicMock()
+    found.scalars.return_value.one.return_value = existing
+    fake_session.execute = AsyncMock(side_effect=[claimed, found])
+
+    record, created = await uow.create_payment_once(
+        "john@example.com", payment_data, "k1", "hash", 60
+    )
+
+    assert record is existing
+    assert not created
+    assert fake_session.execute.await_count == 2
+    fake_session.expunge.assert_called_once_with(existing)
+    fake_session.rollback.assert_awaited_once()
+    fake_session.commit.assert_not_awaited()
@@ -0,0 +1,113 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.core.db.operations.pagination import (
+    InvalidCursorError,
+    encode_cursor,
+    decode_cursor,
+    KeysetQuery,
+    keyset_page,
+)
+from app.models.auth_model import AuthModel
+from app.models.payment_model import PaymentModel
+
+
+PAYMENT_KEYSET = (PaymentModel.creation_time, PaymentModel.payment_id)
+PAYMENT_PARSERS = (datetime.datetime.fromisoformat, uuid.UUID)
+
+
+def test_cursor_roundtrip():
+    ts = datetime.datetime(2025, 9, 6, 12, 30, 1, 123456, tzinfo=datetime.timezone.utc)
+    pid = uuid.uuid4()
+
+    cursor = encode_cursor(ts, pid)
+    assert isinstance(cursor, str)
+    assert decode_cursor(cursor, PAYMENT_PARSERS) == [ts, pid]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64 at all!",
+        encode_cursor(1),
+        encode_cursor("2025-01-01T00:00:00", "not-a-uuid"),
+        encode_cursor("yesterday", str(uuid.uuid4())),
+    ],
+)
+def test_decode_invalid_cursor_raises(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, PAYMENT_PARSERS)
+
+
+def test_keyset_query_without_cursor_orders_and_overfetches():
+    keyset = KeysetQuery(select(PaymentModel), PAYMENT_KEYSET, PAYMENT_PARSERS)
+    stmt, params = keyset.statement(None, 10, user_email="john@example.com")
+    sql = str(stmt)
+
+    assert "WHERE" not in sql
+    assert "ORDER BY payment.creation_time, payment.payment_id" in sql
+    assert "LIMIT :page_limit" in sql
+    assert params == {"page_limit": 11, "user_email": "john@example.com"}
+
+
+def test_keyset_query_with_cursor_filters_after_key():
+    ts, pid = datetime.datetime(2025, 1, 1), uuid.uuid4()
+    keyset = KeysetQuery(select(PaymentModel), PAYMENT_KEYSET, PAYMENT_PARSERS)
+    stmt, params = keyset.statement(encode_cursor(ts, pid), 10)
+
+    assert (
+        "(payment.creation_time, payment.payment_id) > "
+        "(:after_creation_time, :after_payment_id)" in str(stmt)
+    )
+    assert params == {
+        "page_limit": 11,
+        "after_creation_time": ts,
+        "after_payment_id": pid,
+    }
+
+    keyset = KeysetQuery(select(AuthModel), (AuthModel.id,), (int,))
+    stmt, params = keyset.statement(encode_cursor(5), 10)
+    assert "auth_data.id > :after_id" in str(stmt)
+    assert params["after_id"] == 5
+
+
+def test_descending_keyset_query_filters_before_key():
+    ts, pid = datetime.datetime(2025, 1, 1), uuid.uuid4()
+    keyset = KeysetQuery(
+        select(PaymentModel), PAYMENT_KEYSET, PAYMENT_PARSERS, descending=True
+    )
+    sql = str(keyset.statement(encode_cursor(ts, pid), 10)[0])
+
+    assert "payment.creation_time <= :after_creation_time" in sql
+    assert (
+        "(payment.creation_time, payment.payment_id) < "
+        "(:after_creation_time, :after_payment_id)" in sql
+    )
+    assert "ORDER BY payment.creation_time DESC, payment.payment_id DESC" in str(
+        keyset.first_page
+    )
+
+
+def test_keyset_query_statements_are_prebuilt():
+    keyset = KeysetQuery(select(AuthModel), (AuthModel.id,), (int,))
+
+    assert keyset.statement(None, 10)[0] is keyset.statement(None, 20)[0]
+    assert keyset.statement(encode_cursor(1), 10)[0] is keyset.next_page
+
+    with pytest.raises(InvalidCursorError):
+        keyset.statement("garbage", 10)
+
+
+def test_keyset_page_sets_next_cursor_only_when_more_rows():
+    users = [AuthModel(id=i) for i in range(1, 4)]
+
+    items, next_cursor = keyset_page(users, (AuthModel.id,), 3)
+    assert items == users
+    assert next_cursor is None
+
+    items, next_cursor = keyset_page(users, (AuthModel.id,), 2)
+    assert items == users[:2]
+    assert decode_cursor(next_cursor, (int,)) == [2]
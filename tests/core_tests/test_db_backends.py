@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from pydantic import ValidationError
+from sqlalchemy import make_url
+
+from app.core.db.db_init import DB, _engine_options
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.core.db.operations.dialects import PerDialect
+from app.schemas.payment_schema import PaymentSchema
+from app.utils.config import Settings
+
+
+REQUIRED = dict(
+    HOST="127.0.0.1",
+    PORT=8000,
+    BASE_URL_1="http://a",
+    BASE_URL_2="http://b",
+    JWT_SECRET="s",
+    JWT_ALGORITHM="HS256",
+    ACCESS_TOKEN_EXPIRE_MINUTES=10,
+    SU="admin@admin.com",
+)
+
+
+def test_database_url_is_built_from_postgres_settings():
+    s = Settings(
+        _env_file=None,
+        POSTGRES_USER="u",
+        POSTGRES_PASSWORD="p",
+        POSTGRES_HOST="h",
+        POSTGRES_DB="d",
+        **REQUIRED,
+    )
+    assert s.database_url == "postgresql+asyncpg://u:p@h:5432/d"
+
+
+def test_database_url_wins_over_postgres_settings():
+    s = Settings(
+        _env_file=None,
+        DATABASE_URL="sqlite+aiosqlite:///payments.db",
+        POSTGRES_USER="u",
+        **REQUIRED,
+    )
+    assert s.database_url == "sqlite+aiosqlite:///payments.db"
+
+
+def test_database_settings_are_required(monkeypatch):
+    for name in ("DATABASE_URL", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        monkeypatch.delenv(name, raising=False)
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None, **REQUIRED)
+
+
+def test_engine_options_per_backend():
+    pg = _engine_options(make_url("postgresql+asyncpg://u:p@h/d"))
+    assert "statement_cache_size" in pg["connect_args"]
+
+    memory = _engine_options(make_url("sqlite+aiosqlite://"))
+    assert memory["pool_size"] == 1
+    assert memory["max_overflow"] == 0
+
+    assert "connect_args" not in _engine_options(
+        make_url("sqlite+aiosqlite:///payments.db")
+    )
+
+
+def test_per_dialect_follows_the_session_bind():
+    statements = PerDialect(lambda insert: insert.__module__)
+
+    sqlite_session = MagicMock()
+    sqlite_session.bind.dialect.name = "sqlite"
+    assert "sqlite" in statements(sqlite_session)
+    assert "postgresql" in statements(MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_in_memory_sqlite_runs_the_repositories():
+    db = DB("sqlite+aiosqlite://")
+    await db.setup_database()
+    try:
+        await DBPaymentUnitOfWork(db.session).create_payment(
+            "john@example.com",
+            PaymentSchema(
+                card_number="1234", first_name="JOHN", last_name="DOE", amount=5
+            ),
+        )
+        summary = await DBPaymentSummaryRepository(db.session).get("john@example.com")
+        assert summary.created_count == 1
+    finally:
+        await db.engine.dispose()
@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from app.core.db.db_init import DB
+from app.core.db.db_migrations import (
+    VERSIONS_DIR,
+    SchemaRevisionError,
+    head_revisions,
+)
+
+
+@pytest_asyncio.fixture
+async def db():
+    db = DB("sqlite+aiosqlite://")
+    yield db
+    await db.engine.dispose()
+
+
+async def _stamp(db: DB, revision: str) -> None:
+    async with db.engine.begin() as conn:
+        await conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        )
+        await conn.execute(
+            text("INSERT INTO alembic_version VALUES (:revision)"),
+            {"revision": revision},
+        )
+
+
+def test_head_revisions_match_alembic():
+    script = ScriptDirectory(str(VERSIONS_DIR.parent))
+    assert head_revisions() == set(script.get_heads())
+
+
+def test_head_revisions_follow_merges(tmp_path):
+    for revision, down in (("a", None), ("b", "a"), ("c", "a"), ("d", ("b", "c"))):
+        (tmp_path / f"{revision}.py").write_text(
+            f"revision = {revision!r}\ndown_revision = {down!r}\n"
+        )
+    assert head_revisions(tmp_path) == {"d"}
+
+
+@pytest.mark.asyncio
+async def test_verify_revision_at_head(db):
+    (head,) = head_revisions()
+    await _stamp(db, head)
+    assert await db.verify_revision() == {head}
+
+
+@pytest.mark.asyncio
+async def test_verify_revision_behind_head(db):
+    await _stamp(db, "bd4626ca907d")
+    with pytest.raises(SchemaRevisionError, match="bd4626ca907d"):
+        await db.verify_revision()
+
+
+@pytest.mark.asyncio
+async def test_verify_revision_without_migrations(db):
+    with pytest.raises(SchemaRevisionError, match="no Alembic revision"):
+        await db.verify_revision()
@@ -0,0 +1,199 @@
+import datetime
+import json
+import os
+import uuid
+
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from sqlalchemy import event, insert, text
+
+from app.core.db import db_partitions
+from app.core.db.db_init import DB
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.models.payment_model import PaymentModel
+from app.schemas.payment_schema import PaymentSchema
+
+
+# Postgres tests run against a scratch TEST_DATABASE_URL, as in conftest
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+EMAIL = "john@example.com"
+TODAY = datetime.date(2024, 11, 15)
+OLD_MONTH = datetime.date(2024, 1, 1)
+ARCHIVES = ("payment_2024_01", "payment_user_2024_01")
+PAYMENT = PaymentSchema(
+    card_number="1234", first_name="JOHN", last_name="DOE", amount=7
+)
+
+postgres_only = pytest.mark.skipif(
+    not (TEST_DATABASE_URL or "").startswith("postgresql"),
+    reason="TEST_DATABASE_URL is not a Postgres database",
+)
+
+
+def test_plan_creates_the_months_ahead():
+    create, detach = db_partitions.plan_partitions(
+        [datetime.date(2024, 11, 1)], TODAY, 2
+    )
+    assert create == [datetime.date(2024, 12, 1), datetime.date(2025, 1, 1)]
+    assert detach == []
+
+
+def test_plan_detaches_the_months_out_of_retention():
+    existing = [datetime.date(2024, month, 1) for month in range(1, 13)]
+    _, detach = db_partitions.plan_partitions(existing, TODAY, 1, retention_months=9)
+    # March to November are kept
+    assert detach == [datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)]
+
+
+def test_partition_names():
+    assert db_partitions.partition_name(OLD_MONTH) == "payment_2024_01"
+    assert db_partitions.partition_month("payment_2024_01") == OLD_MONTH
+    assert db_partitions.partition_month("payment_default") is None
+
+
+@pytest.mark.asyncio
+async def test_maintenance_is_a_no_op_on_sqlite():
+    db = DB("sqlite+aiosqlite://")
+    await db.setup_database()
+    assert await db.maintain_partitions(retention_months=1) == ([], [])
+    await db.dispose()
+
+
+async def _drop(db: DB) -> None:
+    # a detached partition is a table of its own, which still uses the enum
+    async with db.engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {', '.join(ARCHIVES)} CASCADE"))
+    await db.drop_database()
+
+
+@pytest_asyncio.fixture
+async def db():
+    db = DB(TEST_DATABASE_URL)
+    await _drop(db)
+    await db.setup_database()
+    yield db
+    await _drop(db)
+    await db.dispose()
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+async def _partitions(db: DB) -> list[str]:
+    async with db.engine.connect() as conn:
+        return sorted(
+            (
+                await conn.execute(db_partitions._PARTITIONS, {"parent": "payment"})
+            ).scalars()
+        )
+
+
+async def _create_old_payment(db: DB, amount: int) -> uuid.UUID:
+    payment_id = uuid.uuid4()
+    async with db.engine.begin() as conn:
+        await conn.execute(
+            insert(PaymentModel).values(
+                payment_id=payment_id,
+                card_number="1234",
+                first_name="JOHN",
+                last_name="DOE",
+                amount=amount,
+                status="Создан",
+                creation_time=datetime.datetime(
+                    2024, 1, 10, tzinfo=datetime.timezone.utc
+                ),
+            )
+        )
+    assert await DBPaymentUserRepository(db.session).create(EMAIL, payment_id)
+    return payment_id
+
+
+@postgres_only
+@pytest.mark.asyncio
+async def test_create_all_creates_the_current_and_next_months(db):
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    months = [
+        db_partitions.add_months(db_partitions.month_start(today), i) for i in range(4)
+    ]
+    assert await _partitions(db) == sorted(
+        ["payment_default", *map(db_partitions.partition_name, months)]
+    )
+
+    # nothing left to do
+    assert await db.maintain_partitions(months_ahead=3) == ([], [])
+
+
+@postgres_only
+@pytest.mark.asyncio
+async def test_next_pages_skip_the_months_before_the_cursor(db):
+    await db.maintain_partitions(months_ahead=0, today=OLD_MONTH)
+    await _create_old_payment(db, 5)
+    for _ in range(2):
+        await DBPaymentUnitOfWork(db.session).create_payment(EMAIL, PAYMENT)
+
+    payments = DBPaymentRepository(db.session)
+    first, cursor = await payments.get_page(limit=2)
+    assert first[0].creation_time.month == 1
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        rest, _ = await payments.get_page(limit=2, cursor=cursor)
+    finally:
+        event.remove(db.engine.sync_engine, "before_cursor_execute", capture)
+    assert len(rest) == 1
+
+    (statement, parameters), *_ = statements
+    async with db.engine.connect() as conn:
+        res = await conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        plan = res.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scanned = {n.get("Relation Name") for n in _walk_plan(plan[0]["Plan"])}
+    assert "payment_2024_01" not in scanned
+    assert (
+        db_partitions.partition_name(
+            datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+        )
+        in scanned
+    )
+
+
+@postgres_only
+@pytest.mark.asyncio
+async def test_detached_months_leave_the_summaries(db):
+    await db.maintain_partitions(months_ahead=0, today=OLD_MONTH)
+    await _create_old_payment(db, 5)
+    await DBPaymentUnitOfWork(db.session).create_payment(EMAIL, PAYMENT)
+
+    created, detached = await db.maintain_partitions(retention_months=3)
+    assert created == []
+    assert detached == ["payment_2024_01"]
+    assert "payment_2024_01" not in await _partitions(db)
+
+    summary = await DBPaymentSummaryRepository(db.session).get(EMAIL)
+    assert (summary.created_count, summary.created_amount) == (1, Decimal(7))
+    items, _ = await DBPaymentRepository(db.session).get_by_user(EMAIL)
+    assert [item.amount for item in items] == [Decimal(7)]
+
+    # both halves of the month are kept aside
+    async with db.engine.connect() as conn:
+        for table in ARCHIVES:
+            count = await conn.execute(text(f"SELECT count(*) FROM {table}"))
+            assert count.scalar_one() == 1
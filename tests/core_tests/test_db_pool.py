@@ -0,0 +1,51 @@
+import pytest
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.db.db_pool import InstrumentedAsyncPool
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkouts():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", poolclass=InstrumentedAsyncPool, pool_size=2
+    )
+    try:
+        for _ in range(3):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        stats = engine.pool.stats()
+        assert stats["size"] == 2
+        assert stats["acquired"] == 3
+        assert stats["timeouts"] == 0
+        assert stats["checked_out"] == 0
+        assert stats["waiting"] == 0
+        assert stats["acquire_time_max"] >= stats["acquire_time_avg"] > 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_timeouts():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+            stats = engine.pool.stats()
+            assert stats["checked_out"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["acquired"] == 1
+            assert stats["waiting"] == 0
+    finally:
+        await engine.dispose()
@@ -0,0 +1,152 @@
+import pytest
+
+from sqlalchemy import text
+
+from app.core.db.db_init import DB
+from app.core.db.db_migrations import SchemaRevisionError, head_revisions
+from app.core.db.db_request_scope import request_scope
+from app.core.db.operations.db_auth_opers import DBAuthRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.models.auth_model import AuthModel
+from app.schemas.payment_schema import PaymentSchema, PaymentSearchSchema
+
+
+EMAIL = "john@example.com"
+PAYMENT = PaymentSchema(
+    card_number="1234", first_name="JOHN", last_name="DOE", amount=5
+)
+
+
+async def _create_payment(db: DB):
+    return await DBPaymentUnitOfWork(db.session, db.read_session).create_payment(
+        EMAIL, PAYMENT
+    )
+
+
+async def _export(payments: DBPaymentRepository) -> list:
+    return [row async for batch in payments.stream_with_users(10) for row in batch]
+
+
+def test_without_a_replica_reads_use_the_primary():
+    db = DB("sqlite+aiosqlite://")
+    assert db.read_session is db.session
+    assert db.engines == (db.engine,)
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica(replicated_db):
+    payment_id = await _create_payment(replicated_db)
+
+    payments = DBPaymentRepository(replicated_db.session, replicated_db.read_session)
+    assert await payments.get(payment_id) is None
+    assert await payments.search(EMAIL, PaymentSearchSchema()) == ([], None)
+    assert await _export(payments) == []
+
+    primary_only = DBPaymentRepository(replicated_db.session)
+    assert (await primary_only.get(payment_id)).payment_id == payment_id
+
+
+@pytest.mark.asyncio
+async def test_cached_users_come_from_the_primary(replicated_db):
+    def user(password_hash: str) -> AuthModel:
+        return AuthModel(
+            first_name="JOHN",
+            last_name="DOE",
+            user_email=EMAIL,
+            user_password_hash=password_hash,
+        )
+
+    # the replica still has the user as it was before the password change
+    async with replicated_db.read_session() as session:
+        session.add(user("old"))
+        await session.commit()
+    async with replicated_db.session() as session:
+        session.add(user("old"))
+        await session.commit()
+
+    users = DBAuthRepository(
+        replicated_db.session, read_session=replicated_db.read_session
+    )
+    assert (await users.get(EMAIL)).user_password_hash == "old"
+
+    await users.update(EMAIL, "new")
+    assert (await users.get(EMAIL)).user_password_hash == "new"
+    # and from the cache as well
+    assert (await users.get(EMAIL)).user_password_hash == "new"
+
+    await users.delete(EMAIL)
+    assert await users.get(EMAIL) is None
+
+
+@pytest.mark.asyncio
+async def test_loading_a_user_does_not_pin_the_request_to_the_primary(
+    replicated_db,
+):
+    payment_id = await _create_payment(replicated_db)
+    users = DBAuthRepository(
+        replicated_db.session, read_session=replicated_db.read_session
+    )
+    payments = DBPaymentRepository(replicated_db.session, replicated_db.read_session)
+    async with replicated_db.session() as session:
+        session.add(
+            AuthModel(
+                first_name="JOHN",
+                last_name="DOE",
+                user_email=EMAIL,
+                user_password_hash="hash",
+            )
+        )
+        await session.commit()
+
+    async with request_scope(
+        replicated_db.session, replicated_db.read_session
+    ) as scope:
+        # a cache miss, read from the primary
+        assert (await users.get(EMAIL)).user_password_hash == "hash"
+        assert not scope.wrote
+
+        # the request's reads still go to the replica
+        assert await payments.get(payment_id) is None
+
+
+@pytest.mark.asyncio
+async def test_request_reads_its_own_writes(replicated_db):
+    payment_id = await _create_payment(replicated_db)
+    payments = DBPaymentRepository(replicated_db.session, replicated_db.read_session)
+
+    async with request_scope(
+        replicated_db.session, replicated_db.read_session
+    ) as scope:
+        assert await payments.get(payment_id) is None
+        assert not scope.wrote
+
+        paid = await payments.update_if_created(payment_id, "Оплачен")
+        assert paid.status == "Оплачен"
+        assert scope.wrote
+
+        # pinned to the primary for the rest of the request
+        assert (await payments.get(payment_id)).status == "Оплачен"
+        assert len(await _export(payments)) == 1
+
+    async with request_scope(replicated_db.session, replicated_db.read_session):
+        assert await payments.get(payment_id) is None
+
+
+@pytest.mark.asyncio
+async def test_verify_revision_checks_the_replica(replicated_db):
+    (head,) = head_revisions()
+    for engine, revision in zip(replicated_db.engines, (head, "bd4626ca907d")):
+        async with engine.begin() as conn:
+            # not part of the models, so not dropped by the fixture
+            await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+            await conn.execute(
+                text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+            )
+            await conn.execute(
+                text("INSERT INTO alembic_version VALUES (:revision)"),
+                {"revision": revision},
+            )
+
+    with pytest.raises(SchemaRevisionError, match="Replica database .*bd4626ca907d"):
+        await replicated_db.verify_revision()
@@ -0,0 +1,172 @@
+import pytest
+import pytest_asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.db.db_pool import InstrumentedAsyncPool
+from app.core.db.db_request_scope import current_scope, request_scope
+from app.core.db.operations.db_operations import DBRepository, connection
+from app.core.session_middleware import RequestSessionMiddleware
+
+
+class NotesRepository(DBRepository):
+    @connection
+    async def create(self, body: str, *, session: AsyncSession) -> None:
+        await session.execute(
+            text("INSERT INTO notes (body) VALUES (:body)"), {"body": body}
+        )
+        await session.commit()
+
+    @connection
+    async def create_uncommitted(self, body: str, *, session: AsyncSession) -> None:
+        await session.execute(
+            text("INSERT INTO notes (body) VALUES (:body)"), {"body": body}
+        )
+
+    @connection
+    async def count(self, *, session: AsyncSession) -> int:
+        res = await session.execute(text("SELECT count(*) FROM notes"))
+        return res.scalar_one()
+
+    @connection
+    async def current_session(self, *, session: AsyncSession) -> AsyncSession:
+        return session
+
+    async def stream(self):
+        async with self.streaming_session() as session:
+            res = await session.stream(text("SELECT body FROM notes"))
+            async for body in res.scalars():
+                yield body
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'notes.db'}",
+        poolclass=InstrumentedAsyncPool,
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE notes (body TEXT)"))
+    yield engine
+    await engine.dispose()
+
+
+def checkouts(engine) -> int:
+    return engine.pool.stats()["acquired"]
+
+
+@pytest.mark.asyncio
+async def test_standalone_calls_use_their_own_sessions(engine):
+    repo = NotesRepository(async_sessionmaker(engine, expire_on_commit=False))
+    before = checkouts(engine)
+
+    await repo.create("a")
+    await repo.count()
+    assert await repo.current_session() is not await repo.current_session()
+
+    assert checkouts(engine) - before == 2
+    assert current_scope() is None
+
+
+@pytest.mark.asyncio
+async def test_scope_shares_one_connection(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    repo = NotesRepository(session_factory)
+    before = checkouts(engine)
+
+    async with request_scope(session_factory):
+        await repo.create("a")
+        await repo.create("b")
+        assert await repo.count() == 2
+        assert await repo.current_session() is await repo.current_session()
+        assert engine.pool.stats()["checked_out"] == 1
+
+    assert checkouts(engine) - before == 1
+    assert engine.pool.stats()["checked_out"] == 0
+    assert await repo.count() == 2
+
+
+@pytest.mark.asyncio
+async def test_scope_rolls_back_uncommitted_work(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    repo = NotesRepository(session_factory)
+
+    async with request_scope(session_factory):
+        await repo.create("kept")
+        await repo.create_uncommitted("dropped")
+        assert await repo.count() == 2
+
+    assert await repo.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_scope_ignores_other_session_factories(engine):
+    repo = NotesRepository(async_sessionmaker(engine, expire_on_commit=False))
+    before = checkouts(engine)
+
+    async with request_scope(async_sessionmaker(engine)) as scope:
+        await repo.count()
+        await repo.count()
+        assert scope._session is None
+
+    assert checkouts(engine) - before == 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_checks_out_once_per_request(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    repo = NotesRepository(session_factory)
+
+    app = FastAPI()
+    app.add_middleware(RequestSessionMiddleware, session_factory=session_factory)
+
+    @app.post("/notes")
+    async def create_note():
+        await repo.create("a")
+        await repo.create("b")
+        return {"count": await repo.count()}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    before = checkouts(engine)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post("/notes")
+        await ac.get("/ping")
+
+    assert res.json() == {"count": 2}
+    assert checkouts(engine) - before == 1
+    assert engine.pool.stats()["checked_out"] == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_uses_the_request_connection(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    repo = NotesRepository(session_factory)
+    await repo.create("a")
+    await repo.create("b")
+
+    app = FastAPI()
+    app.add_middleware(RequestSessionMiddleware, session_factory=session_factory)
+
+    @app.get("/notes")
+    async def export_notes():
+        assert await repo.count() == 2
+        return StreamingResponse(f"{body}\n" async for body in repo.stream())
+
+    before = checkouts(engine)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.get("/notes")
+
+    assert res.text == "a\nb\n"
+    assert checkouts(engine) - before == 1
+    assert engine.pool.stats()["checked_out"] == 0
+    # outside a request the stream opens a session of its own
+    assert [body async for body in repo.stream()] == ["a", "b"]
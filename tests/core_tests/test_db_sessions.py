@@ -2,47 +2,52 @@ import importlib
 import sys
 from types import ModuleType
 from unittest.mock import MagicMock
-import pytest
 
+import app.core.db
+
+REPOSITORIES = {
+    "db_auth": ("db_auth_opers", "DBAuthRepository"),
+    "db_payment": ("db_payment_opers", "DBPaymentRepository"),
+    "db_payment_user": ("db_paym_user_opers", "DBPaymentUserRepository"),
+    "db_payment_uow": ("db_unit_of_work", "DBPaymentUnitOfWork"),
+    "db_payment_summary": ("db_paym_summary_opers", "DBPaymentSummaryRepository"),
+    "db_idempotency": ("db_idempotency_opers", "DBIdempotencyRepository"),
+}
 
-def test_db_sessions_initializes_repositories(monkeypatch):
-    cfg_mod = ModuleType("app.utils.config")
-    cfg_mod.settings = MagicMock(DB_NAME="the_db")
-    sys.modules["app.utils.config"] = cfg_mod
 
+def test_db_sessions_initializes_repositories(monkeypatch):
     db_init_mod = ModuleType("app.core.db.db_init")
 
     class FakeDB:
-        def __init__(self, db_name):
+        def __init__(self, url=None, replica_url=None):
             self.session = "SESSION_OBJ"
-            self.db_name = db_name
+            self.read_session = "READ_SESSION_OBJ"
+            self.url = url
 
     db_init_mod.DB = FakeDB
-    sys.modules["app.core.db.db_init"] = db_init_mod
-
-    auth_mod = ModuleType("app.core.db.operations.db_auth_opers")
-    payment_mod = ModuleType("app.core.db.operations.db_payment_opers")
-    paym_user_mod = ModuleType("app.core.db.operations.db_paym_user_opers")
+    monkeypatch.setitem(sys.modules, "app.core.db.db_init", db_init_mod)
 
-    fake_auth_repo = MagicMock()
-    fake_payment_repo = MagicMock()
-    fake_payment_user_repo = MagicMock()
+    fake_repos = {}
+    for name, (module, cls) in REPOSITORIES.items():
+        repo_mod = ModuleType(f"app.core.db.operations.{module}")
+        fake_repos[name] = MagicMock()
+        setattr(repo_mod, cls, MagicMock(return_value=fake_repos[name]))
+        monkeypatch.setitem(sys.modules, repo_mod.__name__, repo_mod)
 
-    auth_mod.DBAuthRepository = lambda session: fake_auth_repo
-    payment_mod.DBPaymentRepository = lambda session: fake_payment_repo
-    paym_user_mod.DBPaymentUserRepository = lambda session: fake_payment_user_repo
-
-    sys.modules["app.core.db.operations.db_auth_opers"] = auth_mod
-    sys.modules["app.core.db.operations.db_payment_opers"] = payment_mod
-    sys.modules["app.core.db.operations.db_paym_user_opers"] = paym_user_mod
-
-    sys.modules.pop("app.core.db.db_sessions", None)
+    # the real module (and the package attribute pointing at it) come back
+    # after the test
+    monkeypatch.delitem(sys.modules, "app.core.db.db_sessions", raising=False)
+    monkeypatch.setattr(app.core.db, "db_sessions", None, raising=False)
 
     mod = importlib.import_module("app.core.db.db_sessions")
 
     assert isinstance(mod.db, FakeDB)
-    assert mod.db.db_name == "the_db"
-
-    assert mod.db_auth is fake_auth_repo
-    assert mod.db_payment is fake_payment_repo
-    assert mod.db_payment_user is fake_payment_user_repo
+    # no URL given: DB takes DATABASE_URL / DATABASE_REPLICA_URL itself
+    assert mod.db.url is None
+
+    for name, (module, cls) in REPOSITORIES.items():
+        assert getattr(mod, name) is fake_repos[name]
+        repo_cls = getattr(sys.modules[f"app.core.db.operations.{module}"], cls)
+        args = repo_cls.call_args
+        assert args.args[0] == "SESSION_OBJ"
+        assert "READ_SESSION_OBJ" in (*args.args[1:], *args.kwargs.values())
@@ -0,0 +1,54 @@
+import asyncio
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core import events
+
+
+@pytest.mark.asyncio
+async def test_shutdown_lets_a_running_maintenance_finish():
+    started, finished = asyncio.Event(), asyncio.Event()
+
+    async def maintain_partitions(**options):
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.set()
+        return [], []
+
+    db = MagicMock()
+    db.maintain_partitions = maintain_partitions
+    db.dispose = AsyncMock()
+    with patch.object(events, "db", db), patch.object(events, "hash_service"):
+        events._stopping.clear()
+        task = asyncio.create_task(events.maintain_payment_partitions(0.01))
+        events.background_tasks.add(task)
+        await asyncio.wait_for(started.wait(), 5)
+
+        await events.on_shutdown()
+
+    # not cancelled half way through: its connection went back to the pool
+    assert finished.is_set()
+    assert task.done() and not task.cancelled()
+    db.dispose.assert_awaited_once()
+    assert events.background_tasks == set()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_waits_an_interval_before_its_first_run():
+    db = MagicMock()
+    db.maintain_partitions = AsyncMock(return_value=([], []))
+    db.dispose = AsyncMock()
+    with patch.object(events, "db", db), patch.object(events, "hash_service"):
+        events._stopping.clear()
+        task = asyncio.create_task(events.maintain_payment_partitions(3600))
+        events.background_tasks.add(task)
+        await asyncio.sleep(0.05)
+
+        # a restarted worker takes no lock and runs no DDL
+        db.maintain_partitions.assert_not_awaited()
+        await events.on_shutdown()
+
+    assert task.done() and not task.cancelled()
+    db.maintain_partitions.assert_not_awaited()
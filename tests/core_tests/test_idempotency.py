@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from sqlalchemy import func, select
+
+from app.core.db.operations.db_idempotency_opers import DBIdempotencyRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.models.payment_model import PaymentModel
+from app.schemas.payment_schema import PaymentSchema
+from app.utils.cache import TTLCache
+
+
+EMAIL = "john@example.com"
+PAYMENT = PaymentSchema(
+    card_number="1234", first_name="JOHN", last_name="DOE", amount=5
+)
+
+
+async def _payments(session_factory) -> int:
+    async with session_factory() as session:
+        return (
+            await session.execute(select(func.count(PaymentModel.payment_id)))
+        ).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_retry_returns_the_first_payment(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+
+    first, created = await uow.create_payment_once(EMAIL, PAYMENT, "k1", "h", 60)
+    assert created
+    retry, created = await uow.create_payment_once(EMAIL, PAYMENT, "k1", "h", 60)
+    assert not created
+    other_user, created = await uow.create_payment_once(
+        "jane@example.com", PAYMENT, "k1", "h", 60
+    )
+    assert created
+
+    assert retry.payment_id == first.payment_id
+    assert other_user.payment_id != first.payment_id
+    assert await _payments(session_factory) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_create_one_payment(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+
+    results = await asyncio.gather(
+        *(uow.create_payment_once(EMAIL, PAYMENT, "k1", "h", 60) for _ in range(10))
+    )
+
+    assert sum(created for _, created in results) == 1
+    assert len({record.payment_id for record, _ in results}) == 1
+    assert await _payments(session_factory) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_key_is_claimed_again(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+    keys = DBIdempotencyRepository(session_factory, cache=TTLCache(0, 0))
+
+    first, _ = await uow.create_payment_once(EMAIL, PAYMENT, "k1", "h", -1)
+    assert await keys.get(EMAIL, "k1") is None
+
+    second, created = await uow.create_payment_once(EMAIL, PAYMENT, "k1", "h", 60)
+    assert created
+    assert second.payment_id != first.payment_id
+    assert (await keys.get(EMAIL, "k1")).payment_id == second.payment_id
+
+
+@pytest.mark.asyncio
+async def test_delete_expired_keeps_live_keys(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+    keys = DBIdempotencyRepository(session_factory, cache=TTLCache(0, 0))
+
+    await uow.create_payment_once(EMAIL, PAYMENT, "expired", "h", -1)
+    await uow.create_payment_once(EMAIL, PAYMENT, "live", "h", 60)
+
+    assert await keys.delete_expired() == 1
+    assert await keys.get(EMAIL, "live") is not None
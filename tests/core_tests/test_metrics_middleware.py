@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.db.db_metrics import instrument_engine
+from app.core.metrics_middleware import init_metrics_middleware
+from app.routers.metrics_router import router as metrics_router
+from app.utils.metrics import (
+    db_statement_duration_seconds,
+    db_statement_errors_total,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(metrics_router)
+    init_metrics_middleware(app)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"item_id": item_id}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    before_ok = http_requests_total.value("GET", "/items/{item_id}", "200")
+    before_missing = http_requests_total.value("GET", "/items/{item_id}", "404")
+    before_count = http_request_duration_seconds.count("GET", "/items/{item_id}")
+
+    transport = ASGITransport(app=make_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.get("/items/1")
+        await ac.get("/items/2")
+        await ac.get("/items/0")
+        await ac.get("/nowhere")
+
+        res = await ac.get("/metrics")
+
+    assert http_requests_total.value("GET", "/items/{item_id}", "200") == before_ok + 2
+    assert (
+        http_requests_total.value("GET", "/items/{item_id}", "404")
+        == before_missing + 1
+    )
+    assert (
+        http_request_duration_seconds.count("GET", "/items/{item_id}")
+        == before_count + 3
+    )
+    assert http_requests_total.value("GET", "<unmatched>", "404") >= 1
+    assert http_requests_in_flight.value("GET") == 0
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in res.text
+    assert (
+        f'http_requests_in_flight{{worker="{os.getpid()}",method="GET"}} 1.0'
+        in res.text
+    )
+    assert 'route="/items/{item_id}"' in res.text
+
+
+@pytest.mark.asyncio
+async def test_engine_statement_timings():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    instrument_engine(engine.sync_engine)
+
+    before_selects = db_statement_duration_seconds.count("SELECT")
+    before_errors = db_statement_errors_total.value("SELECT")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+    finally:
+        await engine.dispose()
+
+    assert db_statement_duration_seconds.count("SELECT") == before_selects + 2
+    assert db_statement_errors_total.value("SELECT") == before_errors + 1
@@ -0,0 +1,146 @@
+import datetime
+import uuid
+
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from sqlalchemy import insert
+
+from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository, _search_page
+from app.core.db.operations.pagination import InvalidCursorError, encode_cursor
+from app.models.payment_model import PaymentModel
+from app.schemas.payment_schema import PaymentSearchSchema
+
+
+EMAIL = "john@example.com"
+OTHER = "jane@example.com"
+NOW = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+# (owner, status, amount, first name, last name, minutes ago)
+PAYMENTS = [
+    (EMAIL, "Создан", "10.000", "JOHN", "DOE", 1),
+    (EMAIL, "Оплачен", "25.500", "JOHN", "DOE", 2),
+    (EMAIL, "Отменен", "7.000", "JANE", "DOE", 3),
+    (EMAIL, "Оплачен", "100.000", "JOHN", "SMITH", 4),
+    (EMAIL, "Создан", "25.500", "JOHNNY", "DOE", 5),
+    (EMAIL, "Оплачен", "3.250", "JOHN", "DOE-BROWN", 6),
+    (OTHER, "Оплачен", "25.500", "JOHN", "DOE", 2),
+    (OTHER, "Создан", "10.000", "JOHN", "DOE", 7),
+]
+
+
+@pytest_asyncio.fixture
+async def payments(session_factory):
+    rows = []
+    for owner, status, amount, first_name, last_name, minutes in PAYMENTS:
+        row = {
+            "payment_id": uuid.uuid4(),
+            "card_number": "1234",
+            "first_name": first_name,
+            "last_name": last_name,
+            "amount": Decimal(amount),
+            "status": status,
+            "creation_time": NOW - datetime.timedelta(minutes=minutes),
+        }
+        async with session_factory() as session:
+            await session.execute(insert(PaymentModel).values(**row))
+            await session.commit()
+        assert await DBPaymentUserRepository(session_factory).create(
+            owner, row["payment_id"]
+        )
+        rows.append((owner, row))
+    return [row for owner, row in rows if owner == EMAIL]
+
+
+def _expected(rows, search: PaymentSearchSchema):
+    def matches(row):
+        return (
+            (search.status is None or row["status"] in search.status)
+            and (search.amount_min is None or row["amount"] >= search.amount_min)
+            and (search.amount_max is None or row["amount"] <= search.amount_max)
+            and (
+                search.created_from is None
+                or row["creation_time"] >= search.created_from
+            )
+            and (search.created_to is None or row["creation_time"] < search.created_to)
+            and (
+                search.name is None
+                or f"{row['first_name']} {row['last_name']}".startswith(search.name)
+            )
+        )
+
+    keys = ("creation_time", "payment_id")
+    if search.sort.lstrip("-") == "amount":
+        keys = ("amount", *keys)
+    found = sorted(
+        filter(matches, rows),
+        key=lambda row: tuple(row[k] for k in keys),
+        reverse=search.sort.startswith("-"),
+    )
+    return [row["payment_id"] for row in found]
+
+
+async def _search_all(repo, search: PaymentSearchSchema, limit: int):
+    found, cursor = [], None
+    while True:
+        items, cursor = await repo.search(EMAIL, search, limit, cursor)
+        found += [item.payment_id for item in items]
+        if cursor is None:
+            return found
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"status": ["Оплачен"]},
+        {"status": ["Создан", "Отменен"], "sort": "amount"},
+        {"amount_min": "10", "amount_max": "25.5"},
+        {"amount_min": "25.5", "status": ["Создан", "Оплачен"], "sort": "-amount"},
+        {"name": "JOHN D", "sort": "creation_time"},
+        {"name": "john", "amount_max": "50"},
+        {"created_from": NOW - datetime.timedelta(minutes=4, seconds=30)},
+        {
+            "created_from": NOW - datetime.timedelta(minutes=5),
+            "created_to": NOW - datetime.timedelta(minutes=2),
+            "status": ["Оплачен", "Отменен"],
+        },
+        {"status": ["Отменен"], "amount_min": "50"},
+    ],
+)
+async def test_search_matches_every_filter(session_factory, payments, filters):
+    search = PaymentSearchSchema(**filters)
+    repo = DBPaymentRepository(session_factory)
+
+    # a page size that splits most results over several pages
+    assert await _search_all(repo, search, 2) == _expected(payments, search)
+
+
+@pytest.mark.asyncio
+async def test_search_statements_are_built_once_per_combination(
+    session_factory, payments
+):
+    repo = DBPaymentRepository(session_factory)
+    search = PaymentSearchSchema(status=["Оплачен"], sort="amount")
+
+    items, cursor = await repo.search(EMAIL, search, 2)
+    assert [item.amount for item in items] == [Decimal("3.25"), Decimal("25.5")]
+    assert cursor is not None
+    # the same combination of filters, other values: the same statements
+    page = _search_page(frozenset({"status"}), "amount")
+    assert _search_page(frozenset({"status"}), "amount") is page
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_cursor_of_another_sort(session_factory):
+    repo = DBPaymentRepository(session_factory)
+    by_amount = PaymentSearchSchema(sort="amount")
+
+    with pytest.raises(InvalidCursorError):
+        await repo.search(EMAIL, by_amount, 2, encode_cursor(NOW, uuid.uuid4()))
+    with pytest.raises(InvalidCursorError):
+        await repo.search(EMAIL, by_amount, 2, encode_cursor("lots", NOW, uuid.uuid4()))
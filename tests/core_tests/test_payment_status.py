@@ -0,0 +1,71 @@
+import asyncio
+
+from decimal import Decimal
+
+import pytest
+
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.schemas.payment_schema import PaymentSchema
+
+
+EMAIL = "john@example.com"
+PAYMENT = PaymentSchema(
+    card_number="1234", first_name="JOHN", last_name="DOE", amount=5
+)
+
+
+@pytest.mark.asyncio
+async def test_only_created_payments_change_status(session_factory):
+    payments = DBPaymentRepository(session_factory)
+    payment_id = await DBPaymentUnitOfWork(session_factory).create_payment(
+        EMAIL, PAYMENT
+    )
+
+    same = await payments.update_if_created(payment_id, "Создан")
+    assert same.status == "Создан"
+
+    paid = await payments.update_if_created(payment_id, "Оплачен")
+    assert paid.payment_id == payment_id
+    assert paid.status == "Оплачен"
+
+    assert await payments.update_if_created(payment_id, "Отменен") is None
+    assert (await payments.get(payment_id)).status == "Оплачен"
+
+    summary = await DBPaymentSummaryRepository(session_factory).get(EMAIL)
+    assert (summary.created_count, summary.created_amount) == (0, Decimal(0))
+    assert (summary.paid_count, summary.paid_amount) == (1, Decimal(5))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_transitions_apply_once(session_factory):
+    payments = DBPaymentRepository(session_factory)
+    payment_id = await DBPaymentUnitOfWork(session_factory).create_payment(
+        EMAIL, PAYMENT
+    )
+
+    results = await asyncio.gather(
+        *(
+            payments.update_if_created(payment_id, status)
+            for status in ("Оплачен", "Отменен") * 5
+        )
+    )
+
+    winners = [res for res in results if res is not None]
+    assert len(winners) == 1
+    assert (await payments.get(payment_id)).status == winners[0].status
+
+    summary = await DBPaymentSummaryRepository(session_factory).get(EMAIL)
+    assert summary.created_count == 0
+    assert summary.paid_count + summary.cancelled_count == 1
+    assert summary.paid_amount + summary.cancelled_amount == Decimal(5)
+
+
+@pytest.mark.asyncio
+async def test_missing_payment_is_not_updated(session_factory):
+    payments = DBPaymentRepository(session_factory)
+    payment = await payments.create(PAYMENT)
+    await payments.delete(payment.payment_id)
+
+    assert await payments.update_if_created(payment.payment_id, "Оплачен") is None
@@ -0,0 +1,119 @@
+import asyncio
+
+from decimal import Decimal
+
+import pytest
+
+from sqlalchemy import func, select
+
+from app.core.db.operations.db_paym_summary_opers import DBPaymentSummaryRepository
+from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.core.db.operations.db_unit_of_work import DBPaymentUnitOfWork
+from app.models.payment_model import PaymentModel
+from app.models.payment_user_model import PaymentUserModel
+from app.schemas.payment_schema import PaymentSchema, PaymentSummaryOut
+
+
+EMAIL = "john@example.com"
+
+
+def _payment(amount: str) -> PaymentSchema:
+    return PaymentSchema(
+        card_number="1234", first_name="JOHN", last_name="DOE", amount=amount
+    )
+
+
+async def _summary(session_factory) -> dict:
+    summary = await DBPaymentSummaryRepository(session_factory).get(EMAIL)
+    out = PaymentSummaryOut.from_summary(EMAIL, summary)
+    return {
+        status: (total.count, total.amount) for status, total in out.statuses.items()
+    }
+
+
+async def _recomputed(session_factory) -> dict:
+    totals = {status: (0, Decimal(0)) for status in ("Создан", "Оплачен", "Отменен")}
+    query = (
+        select(PaymentModel.status, func.count(), func.sum(PaymentModel.amount))
+        .join(PaymentUserModel)
+        .filter(PaymentUserModel.user_email == EMAIL)
+        .group_by(PaymentModel.status)
+    )
+    async with session_factory() as session:
+        for status, count, amount in await session.execute(query):
+            totals[status] = (count, amount)
+    return totals
+
+
+@pytest.mark.asyncio
+async def test_summary_follows_every_write(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+    payments = DBPaymentRepository(session_factory)
+    payment_users = DBPaymentUserRepository(session_factory)
+
+    first = await uow.create_payment(EMAIL, _payment("10.500"))
+    batch = await uow.create_payments(
+        EMAIL, [_payment("1"), _payment("2"), _payment("3")], 2
+    )
+    assert await _summary(session_factory) == {
+        "Создан": (4, Decimal("16.500")),
+        "Оплачен": (0, Decimal(0)),
+        "Отменен": (0, Decimal(0)),
+    }
+
+    await payments.update(first, "Оплачен")
+    await payments.update(batch[0], "Отменен")
+    await payments.delete(batch[1])
+    assert await _summary(session_factory) == {
+        "Создан": (1, Decimal("3.000")),
+        "Оплачен": (1, Decimal("10.500")),
+        "Отменен": (1, Decimal("1.000")),
+    }
+
+    await payment_users.delete(batch[2])
+    await payment_users.create(EMAIL, batch[2])
+    assert await _summary(session_factory) == await _recomputed(session_factory)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_status_changes_keep_summary_exact(session_factory):
+    uow = DBPaymentUnitOfWork(session_factory)
+    payments = DBPaymentRepository(session_factory)
+    payment_ids = await uow.create_payments(
+        EMAIL, [_payment(str(i + 1)) for i in range(10)], 10
+    )
+
+    await asyncio.gather(
+        *(
+            payments.update(payment_id, status)
+            for payment_id in payment_ids
+            for status in ("Оплачен", "Отменен", "Создан")
+        )
+    )
+
+    assert await _summary(session_factory) == await _recomputed(session_factory)
+
+
+@pytest.mark.asyncio
+async def test_user_without_payments_gets_zeros(session_factory):
+    await DBPaymentUnitOfWork(session_factory).create_payment(
+        "other@example.com", _payment("5")
+    )
+
+    assert await _summary(session_factory) == {
+        "Создан": (0, Decimal(0)),
+        "Оплачен": (0, Decimal(0)),
+        "Отменен": (0, Decimal(0)),
+    }
+
+
+@pytest.mark.asyncio
+async def test_payments_without_owner_are_not_counted(session_factory):
+    payments = DBPaymentRepository(session_factory)
+    payment = await payments.create(_payment("5"))
+
+    await payments.update(payment.payment_id, "Оплачен")
+    await payments.delete(payment.payment_id)
+
+    assert await DBPaymentSummaryRepository(session_factory).get(EMAIL) is None
@@ -0,0 +1,168 @@
+import datetime
+import json
+import os
+import uuid
+
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.db.operations.db_auth_opers import DBAuthRepository
+from app.core.db.operations.db_paym_user_opers import DBPaymentUserRepository
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.models.auth_model import AuthModel
+from app.models.init_model import Base
+from app.models.payment_model import PaymentModel
+from app.models.payment_user_model import PaymentUserModel
+from app.schemas.payment_schema import PaymentSearchSchema
+
+
+# Runs only against a scratch Postgres database, e.g.
+# TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/payment_test
+# The schema is dropped and recreated, so never point it at real data.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+USERS = 2000
+PAYMENTS_PER_USER = 10
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+@pytest_asyncio.fixture
+async def seeded_engine():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        await conn.execute(
+            insert(AuthModel),
+            [
+                {
+                    "first_name": "JOHN",
+                    "last_name": "DOE",
+                    "user_email": f"user{i}@example.com",
+                    "user_password_hash": "hash",
+                }
+                for i in range(USERS)
+            ],
+        )
+        now = datetime.datetime.now(datetime.timezone.utc)
+        payments = [
+            {
+                "payment_id": uuid.uuid4(),
+                "creation_time": now - datetime.timedelta(seconds=j),
+                "card_number": "1234",
+                "first_name": "JOHN",
+                "last_name": "DOE",
+                "second_name": None,
+                "amount": Decimal(j),
+                "status": "Создан" if j % 2 else "Оплачен",
+            }
+            for j in range(USERS * PAYMENTS_PER_USER)
+        ]
+        await conn.execute(insert(PaymentModel), payments)
+        await conn.execute(
+            insert(PaymentUserModel),
+            [
+                {
+                    "user_email": f"user{j // PAYMENTS_PER_USER}@example.com",
+                    "payment_id": p["payment_id"],
+                    "creation_time": p["creation_time"],
+                }
+                for j, p in enumerate(payments)
+            ],
+        )
+
+        for table in Base.metadata.sorted_tables:
+            await conn.exec_driver_sql(f"ANALYZE {table.name}")
+
+    yield engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_do_not_seq_scan(seeded_engine):
+    session = async_sessionmaker(seeded_engine, expire_on_commit=False)
+    auth_repo = DBAuthRepository(session)
+    payment_repo = DBPaymentRepository(session)
+    payment_user_repo = DBPaymentUserRepository(session)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(seeded_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        email = "user420@example.com"
+        _, auth_cursor = await auth_repo.get_page(limit=10)
+        await auth_repo.get(email)
+        await auth_repo.get_page(limit=10, cursor=auth_cursor)
+
+        items, cursor = await payment_repo.get_by_user(email, limit=10)
+        await payment_repo.get_by_user(email, limit=10, cursor=cursor)
+        await payment_repo.get_by_user_and_status(email, "Создан", limit=10)
+        await payment_repo.get_by_user_and_amount(email, Decimal(5000), limit=10)
+        await payment_repo.get(items[0].payment_id)
+        search = PaymentSearchSchema(
+            status=["Создан"],
+            amount_min=10,
+            created_from=items[-1].creation_time,
+            name="JOHN",
+        )
+        _, search_cursor = await payment_repo.search(email, search, limit=2)
+        await payment_repo.search(email, search, limit=2, cursor=search_cursor)
+        await payment_repo.search(email, PaymentSearchSchema(sort="-amount"), limit=2)
+
+        _, page_cursor = await payment_repo.get_page(limit=10)
+        await payment_repo.get_page(limit=10, cursor=page_cursor)
+
+        await payment_user_repo.get(items[0].payment_id)
+        _, pu_cursor = await payment_user_repo.get_page(limit=10)
+        await payment_user_repo.get_page(limit=10, cursor=pu_cursor)
+    finally:
+        event.remove(seeded_engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements
+
+    async with seeded_engine.connect() as conn:
+        # the partitions of the next months and the default one: reading
+        # an empty table whole is the cheapest plan
+        empty = set(
+            (
+                await conn.exec_driver_sql(
+                    "SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples = 0"
+                )
+            ).scalars()
+        )
+        for statement, parameters in statements:
+            res = await conn.exec_driver_sql(
+                "EXPLAIN (FORMAT JSON) " + statement, parameters
+            )
+            plan = res.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            node_types = {
+                n["Node Type"]
+                for n in _walk_plan(plan[0]["Plan"])
+                if n.get("Relation Name") not in empty
+            }
+            assert "Seq Scan" not in node_types, statement
@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.responses import get_response_class
+
+
+def test_stdlib_json_by_default():
+    with patch("app.core.responses.settings") as mock_settings:
+        mock_settings.ORJSON_RESPONSES = False
+        assert get_response_class() is JSONResponse
+
+
+def test_orjson_when_enabled():
+    with patch("app.core.responses.settings") as mock_settings:
+        mock_settings.ORJSON_RESPONSES = True
+        assert get_response_class() is ORJSONResponse
+
+
+def test_falls_back_without_orjson():
+    with patch("app.core.responses.settings") as mock_settings, patch.dict(
+        "sys.modules", {"orjson": None}
+    ):
+        mock_settings.ORJSON_RESPONSES = True
+        assert get_response_class() is JSONResponse
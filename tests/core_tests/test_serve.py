@@ -0,0 +1,155 @@
+import importlib.util
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from app import serve
+from app.utils.config import settings
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start(tmp_path, port: int, **env: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", "2", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path / 'payments.db'}",
+            "APP_LOG_DIR": str(tmp_path),
+            **env,
+        },
+    )
+
+
+def _worker_log(tmp_path, event: str) -> set[str]:
+    """Pids of the workers that logged ``event``, each in its own file."""
+    pids = set()
+    for log in tmp_path.glob("app.*.log"):
+        found = set(
+            re.findall(rf"Worker (\d+) {event}", log.read_text(encoding="utf-8"))
+        )
+        assert found <= {log.name.split(".")[1]}
+        pids |= found
+    return pids
+
+
+def _wait_for(condition, timeout: float, message: str):
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result:
+            return result
+        assert time.monotonic() < deadline, message
+        time.sleep(0.1)
+
+
+def test_protocols_prefer_uvloop_and_httptools(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+    assert serve.protocols() == ("uvloop", "httptools")
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    assert serve.protocols() == ("asyncio", "h11")
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_WORKERS", 3)
+    assert serve.default_workers() == 3
+
+    monkeypatch.setattr(settings, "WEB_WORKERS", None)
+    assert serve.default_workers() >= 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "mode, maintained", [("create_all", True), ("verify_revision", False)]
+)
+async def test_prepare_database(monkeypatch, mode, maintained):
+    db = MagicMock(
+        setup_database=AsyncMock(),
+        maintain_partitions=AsyncMock(return_value=(["payment_2026_10"], [])),
+        dispose=AsyncMock(),
+    )
+    monkeypatch.setattr("app.core.db.db_sessions.db", db)
+    monkeypatch.setattr(settings, "DB_STARTUP_MODE", mode)
+
+    await serve.prepare_database()
+
+    assert db.setup_database.await_count == maintained
+    # once, in the parent: the workers' first run is an interval later
+    assert db.maintain_partitions.await_count == maintained
+    db.dispose.assert_awaited_once()
+
+
+def test_spawned_processes_do_not_start_the_app():
+    # what a process of the hash pool runs on start under app.serve
+    code = (
+        "import runpy, sys; "
+        "runpy.run_module('app.serve', run_name='__mp_main__', alter_sys=True); "
+        "print(sorted(m for m in sys.modules if m.startswith('app.')))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert "app.core.db.db_sessions" not in out
+    assert "app.utils.logger_config" not in out
+
+
+def test_workers_serve_and_stop_on_sigterm(tmp_path):
+    port = _free_port()
+    proc = _start(tmp_path, port)
+
+    def metrics():
+        try:
+            return httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=5)
+        except httpx.TransportError:
+            assert proc.poll() is None, "server exited"
+            return None
+
+    def both_started():
+        started = _worker_log(tmp_path, "starting")
+        return started if len(started) == 2 else None
+
+    try:
+        response = _wait_for(metrics, 60, "server did not start")
+        assert response.status_code == 200
+        # both workers are up, not just the one that answered
+        started = _wait_for(both_started, 60, "workers did not start")
+        # the metrics are those of the worker that answered
+        assert re.search(r'worker="(\d+)"', response.text)[1] in started
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=60) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    # logged by the workers themselves, through the listener restarted
+    # after the fork, each to a file of its own
+    assert _worker_log(tmp_path, "exited with 0") == started
+
+
+def test_server_stops_when_workers_fail_to_start(tmp_path):
+    # the sqlite database was never migrated
+    proc = _start(tmp_path, _free_port(), DB_STARTUP_MODE="verify_revision")
+    try:
+        assert proc.wait(timeout=60) == 1
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
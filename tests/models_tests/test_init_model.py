@@ -1,7 +1,6 @@
 import inspect
 
-from sqlalchemy import Integer, String, Numeric, DateTime, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Integer, String, Numeric, DateTime, Enum, Uuid
 
 from app.models.init_model import (
     int_pk,
@@ -76,7 +75,7 @@ def test_email_and_hash_annotations():
 
 def test_uuid_pk_and_decimal_and_timestamp_and_enum_types():
     ct = get_mapped_type(uuid_pk)
-    assert isinstance(ct, UUID)
+    assert isinstance(ct, Uuid)
 
     ct = get_mapped_type(dec)
     assert isinstance(ct, Numeric)
@@ -84,7 +83,8 @@ def test_uuid_pk_and_decimal_and_timestamp_and_enum_types():
     assert ct.scale == 3
 
     ct = get_mapped_type(timestamp)
-    assert isinstance(ct, DateTime)
+    assert isinstance(ct.impl, DateTime)
+    assert ct.impl.timezone
 
     ct = get_mapped_type(payment_status)
     assert isinstance(ct, Enum)
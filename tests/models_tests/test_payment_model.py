@@ -1,5 +1,4 @@
-from sqlalchemy import Numeric, Enum, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Numeric, Enum, DateTime, Uuid
 
 from app.models.payment_model import PaymentModel
 
@@ -21,10 +20,18 @@ def test_payment_model_columns_and_types_and_defaults():
     for name in expected:
         assert name in cols
 
-    assert isinstance(cols["payment_id"].type, UUID)
+    assert isinstance(cols["payment_id"].type, Uuid)
     assert cols["card_number"].type.length == 4
     assert isinstance(cols["amount"].type, Numeric)
     assert cols["amount"].type.precision == 12
     assert cols["amount"].type.scale == 3
-    assert isinstance(cols["creation_time"].type, DateTime)
+    assert isinstance(cols["creation_time"].type.impl, DateTime)
     assert isinstance(cols["status"].type, Enum)
+
+
+def test_payment_model_is_keyed_and_partitioned_by_creation_time():
+    table = PaymentModel.__table__
+    assert [c.name for c in table.primary_key] == ["payment_id", "creation_time"]
+    assert table.dialect_options["postgresql"]["partition_by"] == (
+        "RANGE (creation_time)"
+    )
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import patch
+
+from app.core.db.db_init import DB
+from app.routers.admin_router import router
+from app.services.authorization_handler import get_current_user
+from app.utils.config import settings
+
+app = FastAPI()
+app.include_router(router)
+
+
+async def _get_db_pool(db: DB) -> dict:
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": settings.SU}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.admin_router.db", db):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get("/admin/db_pool")
+    finally:
+        app.dependency_overrides.clear()
+        await db.dispose()
+
+    assert resp.status_code == status.HTTP_200_OK
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_db_pool_stats_of_the_primary_and_the_replica(tmp_path):
+    stats = await _get_db_pool(
+        DB(
+            f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+            f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",
+        )
+    )
+    assert set(stats) == {"worker", "primary", "replica"}
+    assert stats["worker"] == os.getpid()
+    assert stats["primary"]["checked_out"] == stats["replica"]["checked_out"] == 0
+
+
+@pytest.mark.asyncio
+async def test_db_pool_stats_without_a_replica(tmp_path):
+    stats = await _get_db_pool(DB(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"))
+    assert stats["replica"] is None
+    assert "checked_out" in stats["primary"]
@@ -5,7 +5,9 @@ from fastapi import status
 from fastapi.responses import JSONResponse
 from unittest.mock import AsyncMock, patch
 
+from app.models.auth_model import AuthModel
 from app.routers.auth_router import router
+from app.services.authorization_handler import get_current_user
 from app.schemas.auth_schema import UserSchema
 
 app = FastAPI()
@@ -240,3 +242,45 @@ async def test_update_password_failure_raises_http_exception():
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_get_users_does_not_expose_password_hash():
+    su_user = type("U", (), {"user_email": "admin@example.com"})
+    users = [
+        AuthModel(
+            id=1,
+            first_name="A",
+            last_name="B",
+            user_email="a@example.com",
+            user_password_hash="secret-hash",
+        )
+    ]
+    mock_db = AsyncMock()
+    mock_db.get_page.return_value = (users, None)
+
+    app.dependency_overrides[get_current_user] = lambda: su_user
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.auth_router.db_auth", mock_db), patch(
+            "app.routers.auth_router.settings"
+        ) as mock_settings:
+            mock_settings.SU = "admin@example.com"
+
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get("/auth/all")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {
+        "items": [
+            {
+                "id": 1,
+                "first_name": "A",
+                "last_name": "B",
+                "user_email": "a@example.com",
+            }
+        ],
+        "next_cursor": None,
+    }
@@ -1,10 +1,14 @@
 import uuid
 import pytest
+from decimal import Decimal
 from httpx import AsyncClient, ASGITransport
 from fastapi import FastAPI, status
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.routers.payment_router import router
+from app.core.db.operations.db_payment_opers import DBPaymentRepository
+from app.models.payment_summary_model import PaymentSummaryModel
+from app.routers.payment_router import request_hash, router
+from app.services.authorization_handler import get_current_user
 
 app = FastAPI()
 app.include_router(router)
@@ -25,20 +29,17 @@ def fake_payment_obj():
 async def test_create_payment_success(fake_payment_obj):
     payment_payload = {"payment_id": str(fake_payment_obj.payment_id), "amount": 1.23}
 
-    mock_db_payment = AsyncMock()
-    mock_db_payment.create.return_value = fake_payment_obj
-
-    mock_db_payment_user = AsyncMock()
-    mock_db_payment_user.create.return_value = True
+    mock_db_payment_uow = AsyncMock()
+    mock_db_payment_uow.create_payment.return_value = fake_payment_obj.payment_id
 
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.db_payment", mock_db_payment), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ), patch("app.routers.payment_router.get_current_user", mock_current):
+    with patch("app.routers.payment_router.db_payment_uow", mock_db_payment_uow), patch(
+        "app.routers.payment_router.get_current_user", mock_current
+    ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
             resp = await ac.post("/payment/", json=payment_payload)
@@ -49,15 +50,15 @@ async def test_create_payment_success(fake_payment_obj):
 
 @pytest.mark.asyncio
 async def test_create_payment_fail_create(payment_payload=None):
-    mock_db_payment = AsyncMock()
-    mock_db_payment.create.return_value = None
+    mock_db_payment_uow = AsyncMock()
+    mock_db_payment_uow.create_payment.return_value = None
 
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.db_payment", mock_db_payment), patch(
+    with patch("app.routers.payment_router.db_payment_uow", mock_db_payment_uow), patch(
         "app.routers.payment_router.get_current_user", mock_current
     ):
 
@@ -70,21 +71,18 @@ async def test_create_payment_fail_create(payment_payload=None):
 
 @pytest.mark.asyncio
 async def test_create_payment_fail_user_relation(fake_payment_obj):
-    mock_db_payment = AsyncMock()
-    mock_db_payment.create.return_value = fake_payment_obj
-    mock_db_payment.delete.return_value = None
-
-    mock_db_payment_user = AsyncMock()
-    mock_db_payment_user.create.return_value = False
+    # the unit of work rolls the payment back when linking it fails
+    mock_db_payment_uow = AsyncMock()
+    mock_db_payment_uow.create_payment.return_value = None
 
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.db_payment", mock_db_payment), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ), patch("app.routers.payment_router.get_current_user", mock_current):
+    with patch("app.routers.payment_router.db_payment_uow", mock_db_payment_uow), patch(
+        "app.routers.payment_router.get_current_user", mock_current
+    ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
             resp = await ac.post("/payment/", json={"amount": 1.23})
@@ -100,7 +98,7 @@ async def test_get_payments_success():
 
     fake_list = [{"payment_id": "1"}, {"payment_id": "2"}]
     mock_db_payment = AsyncMock()
-    mock_db_payment.get_all.return_value = fake_list
+    mock_db_payment.get_page.return_value = (fake_list, None)
 
     transport = ASGITransport(app=app)
     with patch("app.routers.payment_router.get_current_user", mock_get_current), patch(
@@ -149,7 +147,7 @@ async def test_get_payment_by_id_found(fake_payment_obj):
     ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get(f"/payment/id/{fake_payment_obj.payment_id}")
+            resp = await ac.get(f"/payment/{fake_payment_obj.payment_id}")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -170,7 +168,7 @@ async def test_get_payment_by_id_not_found():
     ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get(f"/payment/id/{uuid.uuid4()}")
+            resp = await ac.get(f"/payment/{uuid.uuid4()}")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -181,16 +179,12 @@ async def test_get_user_payments_empty():
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    mock_db_payment_user.get_by_user.return_value = []
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ):
+    with patch("app.routers.payment_router.get_current_user", mock_current):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get("/payment/email/user@example.com/all")
+            resp = await ac.get("/payment/user_email/all")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -201,20 +195,17 @@ async def test_get_user_payments_some(fake_payment_obj):
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    rec = type("R", (), {"payment_id": fake_payment_obj.payment_id})
-    mock_db_payment_user.get_by_user.return_value = [rec]
 
     mock_db_payment = AsyncMock()
-    mock_db_payment.get.return_value = fake_payment_obj
+    mock_db_payment.get_by_user.return_value = ([fake_payment_obj], None)
 
     transport = ASGITransport(app=app)
     with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ), patch("app.routers.payment_router.db_payment", mock_db_payment):
+        "app.routers.payment_router.db_payment", mock_db_payment
+    ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get("/payment/email/user@example.com/all")
+            resp = await ac.get("/payment/user_email/all")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -225,16 +216,12 @@ async def test_get_user_payments_by_status_no_payments():
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    mock_db_payment_user.get_by_user.return_value = []
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ):
+    with patch("app.routers.payment_router.get_current_user", mock_current):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get(f"/payment/email/user@example.com/Создан")
+            resp = await ac.get("/payment/user_email/status/Создан")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -245,20 +232,17 @@ async def test_get_user_payments_by_status_some(fake_payment_obj):
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    rec = type("R", (), {"payment_id": fake_payment_obj.payment_id})
-    mock_db_payment_user.get_by_user.return_value = [rec]
 
     mock_db_payment = AsyncMock()
-    mock_db_payment.get_by_status.return_value = fake_payment_obj
+    mock_db_payment.get_by_user_and_status.return_value = ([fake_payment_obj], None)
 
     transport = ASGITransport(app=app)
     with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ), patch("app.routers.payment_router.db_payment", mock_db_payment):
+        "app.routers.payment_router.db_payment", mock_db_payment
+    ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get(f"/payment/email/user@example.com/Создан")
+            resp = await ac.get("/payment/user_email/status/Создан")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -269,16 +253,12 @@ async def test_get_user_payments_by_amount_no_payments():
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    mock_db_payment_user.get_by_user.return_value = []
 
     transport = ASGITransport(app=app)
-    with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ):
+    with patch("app.routers.payment_router.get_current_user", mock_current):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get("/payment/email/user@example.com/1.23")
+            resp = await ac.get("/payment/user_email/amount/1.23")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -289,20 +269,17 @@ async def test_get_user_payments_by_amount_some(fake_payment_obj):
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
     )
-    mock_db_payment_user = AsyncMock()
-    rec = type("R", (), {"payment_id": fake_payment_obj.payment_id})
-    mock_db_payment_user.get_by_user.return_value = [rec]
 
     mock_db_payment = AsyncMock()
-    mock_db_payment.get_by_amount.return_value = fake_payment_obj
+    mock_db_payment.get_by_user_and_amount.return_value = ([fake_payment_obj], None)
 
     transport = ASGITransport(app=app)
     with patch("app.routers.payment_router.get_current_user", mock_current), patch(
-        "app.routers.payment_router.db_payment_user", mock_db_payment_user
-    ), patch("app.routers.payment_router.db_payment", mock_db_payment):
+        "app.routers.payment_router.db_payment", mock_db_payment
+    ):
 
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
-            resp = await ac.get("/payment/email/user@example.com/1.23")
+            resp = await ac.get("/payment/user_email/amount/1.23")
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
@@ -312,6 +289,7 @@ async def test_get_user_payments_by_amount_some(fake_payment_obj):
 async def test_update_payment_status_not_found():
     pid = uuid.uuid4()
     mock_db_payment = AsyncMock()
+    mock_db_payment.update_if_created.return_value = None
     mock_db_payment.get.return_value = None
 
     mock_current = AsyncMock(
@@ -334,6 +312,7 @@ async def test_update_payment_status_not_found():
 async def test_update_payment_status_complete_state(fake_payment_obj):
     mock_db_payment = AsyncMock()
     fake_payment_obj.status = "Оплачен"
+    mock_db_payment.update_if_created.return_value = None
     mock_db_payment.get.return_value = fake_payment_obj
 
     mock_current = AsyncMock(
@@ -357,8 +336,7 @@ async def test_update_payment_status_complete_state(fake_payment_obj):
 @pytest.mark.asyncio
 async def test_update_payment_status_success(fake_payment_obj):
     mock_db_payment = AsyncMock()
-    mock_db_payment.get.return_value = fake_payment_obj
-    mock_db_payment.update.return_value = None
+    mock_db_payment.update_if_created.return_value = fake_payment_obj
 
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
@@ -381,8 +359,7 @@ async def test_update_payment_status_success(fake_payment_obj):
 @pytest.mark.asyncio
 async def test_update_payment_status_update_raises(fake_payment_obj):
     mock_db_payment = AsyncMock()
-    mock_db_payment.get.return_value = fake_payment_obj
-    mock_db_payment.update.side_effect = Exception("boom")
+    mock_db_payment.update_if_created.side_effect = Exception("boom")
 
     mock_current = AsyncMock(
         return_value=type("U", (), {"user_email": "user@example.com"})
@@ -400,3 +377,451 @@ async def test_update_payment_status_update_raises(fake_payment_obj):
 
     assert resp.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Not authenticated" in resp.json()["detail"]
+
+
+def _counting_session_factory(rows):
+    session = MagicMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+    session.rollback = AsyncMock()
+
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=session)
+    session_cm.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=session_cm), session
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/payment/user_email/all",
+        "/payment/user_email/status/Создан",
+        "/payment/user_email/amount/10.5",
+        "/payment/search?status=Создан&status=Оплачен&amount_min=1&name=john",
+    ],
+)
+async def test_user_payment_listing_runs_single_query(url):
+    payment = {
+        "payment_id": str(uuid.uuid4()),
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "second_name": None,
+        "amount": "1.230",
+        "creation_time": None,
+        "status": "Создан",
+    }
+    session_factory, session = _counting_session_factory([payment])
+    repo = DBPaymentRepository(session_factory)
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment", repo):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get(url)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {
+        "items": [{**payment, "amount": 1.23}],
+        "next_cursor": None,
+    }
+    session_factory.assert_called_once()
+    session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_user_payment_listing_invalid_cursor():
+    session_factory, session = _counting_session_factory([])
+    repo = DBPaymentRepository(session_factory)
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment", repo):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get("/payment/user_email/all?cursor=garbage")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json()["detail"] == "Invalid cursor"
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_returns_payment_id():
+    payment_id = uuid.uuid4()
+    mock_uow = AsyncMock()
+    mock_uow.create_payment.return_value = payment_id
+    payload = {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": "10.5",
+    }
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment_uow", mock_uow):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.post("/payment/", json=payload)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {
+        "ok": True,
+        "msg": "Payment was created",
+        "payment_id": str(payment_id),
+    }
+    mock_uow.create_payment.assert_awaited_once()
+    assert mock_uow.create_payment.await_args[0][0] == "user@example.com"
+
+
+@pytest.mark.asyncio
+async def test_create_payment_failure_returns_400():
+    mock_uow = AsyncMock()
+    mock_uow.create_payment.return_value = None
+    payload = {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": "10.5",
+    }
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment_uow", mock_uow):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.post("/payment/", json=payload)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json()["detail"] == "Failed to create payment"
+
+
+@pytest.mark.asyncio
+async def test_create_payments_batch_returns_per_item_results():
+    created_ids = [uuid.uuid4(), uuid.uuid4()]
+    mock_uow = AsyncMock()
+    mock_uow.create_payments.return_value = created_ids
+    good = {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": "10.5",
+    }
+    bad = dict(good, first_name="john", amount="-1")
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment_uow", mock_uow):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.post("/payment/batch", json=[good, bad, good])
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    body = resp.json()
+    assert body["ok"] is False
+    assert body["created"] == 2
+    assert body["failed"] == 1
+
+    results = body["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0] == {"index": 0, "ok": True, "payment_id": str(created_ids[0])}
+    assert results[2] == {"index": 2, "ok": True, "payment_id": str(created_ids[1])}
+    assert results[1]["ok"] is False
+    assert {e["loc"][0] for e in results[1]["errors"]} == {"first_name", "amount"}
+
+    mock_uow.create_payments.assert_awaited_once()
+    assert len(mock_uow.create_payments.await_args[0][1]) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_payments_batch_db_failure_returns_400():
+    mock_uow = AsyncMock()
+    mock_uow.create_payments.return_value = None
+    item = {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": "10.5",
+    }
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment_uow", mock_uow):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.post("/payment/batch", json=[item])
+                empty = await ac.post("/payment/batch", json=[])
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert empty.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_payment_summary_defaults_to_zero_per_status():
+    mock_db_summary = AsyncMock()
+    mock_db_summary.get.return_value = PaymentSummaryModel(
+        user_email="user@example.com",
+        created_count=2,
+        created_amount=Decimal("12.500"),
+        paid_count=1,
+        paid_amount=Decimal("7.000"),
+    )
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment_summary", mock_db_summary):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get("/payment/summary")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {
+        "user_email": "user@example.com",
+        "statuses": {
+            "Создан": {"count": 2, "amount": 12.5},
+            "Оплачен": {"count": 1, "amount": 7.0},
+            "Отменен": {"count": 0, "amount": 0.0},
+        },
+    }
+    mock_db_summary.get.assert_awaited_once_with("user@example.com")
+
+
+@pytest.fixture
+def payment_body():
+    return {
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "amount": 5,
+    }
+
+
+async def _post_with_key(body, mock_idempotency, mock_uow):
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch(
+            "app.routers.payment_router.db_idempotency", mock_idempotency
+        ), patch("app.routers.payment_router.db_payment_uow", mock_uow):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await ac.post(
+                    "/payment/", json=body, headers={"Idempotency-Key": "k1"}
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_replays_completed_key(payment_body):
+    payment_id = uuid.uuid4()
+    mock_idempotency = MagicMock()
+    mock_idempotency.get = AsyncMock(
+        return_value=MagicMock(
+            payment_id=payment_id, request_hash=request_hash(payment_body)
+        )
+    )
+    mock_uow = AsyncMock()
+
+    resp = await _post_with_key(payment_body, mock_idempotency, mock_uow)
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["payment_id"] == str(payment_id)
+    assert resp.headers["Idempotent-Replayed"] == "true"
+    mock_idempotency.get.assert_awaited_once_with("user@example.com", "k1")
+    assert mock_uow.mock_calls == []
+
+
+@pytest.mark.asyncio
+async def test_create_payment_rejects_key_reused_for_other_request(payment_body):
+    mock_idempotency = MagicMock()
+    mock_idempotency.get = AsyncMock(
+        return_value=MagicMock(payment_id=uuid.uuid4(), request_hash="other")
+    )
+
+    resp = await _post_with_key(payment_body, mock_idempotency, AsyncMock())
+
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "Idempotency-Key" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_create_payment_first_use_of_key(payment_body):
+    record = MagicMock(payment_id=uuid.uuid4(), request_hash=request_hash(payment_body))
+    mock_idempotency = MagicMock()
+    mock_idempotency.get = AsyncMock(return_value=None)
+    mock_uow = AsyncMock()
+    mock_uow.create_payment_once.return_value = (record, True)
+
+    resp = await _post_with_key(payment_body, mock_idempotency, mock_uow)
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["payment_id"] == str(record.payment_id)
+    assert "Idempotent-Replayed" not in resp.headers
+    args = mock_uow.create_payment_once.await_args[0]
+    assert args[0] == "user@example.com"
+    assert args[2:4] == ("k1", request_hash(payment_body))
+    mock_idempotency.remember.assert_called_once_with(record)
+
+
+async def _put_status(mock_db_payment, status_value="Оплачен"):
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment", mock_db_payment):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await ac.put(
+                    f"/payment/{uuid.uuid4()}", params={"status": status_value}
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_update_status_is_a_single_call_on_success(fake_payment_obj):
+    mock_db_payment = AsyncMock()
+    mock_db_payment.update_if_created.return_value = fake_payment_obj
+
+    resp = await _put_status(mock_db_payment)
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {"ok": True, "msg": "Payment status was changed"}
+    mock_db_payment.update_if_created.assert_awaited_once()
+    mock_db_payment.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_update_status_of_final_payment(fake_payment_obj):
+    fake_payment_obj.status = "Отменен"
+    mock_db_payment = AsyncMock()
+    mock_db_payment.update_if_created.return_value = None
+    mock_db_payment.get.return_value = fake_payment_obj
+
+    resp = await _put_status(mock_db_payment)
+
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert resp.json()["detail"] == "Payment complete"
+
+
+@pytest.mark.asyncio
+async def test_update_status_of_missing_payment():
+    mock_db_payment = AsyncMock()
+    mock_db_payment.update_if_created.return_value = None
+    mock_db_payment.get.return_value = None
+
+    resp = await _put_status(mock_db_payment)
+
+    assert resp.status_code == status.HTTP_404_NOT_FOUND
+    assert resp.json()["detail"] == "Payment doesn't exist"
+
+
+@pytest.mark.asyncio
+async def test_search_passes_all_filters_in_one_call():
+    mock_db_payment = AsyncMock()
+    mock_db_payment.search.return_value = ([], None)
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment", mock_db_payment):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get(
+                    "/payment/search",
+                    params=[
+                        ("status", "Отменен"),
+                        ("status", "Создан"),
+                        ("amount_min", "1.5"),
+                        ("amount_max", "10"),
+                        ("created_from", "2025-01-01T00:00:00"),
+                        ("created_to", "2025-02-01T00:00:00+03:00"),
+                        ("name", "john d"),
+                        ("sort", "-amount"),
+                        ("limit", "20"),
+                    ],
+                )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json() == {"items": [], "next_cursor": None}
+    email, filters, limit, cursor = mock_db_payment.search.await_args.args
+    assert (email, limit, cursor) == ("user@example.com", 20, None)
+    assert filters.status == ["Отменен", "Создан"]
+    assert (filters.amount_min, filters.amount_max) == (Decimal("1.5"), Decimal(10))
+    assert filters.created_from.tzinfo is not None
+    assert filters.name == "JOHN D"
+    assert filters.sort == "-amount"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"amount_min": "10", "amount_max": "1"},
+        {"created_from": "2025-02-01", "created_to": "2025-01-01"},
+        {"status": "Удалён"},
+        {"name": "J%"},
+        {"sort": "status"},
+    ],
+)
+async def test_search_rejects_invalid_filters(params):
+    mock_db_payment = AsyncMock()
+
+    app.dependency_overrides[get_current_user] = lambda: type(
+        "U", (), {"user_email": "user@example.com"}
+    )
+    transport = ASGITransport(app=app)
+    try:
+        with patch("app.routers.payment_router.db_payment", mock_db_payment):
+            async with AsyncClient(transport=transport, base_url="http://test") as ac:
+                resp = await ac.get("/payment/search", params=params)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert resp.json()["detail"][0]["loc"][0] == "query"
+    assert mock_db_payment.mock_calls == []
+
+
+def test_single_filter_listings_are_deprecated():
+    paths = app.openapi()["paths"]
+    assert paths["/payment/user_email/status/{status}"]["get"]["deprecated"]
+    assert paths["/payment/user_email/amount/{amount}"]["get"]["deprecated"]
+    assert "deprecated" not in paths["/payment/search"]["get"]
@@ -1,7 +1,8 @@
 import pytest
 from pydantic import ValidationError
 
-from app.schemas.auth_schema import AuthSchema, UserSchema
+from app.models.auth_model import AuthModel
+from app.schemas.auth_schema import AuthSchema, UserOut, UserSchema
 
 
 def test_authschema_valid():
@@ -49,3 +50,20 @@ def test_userschema_invalid_name_fields(first, last):
             first_name=first,
             last_name=last,
         )
+
+
+def test_userout_omits_password_hash():
+    user = AuthModel(
+        id=1,
+        first_name="John",
+        last_name="Doe",
+        user_email="u@example.com",
+        user_password_hash="secret-hash",
+    )
+
+    assert UserOut.model_validate(user).model_dump() == {
+        "id": 1,
+        "first_name": "John",
+        "last_name": "Doe",
+        "user_email": "u@example.com",
+    }
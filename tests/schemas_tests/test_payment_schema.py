@@ -1,8 +1,19 @@
+import datetime
+import uuid
+
 import pytest
 from decimal import Decimal
 from pydantic import ValidationError
 
-from app.schemas.payment_schema import PaymentSchema
+from app.models.payment_model import PaymentModel
+from app.models.payment_user_model import PaymentUserModel
+from app.schemas.page_schema import Page
+from app.schemas.payment_schema import (
+    PaymentOut,
+    PaymentSchema,
+    PaymentSearchSchema,
+    PaymentUserOut,
+)
 
 
 @pytest.mark.parametrize(
@@ -86,3 +97,81 @@ def test_amount_rejects_too_many_decimal_places():
             first_name="DEF",
             amount=Decimal("1.0005"),
         )
+
+
+def test_payment_out_reads_orm_attributes():
+    payment_id = uuid.uuid4()
+    created = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    payment = PaymentModel(
+        payment_id=payment_id,
+        card_number="1234",
+        first_name="JOHN",
+        last_name="DOE",
+        second_name=None,
+        amount=Decimal("10.500"),
+        creation_time=created,
+        status="Создан",
+    )
+
+    out = PaymentOut.model_validate(payment)
+
+    assert out.payment_id == payment_id
+    assert out.amount == Decimal("10.500")
+    assert out.model_dump(mode="json") == {
+        "payment_id": str(payment_id),
+        "card_number": "1234",
+        "first_name": "JOHN",
+        "last_name": "DOE",
+        "second_name": None,
+        "amount": 10.5,
+        "creation_time": "2024-01-02T03:04:05Z",
+        "status": "Создан",
+    }
+
+
+def test_page_of_payment_users_serialises_in_one_pass():
+    payment_id = uuid.uuid4()
+    record = PaymentUserModel(user_email="u@example.com", payment_id=payment_id)
+
+    page = Page[PaymentUserOut].model_validate(
+        {"items": [record], "next_cursor": "abc"}, from_attributes=True
+    )
+
+    assert page.model_dump_json() == (
+        '{"items":[{"user_email":"u@example.com",'
+        f'"payment_id":"{payment_id}"}}],"next_cursor":"abc"}}'
+    )
+
+
+def test_search_normalises_filters():
+    search = PaymentSearchSchema(
+        status=["Оплачен", "Создан", "Оплачен"],
+        created_from=datetime.datetime(2025, 1, 1),
+        name="john d",
+    )
+    assert search.status == ["Оплачен", "Создан"]
+    assert search.created_from.tzinfo == datetime.timezone.utc
+    assert search.name == "JOHN D"
+    assert search.sort == "-creation_time"
+    # equal bounds are one amount
+    assert PaymentSearchSchema(amount_min=5, amount_max=5).amount_max == 5
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"status": []},
+        {"amount_min": -1},
+        {"amount_min": 10, "amount_max": 1},
+        {
+            "created_from": datetime.datetime(2025, 1, 1),
+            "created_to": datetime.datetime(2025, 1, 1),
+        },
+        {"name": "JO_N"},
+        {"name": "J%"},
+        {"sort": "status"},
+    ],
+)
+def test_search_rejects_invalid_filters(filters):
+    with pytest.raises(ValidationError):
+        PaymentSearchSchema(**filters)
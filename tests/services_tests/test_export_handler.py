@@ -0,0 +1,76 @@
+import csv
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.services.export_handler import EXPORT_FIELDS, export_stream
+
+
+def _row(email="user@example.com", second_name=None):
+    return (
+        uuid.uuid4(),
+        email,
+        "1234",
+        "JOHN",
+        "DOE",
+        second_name,
+        Decimal("10.500"),
+        datetime.datetime(2025, 9, 6, 12, 0, tzinfo=datetime.timezone.utc),
+        "Создан",
+    )
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_emits_one_chunk_per_batch():
+    first = [_row(), _row(second_name="IVANOVICH")]
+    second = [_row(email=None)]
+
+    chunks = await _collect(export_stream(_batches(first, second), "ndjson"))
+    assert len(chunks) == 2
+
+    lines = b"".join(chunks).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert len(records) == 3
+    assert list(records[0]) == list(EXPORT_FIELDS)
+    assert records[0]["payment_id"] == str(first[0][0])
+    assert records[0]["amount"] == "10.500"
+    assert records[0]["creation_time"] == "2025-09-06T12:00:00+00:00"
+    assert records[0]["status"] == "Создан"
+    assert records[1]["second_name"] == "IVANOVICH"
+    assert records[2]["user_email"] is None
+
+
+@pytest.mark.asyncio
+async def test_csv_export_writes_header_then_batches():
+    first = [_row()]
+    second = [_row(second_name="IVANOVICH"), _row()]
+
+    chunks = await _collect(export_stream(_batches(first, second), "csv"))
+    assert len(chunks) == 3
+
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert tuple(rows[0]) == EXPORT_FIELDS
+    assert len(rows) == 4
+    assert rows[1][5] == ""
+    assert rows[2][5] == "IVANOVICH"
+    assert rows[3][8] == "Создан"
+
+
+@pytest.mark.asyncio
+async def test_export_of_empty_table():
+    assert await _collect(export_stream(_batches(), "ndjson")) == []
+    chunks = await _collect(export_stream(_batches(), "csv"))
+    assert b"".join(chunks).decode().strip() == ",".join(EXPORT_FIELDS)
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.hash_handler import get_hash, is_hash_eq
+from app.services.hash_service import HashService
+
+
+@pytest.mark.asyncio
+async def test_run_without_process_pool_uses_default_executor():
+    service = HashService(max_workers=1, max_concurrency=2, max_queue=4)
+
+    h = await service.run(get_hash, "password123")
+    assert await service.run(is_hash_eq, "password123", h) is True
+
+    stats = service.stats()
+    assert stats["process_pool"] is False
+    assert stats["completed"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_in_process_pool():
+    service = HashService(max_workers=1, max_concurrency=1, max_queue=4)
+    service.start()
+    try:
+        h = await service.run(get_hash, "password123")
+        assert await service.run(is_hash_eq, "password123", h) is True
+        assert await service.run(is_hash_eq, "wrong", h) is False
+        assert service.stats()["process_pool"] is True
+    finally:
+        service.shutdown()
+    assert service.stats()["process_pool"] is False
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_queue_full_rejects_with_503():
+    service = HashService(max_workers=1, max_concurrency=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(service.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+    queued = asyncio.create_task(service.run(lambda: "queued"))
+    await asyncio.sleep(0)
+
+    assert service.stats()["in_flight"] == 1
+    assert service.stats()["queue_depth"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await service.run(lambda: "rejected")
+    assert exc.value.status_code == 503
+    assert service.stats()["rejected"] == 1
+
+    release.set()
+    assert await running is True
+    assert await queued == "queued"
+
+    stats = service.stats()
+    assert stats["completed"] == 2
+    assert stats["queue_depth"] == 0
+    assert stats["wait_time_max"] > 0
@@ -1,3 +1,5 @@
+import hashlib
+import time
 from datetime import timedelta
 import pytest
 from fastapi.responses import JSONResponse
@@ -122,3 +124,45 @@ async def test_get_current_user_success(monkeypatch):
     req = _make_req_with_cookie("t")
     user = await ah.get_current_user(req)
     assert user == fake_user
+
+
+def test_verify_caches_payload_for_repeated_token(monkeypatch, capsys):
+    jh.verified_tokens.clear()
+    token = jh.create_access_token("u@example.com", expires_delta=timedelta(minutes=1))
+
+    calls = []
+    real_decode = jh.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jh.jwt, "decode", counting_decode)
+
+    first = jh.verify_jwt_token(token)
+    second = jh.verify_jwt_token(token)
+    assert first == second
+    assert len(calls) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_verify_cache_entry_does_not_outlive_token(monkeypatch):
+    jh.verified_tokens.clear()
+    token = jh.create_access_token("u@example.com", expires_delta=timedelta(seconds=3))
+    jh.verify_jwt_token(token)
+    assert len(jh.verified_tokens) == 1
+
+    real_monotonic = time.monotonic
+    monkeypatch.setattr(time, "monotonic", lambda: real_monotonic() + 5)
+    key = hashlib.sha256(token.encode()).digest()
+    assert jh.verified_tokens.get(key) is None
+
+
+def test_invalid_tokens_are_not_cached():
+    jh.verified_tokens.clear()
+    with pytest.raises(HTTPException):
+        jh.verify_jwt_token("not-a-token")
+    expired = jh.create_access_token("u", expires_delta=timedelta(minutes=-1))
+    with pytest.raises(HTTPException):
+        jh.verify_jwt_token(expired)
+    assert len(jh.verified_tokens) == 0
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from app.utils.cache import TTLCache
+
+
+def test_get_set_and_counters():
+    cache = TTLCache(maxsize=2, ttl=10)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b", "default") == "default"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["size"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=5)
+    with patch("app.utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+        cache.set("short", 2, ttl=1)
+        cache.set("long", 3, ttl=60)
+
+    with patch("app.utils.cache.time.monotonic", return_value=102.0):
+        assert cache.get("a") == 1
+        assert cache.get("short") is None
+
+    with patch("app.utils.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") is None
+        assert cache.get("long") is None
+    assert len(cache) == 0
+
+
+def test_pop_and_clear():
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_zero_maxsize_disables_cache():
+    cache = TTLCache(maxsize=0, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,67 @@
+import logging
+import queue
+import threading
+
+import pytest
+
+from app.utils.logger_config import BoundedQueueHandler, worker_log_file
+
+
+def make_record(level: int) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+def test_drop_policy_counts_dropped_records():
+    handler = BoundedQueueHandler(queue.Queue(2), "drop")
+
+    for _ in range(5):
+        handler.emit(make_record(logging.ERROR))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert handler.stats()["dropped"] == 3
+
+
+def test_drop_debug_first_keeps_room_for_warnings():
+    handler = BoundedQueueHandler(queue.Queue(10), "drop-debug-first")
+
+    for _ in range(20):
+        handler.emit(make_record(logging.INFO))
+
+    assert handler.queue.qsize() == 9
+    assert handler.dropped == 11
+
+    handler.emit(make_record(logging.WARNING))
+    handler.emit(make_record(logging.DEBUG))
+
+    assert handler.queue.qsize() == 10
+    assert handler.dropped == 12
+
+
+def test_block_policy_waits_for_room():
+    handler = BoundedQueueHandler(queue.Queue(1), "block")
+    handler.emit(make_record(logging.INFO))
+
+    done = threading.Event()
+
+    def emit():
+        handler.emit(make_record(logging.INFO))
+        done.set()
+
+    t = threading.Thread(target=emit)
+    t.start()
+    assert not done.wait(0.05)
+
+    handler.queue.get_nowait()
+    assert done.wait(5)
+    t.join()
+    assert handler.dropped == 0
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(1), "sometimes")
+
+
+def test_forked_workers_log_to_files_of_their_own():
+    assert worker_log_file("logs/app.log", 4242) == "logs/app.4242.log"
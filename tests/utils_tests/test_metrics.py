@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from app.utils.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+
+    requests.inc("/a")
+    requests.inc("/a")
+    requests.inc('/b"quoted"')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 2.0' in text
+    assert 'requests_total{route="/b\\"quoted\\""} 1.0' in text
+    assert "# TYPE in_flight gauge" in text
+    assert "in_flight 1.0" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency", "Latency.", ("route",), buckets=(0.1, 1))
+
+    latency.observe(0.05, "/a")
+    latency.observe(0.1, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(3, "/a")
+
+    text = registry.render()
+    assert 'latency_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_sum{route="/a"} 3.65' in text
+    assert 'latency_count{route="/a"} 4.0' in text
+    assert latency.count("/a") == 4
+
+
+def test_wrong_labels_and_duplicates_are_rejected():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+
+    with pytest.raises(ValueError):
+        requests.inc()
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Again.")
+
+
+def test_per_worker_samples_carry_the_pid():
+    registry = MetricsRegistry(per_worker=True)
+    registry.counter("requests_total", "Requests.", ("route",)).inc("/a")
+    registry.histogram("latency", "Latency.", buckets=(1,)).observe(0.5)
+
+    text = registry.render()
+    worker = f'worker="{os.getpid()}"'
+    assert f'requests_total{{{worker},route="/a"}} 1.0' in text
+    assert f'latency_bucket{{{worker},le="1.0"}} 1' in text
+    assert f"latency_count{{{worker}}} 1.0" in text